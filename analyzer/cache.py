@@ -0,0 +1,130 @@
+"""
+분석 결과 캐시.
+분석 결과는 수집이 커밋될 때만 바뀌므로 (함수, 인자, 데이터 세대 번호)를 키로 결과를 보관한다.
+데이터 세대 번호는 수집기가 구성종목을 바꾸는 트랜잭션에서 올리는 DB 값
+(crawler/ledger.py의 data_generation)이므로, 여러 웹 워커 프로세스가 같은 DB를 써도
+어느 프로세스에서 커밋하든 다음 조회부터 모든 워커가 새로 계산한다.
+
+캐시는 프로세스마다 하나이며 RESULT_CACHE_SIZE개를 넘으면 가장 오래 쓰지 않은 항목부터 버린다.
+캐시된 결과는 호출자끼리 공유하므로 반환값을 수정하면 안 된다.
+"""
+
+import functools
+import logging
+import threading
+from collections import OrderedDict
+
+from config import RESULT_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    스레드 안전한 LRU 결과 캐시. hits / misses로 적중 횟수를 센다.
+    maxsize가 0이면 저장하지 않는다 (항상 miss).
+    """
+
+    def __init__(self, maxsize: int = None):
+        self.maxsize = RESULT_CACHE_SIZE if maxsize is None else maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def observe(self, generation: int):
+        """데이터 세대가 바뀌었으면 이전 세대 항목을 모두 버린다 (더 이상 조회되지 않으므로)."""
+        with self._lock:
+            if generation != self._generation:
+                self._data.clear()
+                self._generation = generation
+
+    def get(self, key):
+        """값을 꺼내고 최근 사용으로 표시한다. 없으면 (False, None)."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        """값을 넣고, 크기를 넘으면 가장 오래 쓰지 않은 항목을 버린다."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """모든 항목과 카운터를 비운다."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        캐시 상태를 반환한다.
+
+        Returns:
+            {"size", "maxsize", "hits", "misses", "hit_rate"}
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+result_cache = ResultCache()
+
+
+def current_generation() -> int:
+    """
+    읽기 연결로 현재 데이터 세대 번호를 조회한다.
+
+    Returns:
+        세대 번호. 세대 테이블이 없으면 None (캐시하지 않음)
+    """
+    from analyzer.pool import get_read_connection
+    from crawler.ledger import data_generation
+
+    conn = get_read_connection()
+    try:
+        return data_generation(conn)
+    finally:
+        conn.close()
+
+
+def cached(func):
+    """
+    분석 함수 결과를 (함수, 인자, 데이터 세대 번호) 키로 result_cache에 보관하는 데코레이터.
+    인자는 해시 가능해야 한다.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        generation = current_generation()
+        if generation is None:
+            return func(*args, **kwargs)
+
+        result_cache.observe(generation)
+        key = (name, args, tuple(sorted(kwargs.items())), generation)
+        found, value = result_cache.get(key)
+        if found:
+            return value
+        value = func(*args, **kwargs)
+        result_cache.put(key, value)
+        return value
+
+    return wrapper
@@ -0,0 +1,181 @@
+"""
+컬럼형 스냅샷 저장소.
+수집일별 구성종목을 (etf, stock, count, weight) 구조화 배열 하나로 .npy 파일에 저장하고,
+분석기는 np.load(mmap_mode="r")로 복사 없이 읽는다. 여러 웹 워커가 같은 파일을 열면
+각자 행 객체를 만드는 대신 OS 페이지 캐시를 공유한다.
+
+- etf: columnar_etf 테이블의 고정 정수 인덱스
+- stock: stock_master.stock_id
+- count: 주식수 (NULL은 -1)
+- weight: 비중 (NULL은 NaN)
+
+수집기는 스냅샷을 바꾼 날짜를 같은 트랜잭션에서 columnar_dirty에 기록하고,
+커밋 후 flush_dirty()로 해당 날짜 파일을 다시 만든다. 파일이 없거나 dirty인 날짜는
+load_snapshot()이 None을 반환하므로 호출자는 SQLite 조회로 대체한다.
+
+사용법:
+    python -m analyzer.columnar rebuild
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+
+import numpy as np
+
+from config import COLUMNAR_DIR
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DTYPE = np.dtype([
+    ("etf", "<i4"),
+    ("stock", "<i8"),
+    ("count", "<i8"),
+    ("weight", "<f8"),
+])
+
+
+def _snapshot_path(collect_date: str) -> str:
+    return os.path.join(COLUMNAR_DIR, f"{collect_date}.npy")
+
+
+def etf_codes(conn: sqlite3.Connection) -> dict:
+    """
+    컬럼형 저장소의 ETF 인덱스 → 종목코드 매핑을 반환한다.
+
+    Returns:
+        {etf_idx: etf_code}
+    """
+    try:
+        rows = conn.execute("SELECT etf_idx, etf_code FROM columnar_etf").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {r[0]: r[1] for r in rows}
+
+
+def _etf_indexes(conn: sqlite3.Connection, codes) -> dict:
+    """ETF 코드에 고정 인덱스를 부여한다. 없는 코드는 새로 등록한다."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO columnar_etf (etf_code) VALUES (?)", [(c,) for c in set(codes)]
+    )
+    return {r[1]: r[0] for r in conn.execute("SELECT etf_idx, etf_code FROM columnar_etf")}
+
+
+def build_snapshot(conn: sqlite3.Connection, collect_date: str, rows: list):
+    """
+    한 수집일의 스냅샷 파일을 만든다. 행이 없으면 파일을 삭제한다.
+    행 순서는 rows 순서를 유지하고, 임시 파일에 쓴 뒤 교체하므로
+    읽는 쪽은 항상 완전한 파일만 본다.
+
+    Args:
+        conn: DB 연결 (ETF 인덱스 등록용)
+        collect_date: 수집 날짜
+        rows: [{"etf_code", "stock_id", "stock_count", "weight"}, ...]
+    """
+    path = _snapshot_path(collect_date)
+    if not rows:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    etf_idx = _etf_indexes(conn, (r["etf_code"] for r in rows))
+    arr = np.empty(len(rows), dtype=SNAPSHOT_DTYPE)
+    arr["etf"] = [etf_idx[r["etf_code"]] for r in rows]
+    arr["stock"] = [r["stock_id"] for r in rows]
+    arr["count"] = [-1 if r["stock_count"] is None else r["stock_count"] for r in rows]
+    arr["weight"] = [np.nan if r["weight"] is None else r["weight"] for r in rows]
+
+    os.makedirs(COLUMNAR_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(conn: sqlite3.Connection, collect_date: str):
+    """
+    수집일 스냅샷을 메모리 매핑으로 연다 (복사 없음, 읽기 전용).
+
+    Args:
+        conn: DB 연결 (dirty 여부 확인용)
+        collect_date: 수집 날짜
+
+    Returns:
+        SNAPSHOT_DTYPE 구조화 배열(memmap). 파일이 없거나 갱신 대기 중이면 None
+    """
+    try:
+        dirty = conn.execute(
+            "SELECT 1 FROM columnar_dirty WHERE collect_date = ?", (collect_date,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if dirty:
+        return None
+
+    try:
+        return np.load(_snapshot_path(collect_date), mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def flush_dirty(conn: sqlite3.Connection, loader) -> int:
+    """
+    columnar_dirty에 기록된 날짜의 스냅샷 파일을 다시 만든다.
+    날짜마다 쓰기 잠금을 잡은 상태에서 조회 → 파일 교체 → dirty 행 삭제 후 커밋하므로,
+    그 사이 다른 writer가 같은 날짜를 다시 dirty로 표시해도 유실되지 않는다.
+
+    Args:
+        conn: 쓰기 DB 연결
+        loader: loader(conn, collect_date) → 해당 날짜 구성종목 행 리스트
+
+    Returns:
+        다시 만든 날짜 수
+    """
+    dates = [r[0] for r in conn.execute("SELECT collect_date FROM columnar_dirty").fetchall()]
+    for collect_date in dates:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            build_snapshot(conn, collect_date, loader(conn, collect_date))
+            conn.execute("DELETE FROM columnar_dirty WHERE collect_date = ?", (collect_date,))
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    if dates:
+        logger.info("컬럼형 스냅샷 갱신: %d일", len(dates))
+    return len(dates)
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="컬럼형 스냅샷 저장소 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="모든 수집일의 스냅샷 파일을 다시 만든다")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if args.command == "rebuild":
+        from analyzer.signal import get_collect_dates, refresh_columnar
+        from crawler.naver_etf import get_db_connection
+
+        conn = get_db_connection()
+        try:
+            dates = get_collect_dates(conn, limit=-1)
+            conn.executemany(
+                "INSERT OR IGNORE INTO columnar_dirty (collect_date) VALUES (?)",
+                [(d,) for d in dates],
+            )
+            conn.commit()
+            refresh_columnar(conn)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
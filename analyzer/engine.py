@@ -0,0 +1,354 @@
+"""
+대시보드 시그널 엔진.
+매수 증가 / 청산 / 비중 증가·감소 / 중복 보유 / 연속 증가·감소일을 한 번에 계산해
+SignalBundle로 반환한다. 변화량(etf_holdings_delta)은 가장 긴 비교 기간을 한 번만 읽어
+ETF·종목별로 기간마다 조건부 합산하고, 최신일 스냅샷과 날짜별 평균 비중도 한 번씩만 읽는다.
+analyzer.signal의 시그널 함수들은 이 결과에서 필요한 부분만 잘라 반환한다.
+결과는 데이터 세대별로 캐시되므로(analyzer/cache.py) 수집이 커밋되기 전까지는 한 번만 계산한다.
+
+임의 기간(from~to)의 매수/청산은 compute_range_signals()가 누적 변화량
+(etf_holdings_cumulative)에서 (ETF, 종목)별 두 시점의 누적값 차이로 계산하므로,
+기간이 몇 년이어도 읽는 행 수는 보유 쌍 수에 비례한다.
+"""
+
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+
+from analyzer.cache import cached
+from config import ANALYZER_BACKEND, SIGNAL_HORIZONS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SignalBundle:
+    """
+    한 시점의 대시보드 시그널 전체. 목록은 모두 순위순이며 잘리지 않은 전체 결과다.
+
+    - buy / sell: {기간(일): [...]} (get_top_buy_increase / get_top_sell_increase 형식)
+    - weight_increase / weight_decrease: 최신일 비중 변화 (연속 증가/감소일 포함)
+    - overlap: 최신일 기준 2개 이상 ETF가 보유한 종목
+    """
+
+    latest_date: str = None
+    horizons: tuple = ()
+    buy: dict = field(default_factory=dict)
+    sell: dict = field(default_factory=dict)
+    weight_increase: list = field(default_factory=list)
+    weight_decrease: list = field(default_factory=list)
+    overlap: list = field(default_factory=list)
+
+    def to_dict(self, top_n: int = None) -> dict:
+        """
+        JSON 응답용 dict로 바꾼다.
+
+        Args:
+            top_n: 목록마다 남길 상위 개수. None이면 전체
+        """
+        return {
+            "latest_date": self.latest_date,
+            "horizons": list(self.horizons),
+            "buy": {days: head(rows, top_n) for days, rows in self.buy.items()},
+            "sell": {days: head(rows, top_n) for days, rows in self.sell.items()},
+            "weight_increase": head(self.weight_increase, top_n),
+            "weight_decrease": head(self.weight_decrease, top_n),
+            "overlap": head(self.overlap, top_n),
+        }
+
+
+def head(rows: list, top_n: int = None) -> list:
+    """상위 top_n개를 반환한다. None이나 음수면 전체 (SQL LIMIT -1과 같음)."""
+    if top_n is None or top_n < 0:
+        return list(rows)
+    return rows[:top_n]
+
+
+def _trade_branches(i: int, days: int) -> list:
+    """win의 i번째 구간 합(c, w, n)으로 매수/청산 종목 집계 SELECT 두 개를 만든다."""
+    return [
+        f"SELECT 'buy' AS kind, {days} AS days, stock_id, COUNT(*) AS etf_count, "
+        f"SUM(c{i}) AS amount, SUM(ROUND(ROUND(w{i}, 4), 2)) AS weight "
+        f"FROM win WHERE c{i} > 0 GROUP BY stock_id",
+        f"SELECT 'sell', {days}, stock_id, COUNT(*), "
+        f"SUM(-c{i}), SUM(ROUND(ROUND(-w{i}, 4), 2)) "
+        f"FROM win WHERE n{i} < 0 GROUP BY stock_id",
+    ]
+
+
+def _buy_rows(rows: list) -> list:
+    """매수 증가 집계 행을 순위순 응답 형식으로 바꾼다."""
+    rows = sorted(rows, key=lambda r: (-r["amount"], -r["etf_count"], r["stock_name"]))
+    return [
+        {
+            "stock_name": r["stock_name"],
+            "etf_count": r["etf_count"],
+            "total_increase": r["amount"],
+            "weight_change": r["weight"],
+        }
+        for r in rows
+    ]
+
+
+def _sell_rows(rows: list) -> list:
+    """청산 집계 행을 순위순 응답 형식으로 바꾼다."""
+    rows = sorted(rows, key=lambda r: (-r["etf_count"], -r["amount"], r["stock_name"]))
+    return [
+        {
+            "stock_name": r["stock_name"],
+            "etf_count": r["etf_count"],
+            "total_decrease": r["amount"],
+            "prev_weight": r["weight"],
+        }
+        for r in rows
+    ]
+
+
+def _delta_rankings(conn: sqlite3.Connection, dates: list, horizons: tuple) -> dict:
+    """
+    기간별 매수/청산 집계와 최신일 비중 증가/감소 집계를 쿼리 하나로 계산한다.
+    가장 오래된 비교 시작일 이후 변화량을 ETF·종목별로 한 번 묶으면서 기간마다
+    조건부 합(주식수, 비중, 편입-편출)을 구하고, 기간·시그널별 종목 집계를 UNION ALL로 붙인다.
+
+    Returns:
+        {("buy"|"sell", 기간) | ("up"|"down", 1): [행, ...]} (정렬 전)
+    """
+    from analyzer.signal import _delta_source
+
+    latest_date = dates[0]
+    # 비교 시작일 (미포함): 기간별 + 비중 시그널용 직전 수집일
+    windows = [("h", days, dates[min(days, len(dates) - 1)]) for days in horizons]
+    windows.append(("w", 1, dates[1]))
+
+    params = {"latest": latest_date, "oldest": min(w[2] for w in windows)}
+    columns = []
+    for i, (_, _, date_from) in enumerate(windows):
+        params[f"f{i}"] = date_from
+        cond = f"CASE WHEN collect_date > :f{i} THEN"
+        columns.append(
+            f"SUM({cond} count_change END) AS c{i}, "
+            f"SUM({cond} weight_change END) AS w{i}, "
+            f"SUM({cond} entered - exited END) AS n{i}"
+        )
+
+    branches = []
+    for i, (kind, days, _) in enumerate(windows):
+        if kind == "h":
+            branches.extend(_trade_branches(i, days))
+        else:
+            # 최신일 기준 보유 중인 종목만 (편출 제외)
+            branches.append(
+                f"SELECT 'up', 1, stock_id, COUNT(*), NULL, ROUND(SUM(ROUND(w{i}, 4)), 2) "
+                f"FROM win WHERE n{i} >= 0 AND w{i} > 0 GROUP BY stock_id"
+            )
+            branches.append(
+                f"SELECT 'down', 1, stock_id, COUNT(*), NULL, ROUND(SUM(ROUND(-w{i}, 4)), 2) "
+                f"FROM win WHERE n{i} >= 0 AND w{i} < 0 GROUP BY stock_id"
+            )
+
+    rows = conn.execute(
+        f"WITH win AS MATERIALIZED ("
+        f"  SELECT etf_code, stock_id, {', '.join(columns)} "
+        f"  FROM {_delta_source(conn, params['oldest'])} "
+        f"  WHERE collect_date > :oldest AND collect_date <= :latest "
+        f"  GROUP BY etf_code, stock_id"
+        f") "
+        f"SELECT r.*, s.stock_name FROM ({' UNION ALL '.join(branches)}) r "
+        f"JOIN stock_master s ON s.stock_id = r.stock_id",
+        params,
+    ).fetchall()
+
+    grouped = {(kind, days): [] for days in horizons for kind in ("buy", "sell")}
+    grouped.update({("up", 1): [], ("down", 1): []})
+    for r in rows:
+        grouped[(r["kind"], r["days"])].append(r)
+    return grouped
+
+
+def _overlap(conn: sqlite3.Connection, latest_date: str) -> list:
+    """최신일 기준 2개 이상 ETF가 보유한 종목 (보유 ETF 수, 총 비중합 순)."""
+    from analyzer.signal import _load_snapshot
+
+    rows = _load_snapshot(conn, latest_date)
+    etf_names = {
+        r["etf_code"]: r["etf_name"]
+        for r in conn.execute("SELECT etf_code, etf_name FROM etf_master").fetchall()
+    }
+
+    # 종목별 집계
+    stock_map = {}
+    for r in rows:
+        stock_id = r["stock_id"]
+        if stock_id not in stock_map:
+            stock_map[stock_id] = {
+                "stock_name": r["stock_name"],
+                "etf_count": 0,
+                "etf_names": [],
+                "total_weight": 0.0,
+            }
+        stock_map[stock_id]["etf_count"] += 1
+        etf_display = etf_names.get(r["etf_code"]) or r["etf_code"]
+        stock_map[stock_id]["etf_names"].append(etf_display)
+        stock_map[stock_id]["total_weight"] += r["weight"] or 0
+
+    # 2개 이상 보유 필터 + 평균 비중 계산
+    result = []
+    for s in stock_map.values():
+        if s["etf_count"] >= 2:
+            s["total_weight"] = round(s["total_weight"], 2)
+            s["avg_weight"] = round(s["total_weight"] / s["etf_count"], 2)
+            s["etf_names"] = sorted(s["etf_names"])
+            result.append(s)
+
+    result.sort(key=lambda x: (-x["etf_count"], -x["total_weight"]))
+    return result
+
+
+@cached
+def compute_signals(horizons: tuple = None) -> SignalBundle:
+    """
+    대시보드 시그널 전체를 한 번에 계산한다.
+
+    계산 로직:
+    1. 수집일 원장에서 최근 수집 날짜 조회
+    2. 가장 긴 기간의 변화량을 한 번 읽어 기간별 매수/청산, 최신일 비중 증가/감소 집계
+    3. 비중 증가/감소 종목의 연속 일수는 날짜별 평균 비중을 한 번 읽어 함께 계산
+    4. 최신일 스냅샷을 한 번 읽어 중복 보유 종목 집계
+
+    config.ANALYZER_BACKEND가 "numpy"면 analyzer.vectorized.compute_bundle()로 계산한다.
+
+    Args:
+        horizons: 매수/청산 비교 기간 (일). None이면 config.SIGNAL_HORIZONS
+
+    Returns:
+        SignalBundle
+    """
+    if ANALYZER_BACKEND == "numpy":
+        from analyzer.vectorized import compute_bundle
+
+        return compute_bundle(horizons)
+
+    from analyzer.signal import (
+        _avg_weights,
+        _calc_consecutive_days,
+        get_collect_dates,
+        get_db_connection,
+    )
+
+    horizons = tuple(sorted(set(horizons or SIGNAL_HORIZONS)))
+    bundle = SignalBundle(horizons=horizons)
+
+    conn = get_db_connection()
+    try:
+        dates = get_collect_dates(conn)
+        if not dates:
+            return bundle
+        bundle.latest_date = dates[0]
+        bundle.overlap = _overlap(conn, dates[0])
+        if len(dates) < 2:
+            return bundle
+
+        grouped = _delta_rankings(conn, dates, horizons)
+
+        for days in horizons:
+            bundle.buy[days] = _buy_rows(grouped[("buy", days)])
+            bundle.sell[days] = _sell_rows(grouped[("sell", days)])
+
+        # 연속 증가/감소일: 두 방향의 종목 평균 비중을 한 번에 읽는다
+        streak_dates = dates[:10]
+        up = grouped[("up", 1)]
+        down = grouped[("down", 1)]
+        stock_ids = sorted({r["stock_id"] for r in up} | {r["stock_id"] for r in down})
+        avgs = _avg_weights(conn, stock_ids, streak_dates)
+        for rows, key, direction in (
+            (up, "weight_increase", "up"),
+            (down, "weight_decrease", "down"),
+        ):
+            rows = sorted(rows, key=lambda r: (-r["weight"], -r["etf_count"], r["stock_name"]))
+            streaks = _calc_consecutive_days(
+                conn, [r["stock_id"] for r in rows], streak_dates, direction=direction, avgs=avgs
+            )
+            setattr(bundle, key, [
+                {
+                    "stock_name": r["stock_name"],
+                    key: r["weight"],
+                    "etf_count": r["etf_count"],
+                    "consecutive_days": streaks[r["stock_id"]],
+                }
+                for r in rows
+            ])
+        return bundle
+
+    finally:
+        conn.close()
+
+
+def _range_rankings(conn: sqlite3.Connection, date_from: str, date_to: str) -> list:
+    """
+    (date_from, date_to] 구간의 매수/청산 집계를 누적 변화량으로 계산한다.
+    (ETF, 종목) 쌍마다 date_to / date_from 이전 마지막 누적값을 기본키로 찾아 빼므로
+    구간 안의 변화량 행을 읽지 않는다. 두 시점 사이에 변화가 없는 쌍은 제외한다.
+
+    Returns:
+        [행, ...] (kind: "buy" | "sell", 정렬 전)
+    """
+    last = (
+        "(SELECT MAX(collect_date) FROM etf_holdings_cumulative "
+        " WHERE etf_code = p.etf_code AND stock_id = p.stock_id AND collect_date <= :{})"
+    )
+    return conn.execute(
+        f"WITH ends AS ("
+        f"  SELECT p.etf_code, p.stock_id, {last.format('date_to')} AS dt, "
+        f"    {last.format('date_from')} AS df "
+        f"  FROM etf_stock_pair p"
+        f"), win AS MATERIALIZED ("
+        f"  SELECT e.etf_code, e.stock_id, "
+        f"    b.cum_count - IFNULL(a.cum_count, 0) AS c0, "
+        f"    b.cum_weight - IFNULL(a.cum_weight, 0) AS w0, "
+        f"    b.held - IFNULL(a.held, 0) AS n0 "
+        f"  FROM ends e "
+        f"  JOIN etf_holdings_cumulative b "
+        f"    ON b.etf_code = e.etf_code AND b.stock_id = e.stock_id AND b.collect_date = e.dt "
+        f"  LEFT JOIN etf_holdings_cumulative a "
+        f"    ON a.etf_code = e.etf_code AND a.stock_id = e.stock_id AND a.collect_date = e.df "
+        f"  WHERE e.df IS NULL OR e.df < e.dt"
+        f") "
+        f"SELECT r.*, s.stock_name FROM ({' UNION ALL '.join(_trade_branches(0, 0))}) r "
+        f"JOIN stock_master s ON s.stock_id = r.stock_id",
+        {"date_from": date_from, "date_to": date_to},
+    ).fetchall()
+
+
+@cached
+def compute_range_signals(date_from: str, date_to: str = None) -> dict:
+    """
+    임의 기간의 매수 증가 / 청산 종목을 계산한다.
+    기간 (date_from, date_to]의 변화이며, days 기반 시그널과 같이 시작일 당일 변화는 포함하지 않는다.
+    두 날짜는 수집일이 아니어도 되며 각 날짜 기준 마지막 보유 상태를 비교한다.
+
+    Args:
+        date_from: 비교 시작일 (YYYY-MM-DD, 미포함)
+        date_to: 비교 종료일 (YYYY-MM-DD, 포함). None이면 최신 수집일
+
+    Returns:
+        {"date_from", "date_to", "buy": [...], "sell": [...]}
+        (buy / sell은 get_top_buy_increase / get_top_sell_increase 형식, 전체 순위)
+    """
+    from analyzer.signal import get_collect_dates, get_db_connection
+
+    conn = get_db_connection()
+    try:
+        if date_to is None:
+            dates = get_collect_dates(conn, limit=1)
+            date_to = dates[0] if dates else None
+        result = {"date_from": date_from, "date_to": date_to, "buy": [], "sell": []}
+        if not date_to or date_from >= date_to:
+            return result
+
+        rows = _range_rankings(conn, date_from, date_to)
+        result["buy"] = _buy_rows([r for r in rows if r["kind"] == "buy"])
+        result["sell"] = _sell_rows([r for r in rows if r["kind"] == "sell"])
+        return result
+
+    finally:
+        conn.close()
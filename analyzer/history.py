@@ -0,0 +1,174 @@
+"""
+종목별 보유 이력.
+한 종목을 보유한 ETF별 주식수/비중과 전체 합계를 수집일마다 (또는 주·월 단위로) 반환한다.
+
+이력은 누적 변화량 테이블(etf_holdings_cumulative)에서 읽는다. 이 테이블은 (ETF, 종목)별로
+보유 상태가 바뀐 날짜의 주식수/비중/보유 여부를 키 순서로 보관하므로, 종목을 보유했던
+ETF마다 기본키 구간 하나를 날짜순으로 읽어 합치면 된다. 저장 방식(snapshot/events)과
+보관 압축 여부에 관계없이 같은 경로로 조회한다.
+
+결과는 제너레이터로 한 시점씩 만들어, 몇 년치 이력도 전체 목록을 메모리에 올리지 않고
+그대로 응답으로 스트리밍할 수 있다 (app.py의 /api/stock-history).
+"""
+
+import heapq
+import logging
+import sqlite3
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+HISTORY_INTERVALS = ("day", "week", "month")
+
+
+def _find_stock(conn: sqlite3.Connection, stock: str):
+    """종목코드 또는 종목명으로 stock_master 행을 찾는다 (코드 우선). 없으면 None."""
+    row = conn.execute(
+        "SELECT stock_id, stock_code, stock_name FROM stock_master WHERE stock_code = ?",
+        (stock,),
+    ).fetchone()
+    if row:
+        return row
+    return conn.execute(
+        "SELECT stock_id, stock_code, stock_name FROM stock_master WHERE stock_name = ? "
+        "ORDER BY stock_code IS NULL, stock_id LIMIT 1",
+        (stock,),
+    ).fetchone()
+
+
+def _bucket(collect_date: str, interval: str):
+    """다운샘플링 구간 키. day면 날짜 그대로, week면 ISO 연·주차, month면 연-월."""
+    if interval == "week":
+        return date.fromisoformat(collect_date).isocalendar()[:2]
+    if interval == "month":
+        return collect_date[:7]
+    return collect_date
+
+
+def _etf_changes(conn: sqlite3.Connection, etf_code: str, stock_id: int, date_from: str):
+    """ETF 하나의 보유 상태 변경을 날짜순으로 읽는다 (date_from 직전 상태부터)."""
+    cursor = conn.execute(
+        "SELECT collect_date, etf_code, cum_count, cum_weight, held "
+        "FROM etf_holdings_cumulative "
+        "WHERE etf_code = ?1 AND stock_id = ?2 AND collect_date >= IFNULL(("
+        "  SELECT MAX(collect_date) FROM etf_holdings_cumulative "
+        "  WHERE etf_code = ?1 AND stock_id = ?2 AND collect_date <= ?3), '') "
+        "ORDER BY collect_date",
+        (etf_code, stock_id, date_from),
+    )
+    for r in cursor:
+        yield tuple(r)
+
+
+def _iter_points(
+    conn: sqlite3.Connection, stock_id: int, interval: str, date_from: str, date_to: str
+):
+    """수집일을 날짜순으로 훑으며 ETF별 상태를 갱신하고 구간 마지막 날짜의 시점을 만든다."""
+    try:
+        # stock_history()가 여기까지 미리 진행시켜, 읽지 않고 close()해도 연결이 반환되게 한다
+        yield None
+        etf_codes = [
+            r[0]
+            for r in conn.execute(
+                "SELECT etf_code FROM etf_stock_pair WHERE stock_id = ?", (stock_id,)
+            ).fetchall()
+        ]
+        changes = heapq.merge(
+            *(_etf_changes(conn, code, stock_id, date_from) for code in etf_codes)
+        )
+        upcoming = next(changes, None)
+        state = {}
+        pending, pending_bucket = None, None
+
+        dates = conn.execute(
+            "SELECT collect_date FROM collect_ledger "
+            "WHERE collect_date >= ? AND collect_date <= ? ORDER BY collect_date",
+            (date_from, date_to),
+        )
+        for (collect_date,) in dates:
+            bucket = _bucket(collect_date, interval)
+            if pending is not None and bucket != pending_bucket:
+                yield pending
+
+            while upcoming is not None and upcoming[0] <= collect_date:
+                _, etf_code, count, weight, held = upcoming
+                if held > 0:
+                    state[etf_code] = (count, weight)
+                else:
+                    state.pop(etf_code, None)
+                upcoming = next(changes, None)
+
+            etfs = {
+                code: {"stock_count": count, "weight": round(weight, 4)}
+                for code, (count, weight) in sorted(state.items())
+            }
+            pending = {
+                "date": collect_date,
+                "stock_count": sum(e["stock_count"] for e in etfs.values()),
+                "weight": round(sum(e["weight"] for e in etfs.values()), 4),
+                "etf_count": len(etfs),
+                "etfs": etfs,
+            }
+            pending_bucket = bucket
+
+        if pending is not None:
+            yield pending
+
+    finally:
+        conn.close()
+
+
+def stock_history(
+    stock: str, interval: str = "day", date_from: str = None, date_to: str = None
+):
+    """
+    종목의 ETF별 / 전체 보유 이력을 조회한다.
+
+    Args:
+        stock: 종목코드 또는 종목명
+        interval: "day" (수집일마다), "week" / "month" (구간 마지막 수집일의 상태)
+        date_from: 시작일 (YYYY-MM-DD, 포함). None이면 처음부터
+        date_to: 종료일 (YYYY-MM-DD, 포함). None이면 최신 수집일까지
+
+    Returns:
+        (info, points). 종목이 없으면 None
+        - info: {"stock_code", "stock_name", "interval", "etf_names": {etf_code: etf_name}}
+        - points: 날짜순 제너레이터. 각 시점은
+          {"date", "stock_count", "weight", "etf_count", "etfs": {etf_code: {"stock_count", "weight"}}}
+          (다 읽거나 close()하면 DB 연결을 반환한다)
+
+    Raises:
+        ValueError: interval이 day / week / month가 아닐 때
+    """
+    from analyzer.signal import get_db_connection
+
+    if interval not in HISTORY_INTERVALS:
+        raise ValueError(f"interval은 {', '.join(HISTORY_INTERVALS)} 중 하나여야 합니다: {interval}")
+
+    conn = get_db_connection()
+    try:
+        row = _find_stock(conn, stock)
+        if row is None:
+            conn.close()
+            return None
+        etf_names = {
+            r["etf_code"]: r["etf_name"]
+            for r in conn.execute(
+                "SELECT m.etf_code, m.etf_name FROM etf_master m "
+                "JOIN etf_stock_pair p ON p.etf_code = m.etf_code WHERE p.stock_id = ?",
+                (row["stock_id"],),
+            ).fetchall()
+        }
+    except Exception:
+        conn.close()
+        raise
+
+    info = {
+        "stock_code": row["stock_code"],
+        "stock_name": row["stock_name"],
+        "interval": interval,
+        "etf_names": etf_names,
+    }
+    points = _iter_points(conn, row["stock_id"], interval, date_from or "", date_to or "9999-12-31")
+    next(points)
+    return info, points
@@ -0,0 +1,210 @@
+"""
+분석기/API용 읽기 전용 SQLite 연결 풀.
+요청마다 DB를 새로 열지 않도록 읽기 전용 URI 모드(mode=ro)로 연 연결을 재사용한다.
+풀에서 꺼낸 연결은 close()하면 실제로 닫히지 않고 풀로 돌아가므로,
+호출자는 기존처럼 try/finally에서 conn.close()만 호출하면 된다.
+쓰기는 crawler.naver_etf.get_db_connection()의 별도 writer 연결로 한다.
+
+사용법:
+    python -m analyzer.pool bench [--threads 8] [--seconds 5] [--path /api/top-buy]
+"""
+
+import argparse
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from config import (
+    DB_PATH,
+    READ_POOL_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_READ_CACHE_KB,
+    SQLITE_READ_MMAP_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class _PooledConnection(sqlite3.Connection):
+    """close() 시 풀이 있으면 풀로 반환하는 연결."""
+
+    _pool = None
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+        else:
+            self._pool.release(self)
+
+
+class ReadPool:
+    """
+    읽기 전용 연결 풀.
+    유휴 연결을 최대 size개까지 LIFO 큐에 보관하고, 비어 있으면 새로 연다.
+    연결은 한 번에 한 스레드만 사용하지만 스레드 간에 재사용된다.
+    """
+
+    def __init__(self, db_path: str = None, size: int = None):
+        self.db_path = db_path or DB_PATH
+        self.size = READ_POOL_SIZE if size is None else size
+        self._idle = queue.LifoQueue(maxsize=max(self.size, 1))
+        self.opened = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            factory=_PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = 1")
+        conn.execute(f"PRAGMA mmap_size = {int(SQLITE_READ_MMAP_SIZE)}")
+        conn.execute(f"PRAGMA cache_size = -{int(SQLITE_READ_CACHE_KB)}")
+        conn.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT_MS)}")
+        if self.size > 0:
+            conn._pool = self
+        self.opened += 1
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """유휴 연결을 꺼내거나 새로 연다."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+    def release(self, conn: sqlite3.Connection):
+        """연결을 풀로 돌려준다. 풀이 가득 차면 닫는다."""
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            sqlite3.Connection.close(conn)
+
+    def close_all(self):
+        """유휴 연결을 모두 닫는다."""
+        while True:
+            try:
+                sqlite3.Connection.close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def get_pool() -> ReadPool:
+    """프로세스가 공유하는 읽기 연결 풀을 반환한다."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ReadPool()
+        return _pool
+
+
+def get_read_connection() -> sqlite3.Connection:
+    """
+    읽기 전용 연결을 반환한다. 사용 후 close()하면 풀로 돌아간다.
+
+    Returns:
+        row_factory가 sqlite3.Row인 읽기 전용 연결
+    """
+    return get_pool().acquire()
+
+
+def _direct_connection() -> sqlite3.Connection:
+    """풀 도입 전 방식: 호출마다 기본 설정으로 새 연결을 연다 (벤치마크 비교용)."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def bench(path: str, threads: int, seconds: float) -> dict:
+    """
+    Flask 테스트 클라이언트로 path를 여러 스레드에서 반복 요청하여
+    호출마다 새 연결(direct), 연결 풀(pool), 연결 풀 + 결과 캐시(cache)의 초당 요청 수를 비교한다.
+    direct / pool은 결과 캐시를 끄고 측정한다.
+
+    Args:
+        path: 요청할 API 경로
+        threads: 동시 요청 스레드 수
+        seconds: 방식별 측정 시간 (초)
+
+    Returns:
+        {"direct": 초당 요청 수, "pool": 초당 요청 수, "cache": 초당 요청 수}
+    """
+    import app as webapp
+    from analyzer import signal
+    from analyzer.cache import result_cache
+
+    def run() -> float:
+        deadline = time.perf_counter() + seconds
+        counts = [0] * threads
+
+        def worker(i):
+            client = webapp.app.test_client()
+            while time.perf_counter() < deadline:
+                resp = client.get(path)
+                if resp.status_code != 200:
+                    raise RuntimeError(f"{path} 응답 오류: {resp.status_code}")
+                counts[i] += 1
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        return sum(counts) / (time.perf_counter() - started)
+
+    pooled = signal.get_db_connection
+    cache_size = result_cache.maxsize
+    result = {}
+    try:
+        result_cache.maxsize = 0
+        result_cache.clear()
+        signal.get_db_connection = _direct_connection
+        webapp.get_db_connection = _direct_connection
+        result["direct"] = round(run(), 1)
+        signal.get_db_connection = pooled
+        webapp.get_db_connection = pooled
+        result["pool"] = round(run(), 1)
+    finally:
+        signal.get_db_connection = pooled
+        webapp.get_db_connection = pooled
+        result_cache.maxsize = cache_size
+    result["cache"] = round(run(), 1)
+    return result
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="읽기 연결 풀 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="연결 풀 / 결과 캐시 사용 전후 초당 요청 수 비교")
+    bench_parser.add_argument("--path", default="/api/holdings-by-sector", help="요청할 API 경로")
+    bench_parser.add_argument("--threads", type=int, default=8, help="동시 요청 스레드 수")
+    bench_parser.add_argument("--seconds", type=float, default=5.0, help="방식별 측정 시간 (초)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if args.command == "bench":
+        result = bench(args.path, args.threads, args.seconds)
+        print(f"{args.path} ({args.threads} 스레드)")
+        print(f"  호출마다 새 연결: {result['direct']} req/s")
+        print(f"  읽기 연결 풀:     {result['pool']} req/s")
+        print(f"  풀 + 결과 캐시:   {result['cache']} req/s")
+
+
+if __name__ == "__main__":
+    main()
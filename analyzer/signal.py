@@ -7,44 +7,180 @@ SQLite에 날짜별로 저장된 ETF 구성종목 데이터를 기반으로
 import logging
 import sqlite3
 
-from config import DB_PATH
+from analyzer.cache import cached
+from analyzer.engine import compute_range_signals, compute_signals, head
+from analyzer.pool import get_read_connection
+from config import COLUMNAR_ENABLED, HOLDINGS_STORAGE, SECTOR_ORDER, SIGNAL_HORIZONS
+from crawler.events import reconstruct_snapshot
+from crawler.retention import ARCHIVE_SCHEMA, archived_through, attach_holdings_archive
+from crawler.stocks import load_stocks
 
 logger = logging.getLogger(__name__)
 
 
 def get_db_connection() -> sqlite3.Connection:
-    """SQLite DB 연결을 반환한다."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """
+    읽기 전용 SQLite 연결을 연결 풀에서 꺼내 반환한다.
+    close()하면 닫히지 않고 풀로 돌아간다.
+    """
+    return get_read_connection()
 
 
 def get_collect_dates(conn: sqlite3.Connection, limit: int = 30) -> list:
     """
-    DB에 저장된 수집 날짜 목록을 최신순으로 반환한다.
+    DB에 저장된 수집 날짜 목록을 최신순으로 반환한다 (수집일 원장 기준).
+    보관 DB로 옮긴 날짜도 원장에 남아 있으므로 함께 반환한다.
 
     Args:
         conn: DB 연결
-        limit: 최대 반환 개수
+        limit: 최대 반환 개수 (-1이면 전체)
 
     Returns:
         날짜 문자열 리스트 (최신순)
     """
     rows = conn.execute(
-        "SELECT DISTINCT collect_date FROM etf_holdings "
-        "ORDER BY collect_date DESC LIMIT ?",
+        "SELECT collect_date FROM collect_ledger ORDER BY collect_date DESC LIMIT ?",
         (limit,),
     ).fetchall()
     return [r["collect_date"] for r in rows]
 
 
-def get_top_buy_increase(days: int = 3, top_n: int = 20) -> list:
+def _holdings_prefix(conn: sqlite3.Connection, collect_date: str) -> str:
+    """
+    collect_date가 보관 DB로 옮겨진 날짜면 보관 DB를 attach하고 테이블 스키마 접두어를 반환한다.
+
+    Returns:
+        "holdings_archive." 또는 "" (기본 테이블)
+    """
+    through = archived_through(conn)
+    if through and collect_date <= through and attach_holdings_archive(conn):
+        return f"{ARCHIVE_SCHEMA}."
+    return ""
+
+
+def _delta_source(conn: sqlite3.Connection, date_from: str) -> str:
+    """
+    (date_from, ...] 구간 변화량을 조회할 테이블 식을 반환한다.
+    구간이 보관 DB로 옮겨진 날짜에 닿으면 기본 테이블과 보관 DB 테이블을 합친다.
+    """
+    through = archived_through(conn)
+    if through and date_from < through and attach_holdings_archive(conn):
+        return (
+            f"(SELECT * FROM etf_holdings_delta "
+            f"UNION ALL SELECT * FROM {ARCHIVE_SCHEMA}.etf_holdings_delta)"
+        )
+    return "etf_holdings_delta"
+
+
+def _load_snapshot(conn: sqlite3.Connection, collect_date: str) -> list:
+    """
+    해당 날짜 기준 모든 ETF의 구성종목을 조회한다 (ETF별로 그날 이전 가장 최근 스냅샷).
+    컬럼형 스냅샷 파일이 최신이면 메모리 매핑으로 읽고, 아니면 SQLite에서 조회한다.
+
+    Args:
+        conn: DB 연결
+        collect_date: 수집 날짜
+
+    Returns:
+        [{"etf_code", "stock_id", "stock_name", "stock_count", "weight"}, ...]
+    """
+    if COLUMNAR_ENABLED:
+        from analyzer import columnar
+
+        arr = columnar.load_snapshot(conn, collect_date)
+        if arr is not None:
+            return _rows_from_columnar(conn, arr)
+    return _query_snapshot(conn, collect_date)
+
+
+def _rows_from_columnar(conn: sqlite3.Connection, arr) -> list:
+    """컬럼형 스냅샷 배열을 _query_snapshot()과 같은 형태의 행 리스트로 바꾼다."""
+    import numpy as np
+
+    from analyzer.columnar import etf_codes
+
+    codes = etf_codes(conn)
+    stocks = load_stocks(conn, np.unique(arr["stock"]).tolist())
+    return [
+        {
+            "etf_code": codes[etf],
+            "stock_id": stock_id,
+            "stock_name": stocks[stock_id][1],
+            "stock_count": None if count < 0 else count,
+            "weight": None if weight != weight else weight,  # NaN → NULL
+        }
+        for etf, stock_id, count, weight in zip(
+            arr["etf"].tolist(), arr["stock"].tolist(),
+            arr["count"].tolist(), arr["weight"].tolist(),
+        )
+    ]
+
+
+def refresh_columnar(conn: sqlite3.Connection) -> int:
+    """
+    갱신 대기 중인 수집일의 컬럼형 스냅샷 파일을 SQLite 기준으로 다시 만든다.
+    수집/적재/리플레이가 커밋한 뒤 쓰기 연결로 호출한다.
+
+    Returns:
+        다시 만든 날짜 수
+    """
+    from analyzer.columnar import flush_dirty
+
+    return flush_dirty(conn, _query_snapshot)
+
+
+def _query_snapshot(conn: sqlite3.Connection, collect_date: str) -> list:
+    """
+    해당 날짜 기준 모든 ETF의 구성종목을 SQLite에서 조회한다.
+    etf_snapshot_asof로 ETF별 유효 스냅샷 날짜를 찾아 한 번의 인덱스 조인으로 읽으므로,
+    그날 변경되지 않은 ETF도 직전 스냅샷으로 포함된다.
+    이벤트 저장 방식이면 ETF별 유효 스냅샷을 복원해 같은 형태로 반환한다.
+
+    Args:
+        conn: DB 연결
+        collect_date: 기준 날짜
+
+    Returns:
+        [{"etf_code", "stock_id", "stock_name", "stock_count", "weight"}, ...]
+    """
+    if HOLDINGS_STORAGE != "events":
+        prefix = _holdings_prefix(conn, collect_date)
+        return conn.execute(
+            f"SELECT h.etf_code, h.stock_id, s.stock_name, h.stock_count, h.weight "
+            f"FROM {prefix}etf_snapshot_asof a "
+            f"JOIN {prefix}etf_holdings h "
+            f"ON h.etf_code = a.etf_code AND h.collect_date = a.snapshot_date "
+            f"JOIN stock_master s ON s.stock_id = h.stock_id "
+            f"WHERE a.as_of_date = ?",
+            (collect_date,),
+        ).fetchall()
+
+    rows = []
+    for etf_code, snapshot_date in conn.execute(
+        "SELECT etf_code, snapshot_date FROM etf_snapshot_asof WHERE as_of_date = ?",
+        (collect_date,),
+    ).fetchall():
+        for h in reconstruct_snapshot(conn, etf_code, snapshot_date):
+            rows.append({"etf_code": etf_code, **h})
+    return rows
+
+
+def _bundle_for(days: int):
+    """기본 비교 기간에 days를 더한 시그널 묶음 (analyzer.engine.compute_signals)."""
+    horizons = SIGNAL_HORIZONS if days in SIGNAL_HORIZONS else (*SIGNAL_HORIZONS, days)
+    return compute_signals(horizons)
+
+
+def get_top_buy_increase(
+    days: int = 3, top_n: int = 20, date_from: str = None, date_to: str = None
+) -> list:
     """
     최근 N일간 액티브 ETF들에서 주식수가 증가한 종목을 집계한다.
 
     계산 로직:
     1. DB에서 최신 collect_date와 N일 전 collect_date를 확인
-    2. 각 ETF별로 두 날짜의 구성종목 비교
+    2. 두 날짜 사이(N일 전 제외, 최신일 포함) ETF·종목별 변화량 합산
+       (etf_holdings_delta, 그날 변경이 없던 ETF는 변화량 없음)
     3. 주식수가 증가한 종목 추출 (새로 편입된 종목 포함)
     4. 전체 ETF에서 해당 종목의 증가분 합산
     5. 증가분 기준 내림차순 정렬 후 Top N 반환
@@ -52,145 +188,44 @@ def get_top_buy_increase(days: int = 3, top_n: int = 20) -> list:
     Args:
         days: 비교 기간 (일)
         top_n: 반환할 상위 종목 수
+        date_from: 비교 시작일 (YYYY-MM-DD, 미포함). 지정하면 days 대신
+            누적 변화량으로 (date_from, date_to] 구간을 계산
+        date_to: 비교 종료일 (YYYY-MM-DD, 포함). None이면 최신 수집일
 
     Returns:
         [{"stock_name", "etf_count", "total_increase", "weight_change"}, ...]
     """
-    conn = get_db_connection()
-    try:
-        dates = get_collect_dates(conn)
-        if len(dates) < 2:
-            return []
+    if date_from:
+        return head(compute_range_signals(date_from, date_to)["buy"], top_n)
+    return head(_bundle_for(days).buy[days], top_n)
 
-        latest_date = dates[0]
-        # days 이전에 가장 가까운 날짜 찾기
-        older_date = dates[min(days, len(dates) - 1)]
-
-        # 최신일 구성종목
-        latest = conn.execute(
-            "SELECT etf_code, stock_name, stock_count, weight "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (latest_date,),
-        ).fetchall()
-
-        # 이전일 구성종목
-        older = conn.execute(
-            "SELECT etf_code, stock_name, stock_count, weight "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (older_date,),
-        ).fetchall()
-
-        # 이전일 데이터를 딕셔너리로 변환
-        older_map = {}
-        for r in older:
-            key = (r["etf_code"], r["stock_name"])
-            older_map[key] = {"stock_count": r["stock_count"], "weight": r["weight"]}
-
-        # 종목별 증가분 집계
-        stock_increases = {}
-        for r in latest:
-            key = (r["etf_code"], r["stock_name"])
-            old = older_map.get(key)
-
-            if old is None:
-                # 신규 편입
-                increase = r["stock_count"] or 0
-                w_change = r["weight"] or 0
-            else:
-                increase = (r["stock_count"] or 0) - (old["stock_count"] or 0)
-                w_change = (r["weight"] or 0) - (old["weight"] or 0)
-
-            if increase > 0:
-                name = r["stock_name"]
-                if name not in stock_increases:
-                    stock_increases[name] = {
-                        "stock_name": name,
-                        "etf_count": 0,
-                        "total_increase": 0,
-                        "weight_change": 0.0,
-                    }
-                stock_increases[name]["etf_count"] += 1
-                stock_increases[name]["total_increase"] += increase
-                stock_increases[name]["weight_change"] += round(w_change, 2)
-
-        result = sorted(
-            stock_increases.values(),
-            key=lambda x: (-x["total_increase"], -x["etf_count"]),
-        )
-        return result[:top_n]
 
-    finally:
-        conn.close()
-
-
-def get_top_sell_increase(days: int = 3, top_n: int = 20) -> list:
+def get_top_sell_increase(
+    days: int = 3, top_n: int = 20, date_from: str = None, date_to: str = None
+) -> list:
     """
     최근 N일간 액티브 ETF들에서 완전히 제거된(청산) 종목을 집계한다.
 
     계산 로직:
     1. DB에서 최신 collect_date와 N일 전 collect_date를 확인
-    2. 각 ETF별로 N일 전에는 있었지만 최신일에는 없는 종목 추출
-    3. 전체 ETF에서 해당 종목의 청산 건수 합산
+    2. 두 날짜 사이 ETF·종목별 편입/편출 합이 -1인 종목 추출
+       (N일 전 기준에는 있었지만 최신일 기준에는 없음)
+    3. 전체 ETF에서 해당 종목의 청산 건수 합산 (청산 주식수·비중은 변화량 합의 부호 반대)
     4. 청산 건수 기준 내림차순 정렬 후 Top N 반환
 
     Args:
         days: 비교 기간 (일)
         top_n: 반환할 상위 종목 수
+        date_from: 비교 시작일 (YYYY-MM-DD, 미포함). 지정하면 days 대신
+            누적 변화량으로 (date_from, date_to] 구간을 계산
+        date_to: 비교 종료일 (YYYY-MM-DD, 포함). None이면 최신 수집일
 
     Returns:
         [{"stock_name", "etf_count", "total_decrease", "prev_weight"}, ...]
     """
-    conn = get_db_connection()
-    try:
-        dates = get_collect_dates(conn)
-        if len(dates) < 2:
-            return []
-
-        latest_date = dates[0]
-        older_date = dates[min(days, len(dates) - 1)]
-
-        # 최신일 구성종목
-        latest = conn.execute(
-            "SELECT etf_code, stock_name, stock_count, weight "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (latest_date,),
-        ).fetchall()
-
-        # 이전일 구성종목
-        older = conn.execute(
-            "SELECT etf_code, stock_name, stock_count, weight "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (older_date,),
-        ).fetchall()
-
-        # 최신일 데이터를 set으로 변환
-        latest_set = {(r["etf_code"], r["stock_name"]) for r in latest}
-
-        # 이전일에 있었지만 최신일에 없는 종목 = 청산
-        stock_sells = {}
-        for r in older:
-            key = (r["etf_code"], r["stock_name"])
-            if key not in latest_set:
-                name = r["stock_name"]
-                if name not in stock_sells:
-                    stock_sells[name] = {
-                        "stock_name": name,
-                        "etf_count": 0,
-                        "total_decrease": 0,
-                        "prev_weight": 0.0,
-                    }
-                stock_sells[name]["etf_count"] += 1
-                stock_sells[name]["total_decrease"] += r["stock_count"] or 0
-                stock_sells[name]["prev_weight"] += round(r["weight"] or 0, 2)
-
-        result = sorted(
-            stock_sells.values(),
-            key=lambda x: (-x["etf_count"], -x["total_decrease"]),
-        )
-        return result[:top_n]
-
-    finally:
-        conn.close()
+    if date_from:
+        return head(compute_range_signals(date_from, date_to)["sell"], top_n)
+    return head(_bundle_for(days).sell[days], top_n)
 
 
 def get_overlapping_stocks(top_n: int = 30) -> list:
@@ -198,7 +233,7 @@ def get_overlapping_stocks(top_n: int = 30) -> list:
     최신일 기준 여러 액티브 ETF가 동시에 보유한 종목을 분석한다.
 
     계산 로직:
-    1. DB에서 최신 collect_date의 모든 ETF 구성종목 조회
+    1. 최신 collect_date 기준 모든 ETF 구성종목 조회
     2. 종목별로 보유 ETF 수 카운트
     3. 2개 이상 ETF가 보유한 종목만 필터
     4. 보유 ETF 수 기준 내림차순, 동률 시 총 비중합 기준 정렬
@@ -209,52 +244,7 @@ def get_overlapping_stocks(top_n: int = 30) -> list:
     Returns:
         [{"stock_name", "etf_count", "etf_names", "total_weight", "avg_weight"}, ...]
     """
-    conn = get_db_connection()
-    try:
-        dates = get_collect_dates(conn, limit=1)
-        if not dates:
-            return []
-
-        latest_date = dates[0]
-
-        rows = conn.execute(
-            "SELECT h.stock_name, h.etf_code, h.weight, m.etf_name "
-            "FROM etf_holdings h "
-            "LEFT JOIN etf_master m ON h.etf_code = m.etf_code "
-            "WHERE h.collect_date = ?",
-            (latest_date,),
-        ).fetchall()
-
-        # 종목별 집계
-        stock_map = {}
-        for r in rows:
-            name = r["stock_name"]
-            if name not in stock_map:
-                stock_map[name] = {
-                    "stock_name": name,
-                    "etf_count": 0,
-                    "etf_names": [],
-                    "total_weight": 0.0,
-                }
-            stock_map[name]["etf_count"] += 1
-            etf_display = r["etf_name"] or r["etf_code"]
-            stock_map[name]["etf_names"].append(etf_display)
-            stock_map[name]["total_weight"] += r["weight"] or 0
-
-        # 2개 이상 보유 필터 + 평균 비중 계산
-        result = []
-        for s in stock_map.values():
-            if s["etf_count"] >= 2:
-                s["total_weight"] = round(s["total_weight"], 2)
-                s["avg_weight"] = round(s["total_weight"] / s["etf_count"], 2)
-                s["etf_names"] = sorted(s["etf_names"])
-                result.append(s)
-
-        result.sort(key=lambda x: (-x["etf_count"], -x["total_weight"]))
-        return result[:top_n]
-
-    finally:
-        conn.close()
+    return head(compute_signals().overlap, top_n)
 
 
 def get_weight_increase_signals(top_n: int = 30) -> list:
@@ -263,7 +253,7 @@ def get_weight_increase_signals(top_n: int = 30) -> list:
 
     계산 로직:
     1. DB에서 최근 수집된 날짜들 조회
-    2. 연속 날짜 간 종목별 비중 변화량 계산
+    2. 최신일의 ETF·종목별 비중 변화량 조회 (etf_holdings_delta)
     3. 비중 증가합 = 모든 ETF에서 해당 종목의 비중 증가분 합산
     4. 증가 ETF 수 = 해당 종목의 비중이 증가한 ETF 개수
     5. 연속 증가일 = 최신일부터 역순으로 비중이 연속 증가한 일수
@@ -274,76 +264,14 @@ def get_weight_increase_signals(top_n: int = 30) -> list:
     Returns:
         [{"stock_name", "weight_increase", "etf_count", "consecutive_days"}, ...]
     """
-    conn = get_db_connection()
-    try:
-        dates = get_collect_dates(conn, limit=10)
-        if len(dates) < 2:
-            return []
-
-        latest_date = dates[0]
-        prev_date = dates[1]
-
-        # 최신일과 직전일의 비중 변화 계산
-        latest_data = conn.execute(
-            "SELECT etf_code, stock_name, weight "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (latest_date,),
-        ).fetchall()
-
-        prev_data = conn.execute(
-            "SELECT etf_code, stock_name, weight "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (prev_date,),
-        ).fetchall()
-
-        prev_map = {}
-        for r in prev_data:
-            prev_map[(r["etf_code"], r["stock_name"])] = r["weight"] or 0
-
-        # 종목별 비중 증가 집계
-        stock_signals = {}
-        for r in latest_data:
-            key = (r["etf_code"], r["stock_name"])
-            curr_weight = r["weight"] or 0
-            prev_weight = prev_map.get(key, 0)
-            delta = curr_weight - prev_weight
-
-            if delta > 0:
-                name = r["stock_name"]
-                if name not in stock_signals:
-                    stock_signals[name] = {
-                        "stock_name": name,
-                        "weight_increase": 0.0,
-                        "etf_count": 0,
-                        "consecutive_days": 0,
-                    }
-                stock_signals[name]["weight_increase"] += round(delta, 4)
-                stock_signals[name]["etf_count"] += 1
-
-        # 연속 증가일 계산
-        for stock_name in stock_signals:
-            stock_signals[stock_name]["consecutive_days"] = _calc_consecutive_days(
-                conn, stock_name, dates, direction="up"
-            )
-            stock_signals[stock_name]["weight_increase"] = round(
-                stock_signals[stock_name]["weight_increase"], 2
-            )
-
-        result = sorted(
-            stock_signals.values(),
-            key=lambda x: (-x["weight_increase"], -x["etf_count"]),
-        )
-        return result[:top_n]
-
-    finally:
-        conn.close()
+    return head(compute_signals().weight_increase, top_n)
 
 
 def get_weight_decrease_signals(top_n: int = 30) -> list:
     """
     최신일 기준 비중 감소 시그널을 계산한다.
 
-    계산 로직: 비중 증가 시그널과 동일하되 감소 방향.
+    계산 로직: 비중 증가 시그널과 동일하되 감소 방향. 편출된 종목은 제외한다.
 
     Args:
         top_n: 반환할 상위 종목 수
@@ -351,115 +279,108 @@ def get_weight_decrease_signals(top_n: int = 30) -> list:
     Returns:
         [{"stock_name", "weight_decrease", "etf_count", "consecutive_days"}, ...]
     """
-    conn = get_db_connection()
-    try:
-        dates = get_collect_dates(conn, limit=10)
-        if len(dates) < 2:
-            return []
-
-        latest_date = dates[0]
-        prev_date = dates[1]
+    return head(compute_signals().weight_decrease, top_n)
 
-        latest_data = conn.execute(
-            "SELECT etf_code, stock_name, weight "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (latest_date,),
-        ).fetchall()
 
-        prev_data = conn.execute(
-            "SELECT etf_code, stock_name, weight "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (prev_date,),
-        ).fetchall()
+def _avg_weights(conn: sqlite3.Connection, stock_ids: list, dates: list) -> dict:
+    """
+    여러 날짜 기준 종목별 평균 비중을 한 번에 조회한다.
+    스냅샷 저장 방식은 기준일 인덱스 조인을 날짜·종목별로 묶은 쿼리 하나로
+    (보관 DB로 옮긴 날짜가 섞이면 테이블별로 하나씩) 읽는다.
+    이벤트 저장 방식은 날짜별로 한 번씩 복원한 스냅샷에서 평균을 낸다.
 
-        prev_map = {}
-        for r in prev_data:
-            prev_map[(r["etf_code"], r["stock_name"])] = r["weight"] or 0
-
-        stock_signals = {}
-        for r in latest_data:
-            key = (r["etf_code"], r["stock_name"])
-            curr_weight = r["weight"] or 0
-            prev_weight = prev_map.get(key, 0)
-            delta = curr_weight - prev_weight
-
-            if delta < 0:
-                name = r["stock_name"]
-                if name not in stock_signals:
-                    stock_signals[name] = {
-                        "stock_name": name,
-                        "weight_decrease": 0.0,
-                        "etf_count": 0,
-                        "consecutive_days": 0,
-                    }
-                stock_signals[name]["weight_decrease"] += round(abs(delta), 4)
-                stock_signals[name]["etf_count"] += 1
-
-        for stock_name in stock_signals:
-            stock_signals[stock_name]["consecutive_days"] = _calc_consecutive_days(
-                conn, stock_name, dates, direction="down"
-            )
-            stock_signals[stock_name]["weight_decrease"] = round(
-                stock_signals[stock_name]["weight_decrease"], 2
-            )
-
-        result = sorted(
-            stock_signals.values(),
-            key=lambda x: (-x["weight_decrease"], -x["etf_count"]),
-        )
-        return result[:top_n]
+    Args:
+        conn: DB 연결
+        stock_ids: 종목 ID 리스트
+        dates: 수집 날짜 리스트
 
-    finally:
-        conn.close()
+    Returns:
+        {collect_date: {stock_id: 평균 비중}} (보유 ETF가 없거나 비중이 없으면 키 없음)
+    """
+    result = {d: {} for d in dates}
+    if not stock_ids or not dates:
+        return result
+
+    if HOLDINGS_STORAGE == "events":
+        wanted = set(stock_ids)
+        for collect_date in dates:
+            sums = {}
+            for r in _load_snapshot(conn, collect_date):
+                if r["weight"] is None or r["stock_id"] not in wanted:
+                    continue
+                total, count = sums.get(r["stock_id"], (0.0, 0))
+                sums[r["stock_id"]] = (total + r["weight"], count + 1)
+            result[collect_date] = {
+                stock_id: total / count for stock_id, (total, count) in sums.items()
+            }
+        return result
+
+    by_prefix = {}
+    for collect_date in dates:
+        by_prefix.setdefault(_holdings_prefix(conn, collect_date), []).append(collect_date)
+
+    stock_marks = ",".join("?" * len(stock_ids))
+    for prefix, prefix_dates in by_prefix.items():
+        date_marks = ",".join("?" * len(prefix_dates))
+        rows = conn.execute(
+            f"SELECT a.as_of_date, h.stock_id, AVG(h.weight) AS avg_w "
+            f"FROM {prefix}etf_snapshot_asof a "
+            f"JOIN {prefix}etf_holdings h "
+            f"ON h.etf_code = a.etf_code AND h.collect_date = a.snapshot_date "
+            f"WHERE a.as_of_date IN ({date_marks}) AND h.stock_id IN ({stock_marks}) "
+            f"GROUP BY a.as_of_date, h.stock_id",
+            (*prefix_dates, *stock_ids),
+        ).fetchall()
+        for r in rows:
+            if r["avg_w"] is not None:
+                result[r["as_of_date"]][r["stock_id"]] = r["avg_w"]
+    return result
 
 
 def _calc_consecutive_days(
-    conn: sqlite3.Connection, stock_name: str, dates: list, direction: str
-) -> int:
+    conn: sqlite3.Connection, stock_ids: list, dates: list, direction: str, avgs: dict = None
+) -> dict:
     """
-    특정 종목의 비중이 연속으로 증가/감소한 일수를 계산한다.
+    여러 종목의 비중이 최신일부터 연속으로 증가/감소한 일수를 한 번에 계산한다.
+    평균 비중은 _avg_weights()로 한 번만 읽고, 날짜 쌍을 최신순으로 훑으며
+    아직 연속이 끊기지 않은 종목만 계속 비교한다.
 
     Args:
         conn: DB 연결
-        stock_name: 종목명
+        stock_ids: 종목 ID 리스트 (stock_master)
         dates: 수집 날짜 리스트 (최신순)
         direction: "up" 또는 "down"
+        avgs: 이미 읽은 _avg_weights() 결과 (없으면 조회)
 
     Returns:
-        연속 증가/감소 일수
+        {stock_id: 연속 증가/감소 일수}
     """
-    consecutive = 0
+    streaks = {stock_id: 0 for stock_id in stock_ids}
+    if avgs is None:
+        avgs = _avg_weights(conn, stock_ids, dates)
+    active = list(streaks)
 
     for i in range(len(dates) - 1):
-        curr_date = dates[i]
-        prev_date = dates[i + 1]
-
-        # 현재 날짜의 해당 종목 평균 비중
-        curr_row = conn.execute(
-            "SELECT AVG(weight) as avg_w FROM etf_holdings "
-            "WHERE stock_name = ? AND collect_date = ?",
-            (stock_name, curr_date),
-        ).fetchone()
-
-        prev_row = conn.execute(
-            "SELECT AVG(weight) as avg_w FROM etf_holdings "
-            "WHERE stock_name = ? AND collect_date = ?",
-            (stock_name, prev_date),
-        ).fetchone()
-
-        curr_avg = curr_row["avg_w"] if curr_row and curr_row["avg_w"] else 0
-        prev_avg = prev_row["avg_w"] if prev_row and prev_row["avg_w"] else 0
-
-        if direction == "up" and curr_avg > prev_avg:
-            consecutive += 1
-        elif direction == "down" and curr_avg < prev_avg:
-            consecutive += 1
-        else:
+        if not active:
             break
+        curr = avgs[dates[i]]
+        prev = avgs[dates[i + 1]]
 
-    return consecutive
+        still = []
+        for stock_id in active:
+            curr_avg = curr.get(stock_id) or 0
+            prev_avg = prev.get(stock_id) or 0
+            if (direction == "up" and curr_avg > prev_avg) or (
+                direction == "down" and curr_avg < prev_avg
+            ):
+                streaks[stock_id] += 1
+                still.append(stock_id)
+        active = still
 
+    return streaks
 
+
+@cached
 def get_etf_holdings(etf_code: str) -> list:
     """
     특정 ETF의 최신 구성종목을 조회한다.
@@ -468,10 +389,24 @@ def get_etf_holdings(etf_code: str) -> list:
         etf_code: ETF 종목코드
 
     Returns:
-        [{"stock_name", "stock_count", "weight"}, ...]
+        [{"stock_code", "stock_name", "stock_count", "weight"}, ...]
     """
     conn = get_db_connection()
     try:
+        if HOLDINGS_STORAGE == "events":
+            row = conn.execute(
+                "SELECT MAX(event_date) as latest_date "
+                "FROM etf_holdings_event WHERE etf_code = ?",
+                (etf_code,),
+            ).fetchone()
+            if not row or not row["latest_date"]:
+                return []
+            holdings = [
+                {k: h[k] for k in ("stock_code", "stock_name", "stock_count", "weight")}
+                for h in reconstruct_snapshot(conn, etf_code, row["latest_date"])
+            ]
+            return sorted(holdings, key=lambda h: -(h["weight"] or 0))
+
         row = conn.execute(
             "SELECT MAX(collect_date) as latest_date "
             "FROM etf_holdings WHERE etf_code = ?",
@@ -482,9 +417,10 @@ def get_etf_holdings(etf_code: str) -> list:
             return []
 
         rows = conn.execute(
-            "SELECT stock_name, stock_count, weight "
-            "FROM etf_holdings WHERE etf_code = ? AND collect_date = ? "
-            "ORDER BY weight DESC",
+            "SELECT s.stock_code, s.stock_name, h.stock_count, h.weight "
+            "FROM etf_holdings h JOIN stock_master s ON s.stock_id = h.stock_id "
+            "WHERE h.etf_code = ? AND h.collect_date = ? "
+            "ORDER BY h.weight DESC",
             (etf_code, row["latest_date"]),
         ).fetchall()
 
@@ -494,9 +430,82 @@ def get_etf_holdings(etf_code: str) -> list:
         conn.close()
 
 
+def get_sector_flow(days: int = 5) -> dict:
+    """
+    섹터별 매수/매도 수급을 조회한다.
+    수집 시 미리 계산한 섹터 수급 집계(crawler/sectors.py)만 읽으므로 기간·섹터 수에만 비례한다.
+
+    Args:
+        days: 비교 기간 (일, config.SIGNAL_HORIZONS 중 하나)
+
+    Returns:
+        {"days", "date_from", "date_to", "sectors": [{"sector", "etf_count", "buy_shares",
+          "sell_shares", "net_shares", "weight_change", "entered", "exited",
+          "top_buys": [{"stock_code", "stock_name", "etf_count", "net_shares", "weight_change"}, ...],
+          "top_sells": [...]}, ...]}
+        섹터는 SECTOR_ORDER 순서이며, 기간 내 변화가 없는 섹터는 0으로 채운다.
+
+    Raises:
+        ValueError: days가 SIGNAL_HORIZONS에 없을 때
+    """
+    if days not in SIGNAL_HORIZONS:
+        raise ValueError(
+            f"days는 {', '.join(str(h) for h in SIGNAL_HORIZONS)} 중 하나여야 합니다: {days}"
+        )
+
+    conn = get_db_connection()
+    try:
+        flows = conn.execute(
+            "SELECT * FROM sector_flow WHERE days = ?", (days,)
+        ).fetchall()
+        stocks = conn.execute(
+            "SELECT f.sector, f.side, f.etf_count, f.net_shares, f.weight_change, "
+            "  s.stock_code, s.stock_name "
+            "FROM sector_flow_stock f JOIN stock_master s ON s.stock_id = f.stock_id "
+            "WHERE f.days = ? ORDER BY f.sector, f.side, f.rank",
+            (days,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    by_sector = {r["sector"]: r for r in flows}
+    order = SECTOR_ORDER + sorted(set(by_sector) - set(SECTOR_ORDER))
+    sectors = {}
+    for sector in order:
+        row = by_sector.get(sector)
+        sectors[sector] = {
+            "sector": sector,
+            "etf_count": row["etf_count"] if row else 0,
+            "buy_shares": row["buy_shares"] if row else 0,
+            "sell_shares": row["sell_shares"] if row else 0,
+            "net_shares": row["net_shares"] if row else 0,
+            "weight_change": row["weight_change"] if row else 0.0,
+            "entered": row["entered"] if row else 0,
+            "exited": row["exited"] if row else 0,
+            "top_buys": [],
+            "top_sells": [],
+        }
+    for r in stocks:
+        key = "top_buys" if r["side"] == "buy" else "top_sells"
+        sectors[r["sector"]][key].append({
+            "stock_code": r["stock_code"],
+            "stock_name": r["stock_name"],
+            "etf_count": r["etf_count"],
+            "net_shares": r["net_shares"],
+            "weight_change": r["weight_change"],
+        })
+
+    return {
+        "days": days,
+        "date_from": flows[0]["date_from"] if flows else None,
+        "date_to": flows[0]["date_to"] if flows else None,
+        "sectors": list(sectors.values()),
+    }
+
+
 def get_last_update_info() -> dict:
     """
-    마지막 데이터 수집 정보를 반환한다.
+    마지막 데이터 수집 정보를 반환한다 (수집일 원장의 최신 행).
 
     Returns:
         {"last_date": str, "etf_count": int, "stock_count": int}
@@ -504,30 +513,17 @@ def get_last_update_info() -> dict:
     conn = get_db_connection()
     try:
         row = conn.execute(
-            "SELECT MAX(collect_date) as last_date FROM etf_holdings"
+            "SELECT collect_date, etf_count, stock_count FROM collect_ledger "
+            "ORDER BY collect_date DESC LIMIT 1"
         ).fetchone()
 
-        if not row or not row["last_date"]:
+        if not row:
             return {"last_date": None, "etf_count": 0, "stock_count": 0}
 
-        last_date = row["last_date"]
-
-        etf_count = conn.execute(
-            "SELECT COUNT(DISTINCT etf_code) as cnt "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (last_date,),
-        ).fetchone()["cnt"]
-
-        stock_count = conn.execute(
-            "SELECT COUNT(DISTINCT stock_name) as cnt "
-            "FROM etf_holdings WHERE collect_date = ?",
-            (last_date,),
-        ).fetchone()["cnt"]
-
         return {
-            "last_date": last_date,
-            "etf_count": etf_count,
-            "stock_count": stock_count,
+            "last_date": row["collect_date"],
+            "etf_count": row["etf_count"],
+            "stock_count": row["stock_count"],
         }
 
     finally:
@@ -0,0 +1,293 @@
+"""
+ETF 간 포트폴리오 유사도.
+기준일 전체 포트폴리오를 ETF×종목 희소 행렬로 만들고, 전치 행렬과의 곱으로
+모든 ETF 쌍의 공통 보유 종목 수 / 겹치는 비중 / 코사인 유사도를 한 번에 계산한다.
+
+- W: 비중 행렬 (비중 NULL은 0), B: 보유 여부 행렬 (보유하면 1)
+- common_count = B·Bᵀ: 두 ETF가 함께 보유한 종목 수
+- weight_overlap = W·Bᵀ: 행 ETF의 비중 중 열 ETF도 보유한 종목의 비중 합(%) (비대칭)
+- cosine = W·Wᵀ를 각 ETF 비중 벡터 크기로 나눈 값 (0~1)
+
+곱은 종목을 공유하는 ETF 쌍만 계산하므로 ETF가 수백 개여도 모든 쌍을 도는 Python 반복보다 훨씬 빠르다.
+결과는 (기준일, 데이터 세대)별로 캐시되므로(analyzer/cache.py) 수집이 커밋될 때마다 한 번만 계산한다.
+
+사용법:
+    python -m analyzer.similarity bench [--etfs 100 300 600]   # 쌍별 Python 반복과 속도 비교
+"""
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from scipy import sparse
+
+from analyzer.cache import cached
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_METRICS = ("cosine", "weight_overlap", "common_count")
+
+
+@dataclass
+class EtfSimilarity:
+    """
+    한 기준일의 ETF 쌍별 유사도 행렬 (행/열 순서는 etf_codes, 대각선은 자기 자신).
+
+    - common / overlap / cosine: scipy.sparse CSR 행렬 (종목을 공유하지 않는 쌍은 0)
+    """
+
+    date: str = None
+    etf_codes: list = field(default_factory=list)
+    etf_names: dict = field(default_factory=dict)
+    common: object = None
+    overlap: object = None
+    cosine: object = None
+
+    def _metric(self, metric: str):
+        if metric not in SIMILARITY_METRICS:
+            raise ValueError(f"metric은 {', '.join(SIMILARITY_METRICS)} 중 하나여야 합니다: {metric}")
+        return {"cosine": self.cosine, "weight_overlap": self.overlap, "common_count": self.common}[metric]
+
+    def matrix(self, metric: str = "cosine") -> dict:
+        """
+        유사도 행렬 하나를 JSON 응답용 dict로 바꾼다.
+
+        Args:
+            metric: cosine / weight_overlap / common_count
+
+        Returns:
+            {"date", "metric", "etfs": [{"etf_code", "etf_name"}, ...], "matrix": [[...], ...]}
+        """
+        values = self._metric(metric)
+        if values is None:
+            rows = []
+        elif metric == "common_count":
+            rows = values.toarray().astype(int).tolist()
+        else:
+            rows = np.round(values.toarray(), 4).tolist()
+        return {
+            "date": self.date,
+            "metric": metric,
+            "etfs": [{"etf_code": c, "etf_name": self.etf_names.get(c, c)} for c in self.etf_codes],
+            "matrix": rows,
+        }
+
+    def most_similar(self, etf_code: str, metric: str = "cosine", top_n: int = 10):
+        """
+        한 ETF와 가장 비슷한 ETF를 metric 내림차순으로 반환한다 (자기 자신과 공통 종목이 없는 ETF 제외).
+
+        Args:
+            etf_code: 기준 ETF 종목코드
+            metric: 정렬 기준 (cosine / weight_overlap / common_count)
+            top_n: 반환할 ETF 수
+
+        Returns:
+            [{"etf_code", "etf_name", "common_count", "weight_overlap", "reverse_overlap", "cosine"}, ...]
+            (reverse_overlap은 상대 ETF 비중 중 기준 ETF도 보유한 비중 합).
+            기준일 포트폴리오에 없는 ETF면 None
+        """
+        values = self._metric(metric)
+        if etf_code not in self.etf_codes:
+            return None
+        i = self.etf_codes.index(etf_code)
+        row = values.getrow(i).tocoo()
+        others = [(j, v) for j, v in zip(row.col.tolist(), row.data.tolist()) if j != i and v > 0]
+        others.sort(key=lambda t: (-t[1], self.etf_codes[t[0]]))
+        result = []
+        for j, _ in others[:top_n]:
+            code = self.etf_codes[j]
+            result.append({
+                "etf_code": code,
+                "etf_name": self.etf_names.get(code, code),
+                "common_count": int(self.common[i, j]),
+                "weight_overlap": round(float(self.overlap[i, j]), 4),
+                "reverse_overlap": round(float(self.overlap[j, i]), 4),
+                "cosine": round(float(self.cosine[i, j]), 4),
+            })
+        return result
+
+
+def _similarity_matrices(etf: np.ndarray, stock: np.ndarray, weight: np.ndarray):
+    """
+    포트폴리오 행(ETF 순번, 종목, 비중)으로 유사도 행렬을 계산한다.
+
+    Returns:
+        (common, overlap, cosine) CSR 행렬 (ETF 순번 기준 정방 행렬)
+    """
+    n_etf = int(etf.max()) + 1 if len(etf) else 0
+    stocks, col = np.unique(stock, return_inverse=True)
+    shape = (n_etf, len(stocks))
+    w = sparse.csr_matrix((np.nan_to_num(weight, nan=0.0), (etf, col)), shape=shape)
+    held = sparse.csr_matrix((np.ones(len(etf)), (etf, col)), shape=shape)
+    held.sum_duplicates()
+    held.data[:] = 1.0
+
+    common = (held @ held.T).tocsr()
+    overlap = (w @ held.T).tocsr()
+    dot = (w @ w.T).tocsr()
+    norm = np.sqrt(dot.diagonal())
+    inv = np.divide(1.0, norm, out=np.zeros_like(norm), where=norm > 0)
+    cosine = (sparse.diags(inv) @ dot @ sparse.diags(inv)).tocsr()
+    return common, overlap, cosine
+
+
+def _similarity_python(etf: np.ndarray, stock: np.ndarray, weight: np.ndarray):
+    """쌍별 Python 반복으로 같은 값을 계산한다 (벤치마크 비교용). {(i, j): (common, overlap, cosine)}"""
+    portfolios = {}
+    for e, s, w in zip(etf.tolist(), stock.tolist(), weight.tolist()):
+        holdings = portfolios.setdefault(e, {})
+        holdings[s] = holdings.get(s, 0.0) + (0.0 if w != w else w)
+    norms = {e: sum(w * w for w in h.values()) ** 0.5 for e, h in portfolios.items()}
+    result = {}
+    for a, ha in portfolios.items():
+        for b, hb in portfolios.items():
+            shared = ha.keys() & hb.keys()
+            if not shared:
+                continue
+            dot = sum(ha[s] * hb[s] for s in shared)
+            denom = norms[a] * norms[b]
+            result[(a, b)] = (len(shared), sum(ha[s] for s in shared), dot / denom if denom else 0.0)
+    return result
+
+
+def _resolve_date(conn, collect_date: str = None) -> str:
+    """기준일 이전(포함) 마지막 수집일. 없으면 None."""
+    row = conn.execute(
+        "SELECT MAX(collect_date) FROM collect_ledger WHERE collect_date <= ?",
+        (collect_date or "9999-12-31",),
+    ).fetchone()
+    return row[0]
+
+
+@cached
+def _similarity_for(collect_date: str) -> EtfSimilarity:
+    """수집일 기준 유사도 행렬을 계산한다 (기준일·데이터 세대별 캐시)."""
+    from analyzer.signal import get_db_connection
+    from analyzer.vectorized import _etf_index, _load_frame
+
+    conn = get_db_connection()
+    try:
+        etf_index = _etf_index(conn)
+        frame = _load_frame(conn, collect_date, etf_index)
+        names = dict(conn.execute("SELECT etf_code, etf_name FROM etf_master").fetchall())
+    finally:
+        conn.close()
+
+    raw_etf = frame["raw_etf"]
+    present, etf = np.unique(raw_etf, return_inverse=True)
+    codes = {i: code for code, i in etf_index.items()}
+    etf_codes = [codes[int(i)] for i in present]
+
+    result = EtfSimilarity(date=collect_date, etf_codes=etf_codes, etf_names=names)
+    if len(etf_codes):
+        result.common, result.overlap, result.cosine = _similarity_matrices(
+            etf, frame["raw_stock"], frame["raw_weight"]
+        )
+    return result
+
+
+def compute_similarity(collect_date: str = None) -> EtfSimilarity:
+    """
+    ETF 쌍별 포트폴리오 유사도를 계산한다.
+
+    Args:
+        collect_date: 기준일 (YYYY-MM-DD). 수집일이 아니면 그 이전 마지막 수집일,
+            None이면 최신 수집일
+
+    Returns:
+        EtfSimilarity (수집 데이터가 없으면 빈 결과)
+    """
+    from analyzer.signal import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        resolved = _resolve_date(conn, collect_date)
+    finally:
+        conn.close()
+    if resolved is None:
+        return EtfSimilarity()
+    return _similarity_for(resolved)
+
+
+def _synthetic_portfolios(n_etf: int, holdings: int = 50, universe: int = 2000, seed: int = 0):
+    """인기 종목에 몰리는 가상 포트폴리오 행 (벤치마크용)."""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, universe + 1)
+    popularity /= popularity.sum()
+    etf, stock, weight = [], [], []
+    for e in range(n_etf):
+        picks = rng.choice(universe, size=holdings, replace=False, p=popularity)
+        w = rng.random(holdings)
+        etf.append(np.full(holdings, e))
+        stock.append(picks)
+        weight.append(100 * w / w.sum())
+    return np.concatenate(etf), np.concatenate(stock), np.concatenate(weight)
+
+
+def bench(etf_counts: list, holdings: int = 50) -> list:
+    """
+    가상 포트폴리오로 쌍별 Python 반복과 희소 행렬 곱의 계산 시간을 비교하고 결과가 같은지 확인한다.
+
+    Args:
+        etf_counts: ETF 수 목록 (예: [100, 300, 600])
+        holdings: ETF별 보유 종목 수
+
+    Returns:
+        [{"etfs", "pairs", "python", "sparse", "same"}, ...] (시간은 초)
+    """
+    results = []
+    for n_etf in etf_counts:
+        etf, stock, weight = _synthetic_portfolios(n_etf, holdings)
+
+        started = time.perf_counter()
+        expected = _similarity_python(etf, stock, weight)
+        py_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        common, overlap, cosine = _similarity_matrices(etf, stock, weight)
+        sp_time = time.perf_counter() - started
+
+        coo = common.tocoo()
+        same = len(expected) == common.nnz and all(
+            expected.get((i, j), (0,))[0] == v for i, j, v in zip(coo.row, coo.col, coo.data)
+        ) and all(
+            abs(overlap[i, j] - o) <= 1e-6 and abs(cosine[i, j] - c) <= 1e-9
+            for (i, j), (_, o, c) in expected.items()
+        )
+        results.append({
+            "etfs": n_etf,
+            "pairs": len(expected),
+            "python": round(py_time, 4),
+            "sparse": round(sp_time, 4),
+            "same": same,
+        })
+    return results
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="ETF 유사도 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="ETF 수별 Python 반복 / 희소 행렬 곱 시간 비교")
+    bench_parser.add_argument("--etfs", type=int, nargs="+", default=[100, 300, 600], help="ETF 수")
+    bench_parser.add_argument("--holdings", type=int, default=50, help="ETF별 보유 종목 수")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if args.command == "bench":
+        print(f"{'ETF 수':>6} {'쌍 수':>10} {'python(s)':>10} {'sparse(s)':>10} {'배속':>7}  결과")
+        for r in bench(args.etfs, args.holdings):
+            speedup = r["python"] / r["sparse"] if r["sparse"] else float("inf")
+            print(f"{r['etfs']:>6} {r['pairs']:>10,} {r['python']:>10.4f} {r['sparse']:>10.4f} "
+                  f"{speedup:>6.1f}x  {'일치' if r['same'] else '불일치'}")
+
+
+if __name__ == "__main__":
+    main()
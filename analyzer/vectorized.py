@@ -0,0 +1,534 @@
+"""
+NumPy 벡터 연산 시그널 백엔드.
+config.ANALYZER_BACKEND = "numpy"이면 analyzer.engine.compute_signals()가 이 모듈로 계산한다.
+
+필요한 수집일(최신일, 비교 시작일들, 연속일 계산용 최근 10일)의 전체 포트폴리오를
+컬럼형 스냅샷 배열(analyzer/columnar.py, 없으면 SQLite 조회)로 한 번씩 읽고,
+(ETF, 종목) 쌍을 정수 키 하나(ETF 순번 << 32 | stock_id)로 인코딩해
+두 날짜의 차이는 정렬된 키의 searchsorted 조인으로, 종목별 집계는 np.unique + np.bincount로 구한다.
+두 스냅샷의 차이는 그 사이 변화량의 합과 같으므로 SQL 백엔드(etf_holdings_delta 합산)와 결과가 같다.
+ETF 순번은 종목코드 순으로 매겨 종목별 합산 순서를 SQL 집계와 맞춘다.
+
+사용법:
+    python -m analyzer.vectorized check                      # SQL 백엔드와 결과 비교
+    python -m analyzer.vectorized bench [--scale 1 10 100]   # 행 수를 늘려 Python 집계와 속도 비교
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+
+from analyzer.engine import SignalBundle
+from config import COLUMNAR_ENABLED, SIGNAL_HORIZONS
+
+logger = logging.getLogger(__name__)
+
+_STOCK_BITS = 32
+_STOCK_MASK = (1 << _STOCK_BITS) - 1
+STREAK_DAYS = 10  # 연속 증가/감소일 계산에 쓰는 최근 수집일 수 (engine.compute_signals와 같음)
+
+
+def _etf_index(conn) -> dict:
+    """ETF 코드 → 순번 (종목코드 순). 컬럼형 저장소에만 있는 코드도 포함한다."""
+    from analyzer.columnar import etf_codes
+
+    codes = {r[0] for r in conn.execute("SELECT etf_code FROM etf_master").fetchall()}
+    codes.update(etf_codes(conn).values())
+    return {code: i for i, code in enumerate(sorted(codes))}
+
+
+def _frame(etf, stock, count, weight) -> dict:
+    """
+    스냅샷 배열을 (ETF 순번, 종목) 키 순으로 정렬한 프레임으로 만든다.
+
+    Returns:
+        {"key", "count", "weight"} (키 순, 주식수 NULL은 0, 비중 NULL은 NaN)
+        + {"raw_etf", "raw_stock", "raw_count", "raw_weight"} (원래 행 순서)
+    """
+    etf = np.asarray(etf, dtype=np.int64)
+    stock = np.asarray(stock, dtype=np.int64)
+    count = np.asarray(count, dtype=np.int64)
+    weight = np.asarray(weight, dtype=np.float64)
+    keys = (etf << _STOCK_BITS) | stock
+    order = np.argsort(keys, kind="stable")
+    return {
+        "key": keys[order],
+        "count": np.where(count < 0, 0, count)[order],
+        "weight": weight[order],
+        "raw_etf": etf,
+        "raw_stock": stock,
+        "raw_count": count,
+        "raw_weight": weight,
+    }
+
+
+def _load_frame(conn, collect_date: str, etf_index: dict) -> dict:
+    """기준일 스냅샷을 컬럼형 파일(없으면 SQLite)에서 읽어 프레임으로 만든다."""
+    from analyzer.columnar import etf_codes, load_snapshot
+    from analyzer.signal import _query_snapshot
+
+    arr = load_snapshot(conn, collect_date) if COLUMNAR_ENABLED else None
+    if arr is not None:
+        codes = etf_codes(conn)
+        lut = np.full(max(codes, default=0) + 1, -1, dtype=np.int64)
+        for idx, code in codes.items():
+            lut[idx] = etf_index[code]
+        return _frame(lut[arr["etf"]], arr["stock"], arr["count"], arr["weight"])
+
+    rows = _query_snapshot(conn, collect_date)
+    for r in rows:
+        etf_index.setdefault(r["etf_code"], len(etf_index))
+    return _frame(
+        [etf_index[r["etf_code"]] for r in rows],
+        [r["stock_id"] for r in rows],
+        [-1 if r["stock_count"] is None else r["stock_count"] for r in rows],
+        [np.nan if r["weight"] is None else r["weight"] for r in rows],
+    )
+
+
+def _align(frame: dict, keys: np.ndarray):
+    """keys 위치의 (주식수, 비중, 보유 여부). 프레임에 없는 키는 0."""
+    if not len(frame["key"]):
+        zeros = np.zeros(len(keys), dtype=np.int64)
+        return zeros, zeros.astype(np.float64), zeros
+    pos = np.minimum(np.searchsorted(frame["key"], keys), len(frame["key"]) - 1)
+    hit = frame["key"][pos] == keys
+    count = np.where(hit, frame["count"][pos], 0)
+    weight = np.where(hit, np.nan_to_num(frame["weight"][pos]), 0.0)
+    return count, weight, hit.astype(np.int64)
+
+
+def _pair_diff(old: dict, new: dict):
+    """
+    두 스냅샷의 (ETF, 종목)별 차이 (변화량 합과 같음).
+
+    Returns:
+        (종목 ID, 주식수 변화, 비중 변화, 편입-편출) 배열 (키 순)
+    """
+    keys = np.union1d(old["key"], new["key"])
+    c_old, w_old, h_old = _align(old, keys)
+    c_new, w_new, h_new = _align(new, keys)
+    return keys & _STOCK_MASK, c_new - c_old, w_new - w_old, h_new - h_old
+
+
+def _group(stock: np.ndarray, mask: np.ndarray, *values):
+    """mask 행을 종목별로 묶어 (종목 ID, ETF 수, 값별 합) 리스트를 반환한다."""
+    ids, inv = np.unique(stock[mask], return_inverse=True)
+    counts = np.bincount(inv, minlength=len(ids))
+    sums = [np.bincount(inv, weights=v[mask], minlength=len(ids)) for v in values]
+    return ids.tolist(), counts.tolist(), [s.tolist() for s in sums]
+
+
+def _avg_matrix(frames: dict, dates: list, stock_ids: list) -> np.ndarray:
+    """날짜 × 종목 평균 비중 행렬 (비중이 있는 보유 ETF가 없으면 0)."""
+    ids = np.asarray(stock_ids, dtype=np.int64)
+    mat = np.zeros((len(dates), len(ids)))
+    for i, collect_date in enumerate(dates):
+        frame = frames[collect_date]
+        stock = frame["key"] & _STOCK_MASK
+        sel = np.isin(stock, ids) & ~np.isnan(frame["weight"])
+        idx = np.searchsorted(ids, stock[sel])
+        sums = np.bincount(idx, weights=frame["weight"][sel], minlength=len(ids))
+        n = np.bincount(idx, minlength=len(ids))
+        mat[i] = np.divide(sums, n, out=np.zeros(len(ids)), where=n > 0)
+    return mat
+
+
+def _kernel_numpy(frames: dict, dates: list, horizons: tuple) -> dict:
+    """
+    프레임들에서 시그널 원자료를 벡터 연산으로 계산한다. 수집일이 하나면 중복 보유만 계산한다.
+
+    Returns:
+        {("buy"|"sell", 기간): [(stock_id, etf_count, amount, weight), ...],
+         ("up"|"down", 1): [(stock_id, etf_count, weight), ...],
+         ("streak", "up"|"down"): {stock_id: 연속일},
+         "overlap": [(stock_id, etf_count, total_weight, [etf 순번, ...]), ...] (최초 등장 순)}
+    """
+    latest = frames[dates[0]]
+    raw = {"overlap": _overlap_numpy(latest)}
+    if len(dates) < 2:
+        return raw
+
+    for days in horizons:
+        stock, c, w, n = _pair_diff(frames[dates[min(days, len(dates) - 1)]], latest)
+        ids, counts, (amount, weight) = _group(
+            stock, c > 0, c.astype(np.float64), np.round(np.round(w, 4), 2)
+        )
+        raw[("buy", days)] = list(zip(ids, counts, [int(a) for a in amount], weight))
+        ids, counts, (amount, weight) = _group(
+            stock, n < 0, -c.astype(np.float64), np.round(np.round(-w, 4), 2)
+        )
+        raw[("sell", days)] = list(zip(ids, counts, [int(a) for a in amount], weight))
+
+    stock, c, w, n = _pair_diff(frames[dates[1]], latest)
+    for kind, mask, value in (
+        ("up", (n >= 0) & (w > 0), np.round(w, 4)),
+        ("down", (n >= 0) & (w < 0), np.round(-w, 4)),
+    ):
+        ids, counts, (weight,) = _group(stock, mask, value)
+        raw[(kind, 1)] = list(zip(ids, counts, [round(x, 2) for x in weight]))
+
+    streak_dates = dates[:STREAK_DAYS]
+    stock_ids = sorted({r[0] for r in raw[("up", 1)]} | {r[0] for r in raw[("down", 1)]})
+    mat = _avg_matrix(frames, streak_dates, stock_ids)
+    for direction, better in (("up", mat[:-1] > mat[1:]), ("down", mat[:-1] < mat[1:])):
+        streak = np.cumprod(better, axis=0).sum(axis=0) if len(better) else np.zeros(len(stock_ids))
+        raw[("streak", direction)] = dict(zip(stock_ids, (int(x) for x in streak)))
+    return raw
+
+
+def _overlap_numpy(frame: dict) -> list:
+    """2개 이상 ETF가 보유한 종목. 원래 행 순서로 합산하고 최초 등장 순서를 유지한다."""
+    ids, first, inv = np.unique(frame["raw_stock"], return_index=True, return_inverse=True)
+    counts = np.bincount(inv, minlength=len(ids))
+    totals = np.bincount(inv, weights=np.nan_to_num(frame["raw_weight"]), minlength=len(ids))
+    rows_by_stock = np.argsort(inv, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)))
+    multi = np.flatnonzero(counts >= 2)
+    overlap = []
+    for i in multi[np.argsort(first[multi], kind="stable")]:
+        members = frame["raw_etf"][rows_by_stock[starts[i]:starts[i + 1]]]
+        overlap.append((int(ids[i]), int(counts[i]), float(totals[i]), members.tolist()))
+    return overlap
+
+
+def _kernel_python(frames: dict, dates: list, horizons: tuple) -> dict:
+    """_kernel_numpy()와 같은 결과를 행 단위 dict 집계로 계산한다 (비교/벤치마크 기준)."""
+
+    def state(frame):
+        return {
+            k: (c, 0.0 if w != w else w)
+            for k, c, w in zip(
+                frame["key"].tolist(), frame["count"].tolist(), frame["weight"].tolist()
+            )
+        }
+
+    def diff(old, new):
+        for k in sorted(old.keys() | new.keys()):
+            a, b = old.get(k), new.get(k)
+            yield (
+                k & _STOCK_MASK,
+                (b[0] if b else 0) - (a[0] if a else 0),
+                (b[1] if b else 0.0) - (a[1] if a else 0.0),
+                (1 if b else 0) - (1 if a else 0),
+            )
+
+    def grouped(rows):
+        agg = {}
+        for stock_id, *values in rows:
+            entry = agg.setdefault(stock_id, [0] + [0] * len(values))
+            entry[0] += 1
+            for i, v in enumerate(values):
+                entry[i + 1] += v
+        return [(stock_id, *entry) for stock_id, entry in sorted(agg.items())]
+
+    frame = frames[dates[0]]
+    stock_map = {}
+    for etf, stock_id, weight in zip(
+        frame["raw_etf"].tolist(), frame["raw_stock"].tolist(), frame["raw_weight"].tolist()
+    ):
+        entry = stock_map.setdefault(stock_id, [0, 0.0, []])
+        entry[0] += 1
+        entry[1] += 0.0 if weight != weight else weight
+        entry[2].append(etf)
+    raw = {
+        "overlap": [(s, n, total, etfs) for s, (n, total, etfs) in stock_map.items() if n >= 2]
+    }
+    if len(dates) < 2:
+        return raw
+
+    latest = state(frame)
+    for days in horizons:
+        diffs = list(diff(state(frames[dates[min(days, len(dates) - 1)]]), latest))
+        raw[("buy", days)] = grouped(
+            (s, c, round(round(w, 4), 2)) for s, c, w, n in diffs if c > 0
+        )
+        raw[("sell", days)] = grouped(
+            (s, -c, round(round(-w, 4), 2)) for s, c, w, n in diffs if n < 0
+        )
+
+    diffs = list(diff(state(frames[dates[1]]), latest))
+    raw[("up", 1)] = [
+        (s, cnt, round(w, 2))
+        for s, cnt, w in grouped((s, round(w, 4)) for s, c, w, n in diffs if n >= 0 and w > 0)
+    ]
+    raw[("down", 1)] = [
+        (s, cnt, round(w, 2))
+        for s, cnt, w in grouped((s, round(-w, 4)) for s, c, w, n in diffs if n >= 0 and w < 0)
+    ]
+
+    stock_ids = {r[0] for r in raw[("up", 1)]} | {r[0] for r in raw[("down", 1)]}
+    avgs = []
+    for collect_date in dates[:STREAK_DAYS]:
+        sums = {}
+        for k, (_, w) in state(frames[collect_date]).items():
+            stock_id = k & _STOCK_MASK
+            if stock_id in stock_ids and w == w:
+                total, n = sums.get(stock_id, (0.0, 0))
+                sums[stock_id] = (total + w, n + 1)
+        avgs.append({s: total / n for s, (total, n) in sums.items()})
+    for direction in ("up", "down"):
+        streaks = {}
+        for stock_id in stock_ids:
+            days = 0
+            for curr, prev in zip(avgs, avgs[1:]):
+                a, b = curr.get(stock_id, 0.0), prev.get(stock_id, 0.0)
+                if not (a > b if direction == "up" else a < b):
+                    break
+                days += 1
+            streaks[stock_id] = days
+        raw[("streak", direction)] = streaks
+    return raw
+
+
+def _bundle_from_raw(conn, raw: dict, dates: list, horizons: tuple, etf_index: dict) -> SignalBundle:
+    """원자료에 종목명/ETF명을 붙이고 SQL 백엔드와 같은 순서로 정렬해 SignalBundle을 만든다."""
+    from analyzer.engine import _buy_rows, _sell_rows
+    from crawler.stocks import load_stocks
+
+    stock_ids = set()
+    for key, rows in raw.items():
+        if key[0] != "streak":
+            stock_ids.update(r[0] for r in rows)
+    names = {stock_id: name for stock_id, (_, name) in load_stocks(conn, stock_ids).items()}
+
+    def trade_rows(rows):
+        return [
+            {"stock_id": s, "stock_name": names[s], "etf_count": n, "amount": a, "weight": w}
+            for s, n, a, w in rows
+        ]
+
+    bundle = SignalBundle(latest_date=dates[0], horizons=horizons)
+    bundle.overlap = _overlap_rows(conn, raw["overlap"], names, etf_index)
+    if len(dates) < 2:
+        return bundle
+
+    for days in horizons:
+        bundle.buy[days] = _buy_rows(trade_rows(raw[("buy", days)]))
+        bundle.sell[days] = _sell_rows(trade_rows(raw[("sell", days)]))
+
+    for kind, key in (("up", "weight_increase"), ("down", "weight_decrease")):
+        streaks = raw[("streak", kind)]
+        rows = sorted(raw[(kind, 1)], key=lambda r: (-r[2], -r[1], names[r[0]]))
+        setattr(bundle, key, [
+            {
+                "stock_name": names[s],
+                key: w,
+                "etf_count": n,
+                "consecutive_days": streaks[s],
+            }
+            for s, n, w in rows
+        ])
+    return bundle
+
+
+def _overlap_rows(conn, raw_overlap: list, names: dict, etf_index: dict) -> list:
+    """중복 보유 원자료를 engine._overlap()과 같은 형식·순서의 행으로 만든다."""
+    codes = {i: code for code, i in etf_index.items()}
+    etf_names = {
+        r["etf_code"]: r["etf_name"]
+        for r in conn.execute("SELECT etf_code, etf_name FROM etf_master").fetchall()
+    }
+    overlap = []
+    for s, n, total, etfs in raw_overlap:
+        total = round(total, 2)
+        overlap.append({
+            "stock_name": names[s],
+            "etf_count": n,
+            "etf_names": sorted(etf_names.get(codes[e]) or codes[e] for e in etfs),
+            "total_weight": total,
+            "avg_weight": round(total / n, 2),
+        })
+    overlap.sort(key=lambda x: (-x["etf_count"], -x["total_weight"]))
+    return overlap
+
+
+def _load_frames(conn, dates: list, horizons: tuple, etf_index: dict) -> dict:
+    """시그널 계산에 필요한 날짜의 프레임을 한 번씩 읽는다."""
+    needed = {dates[0], *dates[:STREAK_DAYS]}
+    if len(dates) >= 2:
+        needed.add(dates[1])
+        needed.update(dates[min(days, len(dates) - 1)] for days in horizons)
+    return {d: _load_frame(conn, d, etf_index) for d in sorted(needed)}
+
+
+def compute_bundle(horizons: tuple = None, kernel=None) -> SignalBundle:
+    """
+    대시보드 시그널 전체를 NumPy로 계산한다 (engine.compute_signals()의 numpy 백엔드).
+
+    Args:
+        horizons: 매수/청산 비교 기간 (일). None이면 config.SIGNAL_HORIZONS
+        kernel: 원자료 계산 함수 (기본 _kernel_numpy, 비교용으로 _kernel_python)
+
+    Returns:
+        SignalBundle
+    """
+    from analyzer.signal import get_collect_dates, get_db_connection
+
+    horizons = tuple(sorted(set(horizons or SIGNAL_HORIZONS)))
+    kernel = kernel or _kernel_numpy
+
+    conn = get_db_connection()
+    try:
+        dates = get_collect_dates(conn)
+        if not dates:
+            return SignalBundle(horizons=horizons)
+        etf_index = _etf_index(conn)
+        frames = _load_frames(conn, dates, horizons, etf_index)
+        raw = kernel(frames, dates, horizons)
+        return _bundle_from_raw(conn, raw, dates, horizons, etf_index)
+
+    finally:
+        conn.close()
+
+
+def _same(a, b, tol: float = 1e-6) -> bool:
+    """두 결과가 같은지 비교한다 (실수는 합산 순서 차이만큼 허용)."""
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and abs(a - b) <= tol
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(_same(a[k], b[k], tol) for k in a)
+    if isinstance(a, (list, tuple)):
+        return (
+            isinstance(b, (list, tuple))
+            and len(a) == len(b)
+            and all(_same(x, y, tol) for x, y in zip(a, b))
+        )
+    return a == b
+
+
+def check(horizons: tuple = None) -> dict:
+    """
+    현재 DB에서 SQL 백엔드와 numpy 백엔드(및 Python 집계 커널)의 결과를 비교한다 (캐시 미사용).
+
+    Returns:
+        {항목: (numpy 일치 여부, Python 커널 일치 여부)}
+    """
+    from analyzer import engine
+
+    backend = engine.ANALYZER_BACKEND
+    try:
+        engine.ANALYZER_BACKEND = "sql"
+        expected = engine.compute_signals.__wrapped__(horizons).to_dict()
+    finally:
+        engine.ANALYZER_BACKEND = backend
+    vectorized = compute_bundle(horizons).to_dict()
+    python = compute_bundle(horizons, kernel=_kernel_python).to_dict()
+
+    result = {}
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            for days in value:
+                result[f"{key}[{days}]"] = (
+                    _same(value[days], vectorized[key].get(days)),
+                    _same(value[days], python[key].get(days)),
+                )
+        else:
+            result[key] = (_same(value, vectorized[key]), _same(value, python[key]))
+    return result
+
+
+def _scaled(frames: dict, scale: int) -> dict:
+    """각 프레임의 ETF를 scale배로 복제한다 (종목은 그대로, 복제 ETF는 새 순번)."""
+    if scale == 1:
+        return frames
+    n_etf = 1 + max(
+        (int(f["raw_etf"].max()) for f in frames.values() if len(f["raw_etf"])), default=0
+    )
+    result = {}
+    for d, f in frames.items():
+        result[d] = _frame(
+            np.concatenate([f["raw_etf"] + k * n_etf for k in range(scale)]),
+            np.tile(f["raw_stock"], scale),
+            np.tile(f["raw_count"], scale),
+            np.tile(f["raw_weight"], scale),
+        )
+    return result
+
+
+def bench(scales: list, repeat: int = 3, horizons: tuple = None) -> list:
+    """
+    현재 DB의 스냅샷 행을 scale배로 늘려 Python 집계 커널과 numpy 커널의 계산 시간을 비교한다.
+    스냅샷 읽기는 한 번만 하고 계산(집계)만 측정하며, 두 커널의 결과가 같은지도 확인한다.
+
+    Args:
+        scales: 배율 목록 (예: [1, 10, 100])
+        repeat: 배율별 반복 횟수 (최소 시간 사용)
+        horizons: 매수/청산 비교 기간 (일). None이면 config.SIGNAL_HORIZONS
+
+    Returns:
+        [{"scale", "rows", "python", "numpy", "same"}, ...] (시간은 초)
+    """
+    from analyzer.signal import get_collect_dates, get_db_connection
+
+    horizons = tuple(sorted(set(horizons or SIGNAL_HORIZONS)))
+    conn = get_db_connection()
+    try:
+        dates = get_collect_dates(conn)
+        if len(dates) < 2:
+            raise RuntimeError("비교할 수집일이 2일 이상 필요합니다.")
+        frames = _load_frames(conn, dates, horizons, _etf_index(conn))
+    finally:
+        conn.close()
+
+    def timed(kernel, scaled):
+        best, raw = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            raw = kernel(scaled, dates, horizons)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, raw
+
+    results = []
+    for scale in scales:
+        scaled = _scaled(frames, scale)
+        py_time, py_raw = timed(_kernel_python, scaled)
+        np_time, np_raw = timed(_kernel_numpy, scaled)
+        results.append({
+            "scale": scale,
+            "rows": sum(len(f["key"]) for f in scaled.values()),
+            "python": round(py_time, 4),
+            "numpy": round(np_time, 4),
+            "same": _same(py_raw, np_raw),
+        })
+    return results
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="NumPy 시그널 백엔드 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("check", help="SQL 백엔드와 결과 비교")
+    bench_parser = sub.add_parser("bench", help="행 수 배율별 Python / numpy 집계 시간 비교")
+    bench_parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100], help="행 수 배율")
+    bench_parser.add_argument("--repeat", type=int, default=3, help="배율별 반복 횟수")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if args.command == "check":
+        result = check()
+        for name, (vectorized, python) in result.items():
+            print(f"  {name:20s} numpy: {'일치' if vectorized else '불일치'}  "
+                  f"python: {'일치' if python else '불일치'}")
+        if not all(v and p for v, p in result.values()):
+            sys.exit(1)
+
+    elif args.command == "bench":
+        print(f"{'배율':>6} {'행 수':>12} {'python(s)':>10} {'numpy(s)':>10} {'배속':>7}  결과")
+        for r in bench(args.scale, args.repeat):
+            speedup = r["python"] / r["numpy"] if r["numpy"] else float("inf")
+            print(f"{r['scale']:>6} {r['rows']:>12,} {r['python']:>10.4f} {r['numpy']:>10.4f} "
+                  f"{speedup:>6.1f}x  {'일치' if r['same'] else '불일치'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,26 @@ Active ETF Analysis - Flask 메인 앱.
 투자 시그널을 제공하는 웹 대시보드.
 """
 
+import json
 import logging
 import os
 import threading
+from datetime import datetime
 
 from apscheduler.schedulers.background import BackgroundScheduler
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
 
+from analyzer.cache import result_cache
+from analyzer.engine import compute_signals
+from analyzer.history import stock_history
+from analyzer.similarity import compute_similarity
 from analyzer.signal import (
     get_collect_dates,
     get_db_connection,
     get_etf_holdings,
     get_last_update_info,
     get_overlapping_stocks,
+    get_sector_flow,
     get_top_buy_increase,
     get_top_sell_increase,
     get_weight_decrease_signals,
@@ -41,8 +48,13 @@ _collect_running = False
 _collect_progress = ""
 
 
-def run_collection():
-    """백그라운드에서 데이터 수집을 실행한다."""
+def run_collection(resume: bool = False):
+    """
+    백그라운드에서 데이터 수집을 실행한다.
+
+    Args:
+        resume: True면 오늘 마지막 실행에서 실패했거나 누락된 ETF만 수집
+    """
     global _collect_running, _collect_progress
     with _collect_lock:
         if _collect_running:
@@ -51,7 +63,7 @@ def run_collection():
         _collect_progress = "시작됨"
 
     try:
-        results = collect_all_etf_data()
+        results = collect_all_etf_data(resume=resume)
         saved = sum(1 for r in results if r["status"] == "saved")
         errors = sum(1 for r in results if r["status"] in ("error", "empty"))
         _collect_progress = f"완료: 저장 {saved}, 오류 {errors}"
@@ -92,20 +104,50 @@ def signals():
 
 # --- 데이터 API ---
 
+@app.route("/api/signals")
+def api_signals():
+    """대시보드 시그널 일괄 API (매수/청산 기간별, 비중 증가/감소, 중복 보유)."""
+    top_n = request.args.get("top_n", 20, type=int)
+    return jsonify(compute_signals().to_dict(top_n=top_n))
+
+
+def _date_arg(name: str) -> str:
+    """YYYY-MM-DD 날짜 쿼리 인자. 없으면 None, 형식이 틀리면 ValueError."""
+    value = request.args.get(name) or None
+    if value is not None:
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"{name}는 YYYY-MM-DD 형식이어야 합니다: {value}") from None
+    return value
+
+
 @app.route("/api/top-buy")
 def api_top_buy():
-    """매수 증가 Top N API."""
+    """매수 증가 Top N API. from(미포함) / to(포함)를 주면 days 대신 그 기간으로 계산한다."""
     days = request.args.get("days", 3, type=int)
     top_n = request.args.get("top_n", 20, type=int)
-    return jsonify(get_top_buy_increase(days=days, top_n=top_n))
+    try:
+        date_from, date_to = _date_arg("from"), _date_arg("to")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(get_top_buy_increase(
+        days=days, top_n=top_n, date_from=date_from, date_to=date_to
+    ))
 
 
 @app.route("/api/top-sell")
 def api_top_sell():
-    """매도 증가(청산) Top N API."""
+    """매도 증가(청산) Top N API. from(미포함) / to(포함)를 주면 days 대신 그 기간으로 계산한다."""
     days = request.args.get("days", 3, type=int)
     top_n = request.args.get("top_n", 20, type=int)
-    return jsonify(get_top_sell_increase(days=days, top_n=top_n))
+    try:
+        date_from, date_to = _date_arg("from"), _date_arg("to")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(get_top_sell_increase(
+        days=days, top_n=top_n, date_from=date_from, date_to=date_to
+    ))
 
 
 @app.route("/api/holdings")
@@ -117,6 +159,39 @@ def api_holdings():
     return jsonify(get_etf_holdings(etf_code))
 
 
+@app.route("/api/stock-history")
+def api_stock_history():
+    """
+    종목 보유 이력 API. ?stock=종목코드|종목명&interval=day|week|month&from=&to=
+    ETF별 / 전체 주식수·비중 시계열을 한 시점씩 JSON으로 스트리밍한다.
+    """
+    stock = request.args.get("stock", "").strip()
+    if not stock:
+        return jsonify({"error": "stock 파라미터가 필요합니다."}), 400
+    try:
+        date_from, date_to = _date_arg("from"), _date_arg("to")
+        history = stock_history(
+            stock, request.args.get("interval", "day"), date_from=date_from, date_to=date_to
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if history is None:
+        return jsonify({"error": f"종목을 찾을 수 없습니다: {stock}"}), 404
+
+    info, points = history
+
+    def generate():
+        head = json.dumps(info, ensure_ascii=False)
+        yield head[:-1] + ', "series": ['
+        for i, point in enumerate(points):
+            yield ("," if i else "") + json.dumps(point, ensure_ascii=False)
+        yield "]}"
+
+    response = Response(stream_with_context(generate()), mimetype="application/json")
+    response.call_on_close(points.close)
+    return response
+
+
 @app.route("/api/holdings-by-sector")
 def api_holdings_by_sector():
     """섹터별 ETF 보유종목 일괄 조회 API."""
@@ -135,6 +210,50 @@ def api_holdings_by_sector():
     return jsonify(result)
 
 
+@app.route("/api/sector-flow")
+def api_sector_flow():
+    """섹터별 매수/매도 수급 API. 수집 시 미리 계산한 집계를 그대로 반환한다."""
+    days = request.args.get("days", 5, type=int)
+    try:
+        return jsonify(get_sector_flow(days=days))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/api/etf-similarity")
+def api_etf_similarity():
+    """
+    ETF 쌍별 유사도 행렬 API. ?metric=cosine|weight_overlap|common_count&date=
+    date를 생략하면 최신 수집일, 수집일이 아니면 그 이전 마지막 수집일 기준이다.
+    """
+    try:
+        similarity = compute_similarity(_date_arg("date"))
+        return jsonify(similarity.matrix(request.args.get("metric", "cosine")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/api/etf-similarity/<etf_code>")
+def api_similar_etfs(etf_code):
+    """한 ETF와 가장 비슷한 ETF API. ?metric=cosine|weight_overlap|common_count&top_n=10&date="""
+    top_n = request.args.get("top_n", 10, type=int)
+    metric = request.args.get("metric", "cosine")
+    try:
+        similarity = compute_similarity(_date_arg("date"))
+        similar = similarity.most_similar(etf_code, metric=metric, top_n=top_n)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if similar is None:
+        return jsonify({"error": f"기준일 포트폴리오에 없는 ETF입니다: {etf_code}"}), 404
+    return jsonify({
+        "date": similarity.date,
+        "etf_code": etf_code,
+        "etf_name": similarity.etf_names.get(etf_code, etf_code),
+        "metric": metric,
+        "similar": similar,
+    })
+
+
 @app.route("/api/overlap")
 def api_overlap():
     """중복 매수 종목 API."""
@@ -175,15 +294,22 @@ def api_last_update():
 
 # --- 관리 API ---
 
+@app.route("/api/cache-stats")
+def api_cache_stats():
+    """분석 결과 캐시 적중 통계 API (이 워커 프로세스 기준)."""
+    return jsonify(result_cache.stats())
+
+
 @app.route("/api/collect", methods=["POST"])
 def api_collect():
-    """수동 데이터 수집 실행 API."""
+    """수동 데이터 수집 실행 API. ?resume=1이면 실패·누락 ETF만 다시 수집한다."""
     global _collect_running
     with _collect_lock:
         if _collect_running:
             return jsonify({"status": "already_running"})
 
-    thread = threading.Thread(target=run_collection, daemon=True)
+    resume = request.args.get("resume") in ("1", "true")
+    thread = threading.Thread(target=run_collection, args=(resume,), daemon=True)
     thread.start()
     return jsonify({"status": "started"})
 
@@ -11,12 +11,64 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # SQLite DB 경로
 DB_PATH = os.path.join(BASE_DIR, "db", "active_etf.db")
 
+# SQLite 쓰기 설정
+SQLITE_JOURNAL_MODE = "WAL"
+SQLITE_SYNCHRONOUS = "NORMAL"  # WAL 모드에서는 NORMAL이어도 커밋된 데이터가 손상되지 않음
+INGEST_BATCH_SIZE = 50  # 수집 시 커밋 단위 (ETF 수). 0이면 수집 실행당 1회 커밋
+
+# SQLite 읽기 설정 (분석기/API 읽기 전용 연결 풀, analyzer/pool.py)
+READ_POOL_SIZE = 8  # 풀에 보관하는 유휴 읽기 연결 최대 개수. 0이면 호출마다 새 연결
+SQLITE_READ_MMAP_SIZE = 256 * 1024 * 1024  # 읽기 연결의 메모리 매핑 크기 (바이트)
+SQLITE_READ_CACHE_KB = 64 * 1024  # 읽기 연결당 페이지 캐시 크기 (KB)
+SQLITE_BUSY_TIMEOUT_MS = 5000  # 잠금 대기 시간 (밀리초)
+
+# 분석 결과 캐시 (analyzer/cache.py)
+RESULT_CACHE_SIZE = 256  # 프로세스별 캐시 항목 수 (LRU). 0이면 캐시하지 않음
+
+# 구성종목 저장 방식
+# "snapshot": 변경된 날짜마다 전체 스냅샷을 etf_holdings에 저장 (기본값)
+# "events": 변경 이벤트 + 주기적 체크포인트만 저장 (crawler/events.py)
+# "both": 두 방식 모두 저장 (이벤트 저장소로 옮기는 동안 병행 운영용)
+HOLDINGS_STORAGE = "snapshot"
+EVENT_CHECKPOINT_INTERVAL = 20  # ETF별로 변경일 N번마다 전체 스냅샷 체크포인트 기록
+
+# 과거 덤프 일괄 적재 (crawler/importer.py)
+IMPORT_BATCH_SIZE = 10_000  # executemany 한 번에 넣는 행 수
+IMPORT_COMMIT_ROWS = 1_000_000  # 커밋 간격 (행)
+
+# 분석용 컬럼형 스냅샷 (analyzer/columnar.py)
+COLUMNAR_ENABLED = True  # True면 수집일별 스냅샷을 NumPy 메모리 매핑 파일로 유지하고 분석기가 사용
+COLUMNAR_DIR = os.path.join(BASE_DIR, "db", "columnar")
+
+# 시그널 엔진 (analyzer/engine.py)
+SIGNAL_HORIZONS = (3, 5, 10)  # 대시보드 매수/청산 비교 기간 (일). 한 번의 계산으로 모두 만든다
+ANALYZER_BACKEND = "sql"  # 시그널 계산 방식: "sql" (SQLite 집계) | "numpy" (스냅샷 배열 벡터 연산, analyzer/vectorized.py)
+
+# 구성종목 보관 압축 (crawler/retention.py)
+HOLDINGS_HOT_DAYS = 730  # etf_holdings에 남길 최근 기간 (일). 이전 데이터는 보관 DB로 이동
+HOLDINGS_ARCHIVE_DB_PATH = os.path.join(BASE_DIR, "db", "holdings_archive.db")
+VACUUM_PAGES_PER_STEP = 2000  # 날짜 하나를 옮길 때마다 증분 VACUUM으로 반환할 최대 페이지 수
+
+# 원본 페이지 아카이브 (재파싱/리플레이용)
+ARCHIVE_ENABLED = False  # True면 수집한 페이지를 gzip 압축해 해시 기준으로 중복 없이 보관
+ARCHIVE_DB_PATH = os.path.join(BASE_DIR, "db", "page_archive.db")
+REPLAY_WORKERS = os.cpu_count() or 2  # 리플레이 재파싱 프로세스 수
+
 # Flask 서버 설정
 HOST = "0.0.0.0"
 PORT = 8787
 
 # 크롤링 설정
 CRAWL_SLEEP = 1.5  # ETF 간 요청 간격 (초)
+CRAWL_MODE = "sequential"  # 수집 모드: "sequential", "concurrent" 또는 "sharded"
+CRAWL_CONCURRENCY = 4  # concurrent 모드의 동시 수집 워커 수
+CRAWL_SHARDS = 4  # sharded 모드의 요청·파싱 프로세스 수
+CRAWL_RATE_PER_HOST = 1.0 / CRAWL_SLEEP  # 호스트별 초당 요청 수 (토큰 버킷 충전 속도)
+CRAWL_BURST_PER_HOST = 2  # 호스트별 토큰 버킷 최대 용량
+CRAWL_RETRY_MAX = 3  # 실패(empty/error) ETF의 실행 내 최대 재시도 횟수
+CRAWL_RETRY_BASE = 5.0  # 재시도 대기 시간 기준 (초). 시도마다 2배로 증가
+NAVER_ITEM_URL = "https://finance.naver.com/item/main.naver?code={code}"
+PARSER_BACKEND = "lxml"  # 구성종목 파서: "lxml" (etf_asset 섹션만 파싱) 또는 "bs4" (전체 문서, 기준 구현)
 CRAWL_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                   "(KHTML, like Gecko) Chrome/123.0 Safari/537.36",
@@ -94,3 +146,6 @@ ETF_SECTORS = {
 
 # 섹터 탭 표시 순서
 SECTOR_ORDER = ["전체", "반도체", "바이오", "배당/밸류업", "신재생/2차전지", "로봇/우주/조선", "소비/컬처", "기타"]
+
+# 섹터 수급 집계 (crawler/sectors.py)
+SECTOR_FLOW_TOP_N = 5  # 섹터·기간별로 보관하는 순매수/순매도 상위 종목 수
@@ -0,0 +1,286 @@
+"""
+원본 페이지 아카이브 및 오프라인 리플레이.
+수집한 페이지를 gzip 압축하여 내용 해시 기준으로 중복 없이 보관하고,
+파서가 바뀌거나 버그가 발견되면 네트워크 없이 etf_holdings를 다시 만든다.
+
+사용법:
+    python -m crawler.archive replay --from 2026-01-01 --to 2026-03-31 [--workers 8]
+"""
+
+import argparse
+import gzip
+import hashlib
+import logging
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import ARCHIVE_DB_PATH, HOLDINGS_STORAGE, REPLAY_WORKERS
+from crawler.events import event_dates
+from crawler.naver_etf import (
+    backfill_fingerprints,
+    decode_page,
+    flush_columnar,
+    get_db_connection,
+    holdings_fingerprint,
+    load_etf_snapshot,
+    parse_holdings,
+    replace_snapshots,
+)
+from crawler.sectors import refresh_sector_flow
+
+logger = logging.getLogger(__name__)
+
+# 리플레이 워커 프로세스별 아카이브 읽기 연결
+_worker_conn = None
+
+
+def init_archive(conn: sqlite3.Connection):
+    """
+    attach된 archive 스키마에 테이블을 생성한다.
+
+    Args:
+        conn: archive DB가 attach된 DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS archive.pages (
+            content_hash TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            raw_size INTEGER NOT NULL,
+            stored_size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS archive.page_log (
+            etf_code TEXT NOT NULL,
+            collect_date DATE NOT NULL,
+            content_hash TEXT NOT NULL,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (etf_code, collect_date)
+        );
+
+        CREATE INDEX IF NOT EXISTS archive.idx_page_log_date
+            ON page_log(collect_date);
+    """)
+    conn.commit()
+
+
+def archive_page(etf_code: str, collect_date: str, body: bytes, conn: sqlite3.Connection):
+    """
+    수집한 페이지를 아카이브에 기록한다.
+    304 응답처럼 본문이 없으면 해당 ETF의 직전 페이지를 그대로 가리킨다.
+
+    Args:
+        etf_code: ETF 종목코드
+        collect_date: 수집 날짜
+        body: 응답 본문 (원본 바이트). 없으면 None
+        conn: archive DB가 attach된 DB 연결
+    """
+    if body is None:
+        row = conn.execute(
+            "SELECT content_hash FROM archive.page_log "
+            "WHERE etf_code = ? ORDER BY collect_date DESC LIMIT 1",
+            (etf_code,),
+        ).fetchone()
+        if not row:
+            return
+        content_hash = row["content_hash"]
+    else:
+        content_hash = hashlib.sha256(body).hexdigest()
+        data = gzip.compress(body)
+        conn.execute(
+            "INSERT OR IGNORE INTO archive.pages "
+            "(content_hash, data, raw_size, stored_size) VALUES (?, ?, ?, ?)",
+            (content_hash, data, len(body), len(data)),
+        )
+
+    conn.execute(
+        "INSERT OR REPLACE INTO archive.page_log (etf_code, collect_date, content_hash) "
+        "VALUES (?, ?, ?)",
+        (etf_code, collect_date, content_hash),
+    )
+
+
+def _open_archive_readonly() -> sqlite3.Connection:
+    """아카이브 DB를 읽기 전용으로 연다."""
+    return sqlite3.connect(f"file:{ARCHIVE_DB_PATH}?mode=ro", uri=True)
+
+
+def _init_replay_worker():
+    """리플레이 워커 프로세스 초기화: 아카이브 읽기 연결을 연다."""
+    global _worker_conn
+    _worker_conn = _open_archive_readonly()
+
+
+def _parse_archived(item: tuple) -> tuple:
+    """
+    워커 프로세스: 아카이브된 페이지 하나를 압축 해제 후 파싱한다.
+
+    Args:
+        item: (content_hash, etf_code)
+
+    Returns:
+        (content_hash, 구성종목 리스트)
+    """
+    content_hash, etf_code = item
+    data = _worker_conn.execute(
+        "SELECT data FROM pages WHERE content_hash = ?", (content_hash,)
+    ).fetchone()[0]
+    return content_hash, parse_holdings(decode_page(gzip.decompress(data)), etf_code)
+
+
+def _stored_snapshots(conn: sqlite3.Connection, etf_code: str, date_from: str, date_to: str) -> dict:
+    """
+    저장 방식(HOLDINGS_STORAGE)과 무관하게 기간 내 ETF의 저장된 스냅샷을 조회한다.
+
+    Args:
+        conn: DB 연결
+        etf_code: ETF 종목코드
+        date_from: 시작 날짜 (포함)
+        date_to: 종료 날짜 (포함)
+
+    Returns:
+        {collect_date: 구성종목 리스트}
+    """
+    if HOLDINGS_STORAGE == "events":
+        dates = event_dates(conn, etf_code, date_from, date_to)
+    else:
+        dates = [r[0] for r in conn.execute(
+            "SELECT DISTINCT collect_date FROM etf_holdings "
+            "WHERE etf_code = ? AND collect_date BETWEEN ? AND ? ORDER BY collect_date",
+            (etf_code, date_from, date_to),
+        )]
+    return {d: load_etf_snapshot(conn, etf_code, d)[1] for d in dates}
+
+
+def replay(date_from: str, date_to: str, workers: int = None) -> dict:
+    """
+    아카이브된 페이지로 기간 내 etf_holdings를 다시 만든다. 네트워크를 사용하지 않는다.
+
+    처리 흐름:
+    1. page_log에서 기간 내 (ETF, 날짜, 페이지 해시) 조회
+    2. 중복 없는 페이지만 프로세스 풀에서 병렬 파싱
+    3. ETF별 첫 ~ 마지막 아카이브 날짜 구간만 다시 만든다. 구간 안에서
+       아카이브 페이지가 없는 날짜(아카이브 없이 저장·임포트된 스냅샷)와
+       파싱 결과가 빈 날짜는 저장된 스냅샷을 그대로 두고,
+       나머지는 날짜순으로 직전 스냅샷과 지문이 다를 때만 저장 (수집 시와 같은 규칙)
+
+    Args:
+        date_from: 시작 날짜 (YYYY-MM-DD, 포함)
+        date_to: 종료 날짜 (YYYY-MM-DD, 포함)
+        workers: 파싱 프로세스 수. None이면 config.REPLAY_WORKERS
+
+    Returns:
+        {"pages": int, "parsed": int, "saved": int, "kept": int, "elapsed": float}
+    """
+    started = time.perf_counter()
+    workers = workers or REPLAY_WORKERS
+
+    arch = _open_archive_readonly()
+    try:
+        log_rows = arch.execute(
+            "SELECT etf_code, collect_date, content_hash FROM page_log "
+            "WHERE collect_date BETWEEN ? AND ? ORDER BY collect_date, etf_code",
+            (date_from, date_to),
+        ).fetchall()
+    finally:
+        arch.close()
+
+    if not log_rows:
+        logger.info("리플레이 대상 페이지 없음 (%s ~ %s)", date_from, date_to)
+        return {"pages": 0, "parsed": 0, "saved": 0, "kept": 0, "elapsed": 0.0}
+
+    # 같은 페이지는 한 번만 파싱
+    unique_pages = {}
+    for etf_code, _, content_hash in log_rows:
+        unique_pages.setdefault(content_hash, etf_code)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_replay_worker) as executor:
+        parsed = dict(executor.map(_parse_archived, unique_pages.items(), chunksize=16))
+
+    # ETF별 아카이브 날짜 → 페이지 해시 (날짜순)
+    archived = {}
+    for etf_code, collect_date, content_hash in log_rows:
+        archived.setdefault(etf_code, {})[collect_date] = content_hash
+
+    saved = kept = 0
+    conn = get_db_connection()
+    try:
+        for etf_code, pages in archived.items():
+            first_date, last_date = min(pages), max(pages)
+            stored = _stored_snapshots(conn, etf_code, first_date, last_date)
+
+            _, prev_holdings = load_etf_snapshot(conn, etf_code, first_date, before=True)
+            prev_fp = holdings_fingerprint(prev_holdings) if prev_holdings else None
+
+            snapshots = []
+            for collect_date in sorted(set(pages) | set(stored)):
+                holdings = parsed[pages[collect_date]] if collect_date in pages else None
+                if not holdings:
+                    # 아카이브 페이지가 없거나 파싱 결과가 비면 저장된 스냅샷을 그대로 둔다
+                    if collect_date in stored:
+                        if collect_date in pages:
+                            logger.warning(
+                                "[%s] %s 아카이브 페이지 파싱 결과 없음 - 저장된 스냅샷 유지",
+                                etf_code, collect_date,
+                            )
+                        holdings = stored[collect_date]
+                        snapshots.append((collect_date, holdings))
+                        prev_fp = holdings_fingerprint(holdings)
+                        kept += 1
+                    continue
+                fingerprint = holdings_fingerprint(holdings)
+                if fingerprint == prev_fp:
+                    continue
+                snapshots.append((collect_date, holdings))
+                prev_fp = fingerprint
+                saved += 1
+
+            replace_snapshots(etf_code, first_date, last_date, snapshots, conn)
+
+        backfill_fingerprints(conn, list(archived))
+        refresh_sector_flow(conn)
+        conn.commit()
+        flush_columnar(conn)
+    finally:
+        conn.close()
+
+    stats = {
+        "pages": len(log_rows),
+        "parsed": len(unique_pages),
+        "saved": saved,
+        "kept": kept,
+        "elapsed": round(time.perf_counter() - started, 2),
+    }
+    logger.info(
+        "리플레이 완료 (%s ~ %s): 페이지 %d / 파싱 %d / 저장 %d / 유지 %d / %.2f초",
+        date_from, date_to, stats["pages"], stats["parsed"], stats["saved"], stats["kept"],
+        stats["elapsed"],
+    )
+    return stats
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="ETF 페이지 아카이브 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = sub.add_parser("replay", help="아카이브로 etf_holdings 재생성 (오프라인)")
+    replay_parser.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+    replay_parser.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD")
+    replay_parser.add_argument("--workers", type=int, default=None, help="파싱 프로세스 수")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if args.command == "replay":
+        replay(args.date_from, args.date_to, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+기준일(as-of) 스냅샷 인덱스.
+수집기는 구성종목이 바뀐 ETF만 저장하므로 한 수집일에는 그날 변경된 ETF 행만 있다.
+etf_snapshot_asof는 모든 수집일 × ETF마다 그 날짜 이전(당일 포함) 가장 최근 스냅샷 날짜를
+보관하여, 분석 모듈이 인덱스 조인 한 번으로 해당 날짜의 전체 포트폴리오를 읽게 한다.
+저장 시점에 ETF 단위로 갱신한다.
+"""
+
+import logging
+import sqlite3
+
+from config import HOLDINGS_STORAGE
+
+logger = logging.getLogger(__name__)
+
+
+def create_asof_schema(conn: sqlite3.Connection):
+    """
+    기준일 스냅샷 인덱스 테이블을 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS etf_snapshot_asof (
+            as_of_date DATE NOT NULL,
+            etf_code TEXT NOT NULL,
+            snapshot_date DATE NOT NULL,
+            PRIMARY KEY (as_of_date, etf_code)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_asof_etf_snapshot
+            ON etf_snapshot_asof(etf_code, snapshot_date);
+    """)
+
+
+def _source() -> tuple:
+    """저장 방식에 따른 (스냅샷 테이블, 날짜 컬럼)."""
+    if HOLDINGS_STORAGE == "events":
+        return "etf_holdings_event", "event_date"
+    return "etf_holdings", "collect_date"
+
+
+def refresh_asof(conn: sqlite3.Connection, etf_code: str, date_from: str):
+    """
+    ETF 하나의 이력이 date_from 이후로 바뀐 뒤 기준일 인덱스를 갱신한다.
+    구성종목 쓰기와 같은 트랜잭션에서 호출한다.
+
+    - 더 이상 어느 ETF에도 없는 수집일은 삭제
+    - 새로 생긴 수집일은 직전 수집일의 행을 이어받음 (다른 ETF는 그날 바뀌지 않았으므로)
+    - 해당 ETF의 date_from 이후 행은 스냅샷 테이블 기준으로 다시 계산
+
+    Args:
+        conn: DB 연결
+        etf_code: ETF 종목코드
+        date_from: 이력이 바뀐 첫 날짜 (포함)
+    """
+    table, date_col = _source()
+    dates = [
+        r[0]
+        for r in conn.execute(
+            f"SELECT DISTINCT {date_col} FROM {table} WHERE {date_col} >= ? ORDER BY {date_col}",
+            (date_from,),
+        ).fetchall()
+    ]
+
+    conn.execute(
+        f"DELETE FROM etf_snapshot_asof WHERE as_of_date >= ? AND as_of_date NOT IN "
+        f"(SELECT DISTINCT {date_col} FROM {table} WHERE {date_col} >= ?)",
+        (date_from, date_from),
+    )
+    for as_of_date in dates:
+        if conn.execute(
+            "SELECT 1 FROM etf_snapshot_asof WHERE as_of_date = ? LIMIT 1", (as_of_date,)
+        ).fetchone():
+            continue
+        conn.execute(
+            "INSERT INTO etf_snapshot_asof (as_of_date, etf_code, snapshot_date) "
+            "SELECT ?, etf_code, snapshot_date FROM etf_snapshot_asof WHERE as_of_date = "
+            "(SELECT MAX(as_of_date) FROM etf_snapshot_asof WHERE as_of_date < ?)",
+            (as_of_date, as_of_date),
+        )
+
+    conn.execute(
+        "DELETE FROM etf_snapshot_asof WHERE etf_code = ? AND as_of_date >= ?",
+        (etf_code, date_from),
+    )
+    conn.executemany(
+        f"INSERT INTO etf_snapshot_asof (as_of_date, etf_code, snapshot_date) "
+        f"SELECT ?1, ?2, snapshot_date FROM ("
+        f"  SELECT MAX({date_col}) AS snapshot_date FROM {table} "
+        f"  WHERE etf_code = ?2 AND {date_col} <= ?1"
+        f") WHERE snapshot_date IS NOT NULL",
+        [(as_of_date, etf_code) for as_of_date in dates],
+    )
+
+
+def rebuild_asof(conn: sqlite3.Connection, date_from: str = None) -> int:
+    """
+    date_from 이후(없으면 전체) 기준일 인덱스를 스냅샷 테이블에서 다시 만든다.
+    일괄 적재나 기존 DB 백필처럼 여러 ETF가 한꺼번에 바뀐 경우에 사용한다.
+    다시 만든 날짜는 컬럼형 스냅샷도 갱신 대상으로 표시한다.
+
+    Args:
+        conn: DB 연결
+        date_from: 시작 날짜 (포함)
+
+    Returns:
+        기록한 인덱스 행 수
+    """
+    table, date_col = _source()
+    date_from = date_from or ""
+    mark_dirty = (
+        "INSERT OR IGNORE INTO columnar_dirty (collect_date) "
+        "SELECT DISTINCT as_of_date FROM etf_snapshot_asof WHERE as_of_date >= ?"
+    )
+    conn.execute(mark_dirty, (date_from,))
+    conn.execute("DELETE FROM etf_snapshot_asof WHERE as_of_date >= ?", (date_from,))
+    rows = conn.execute(
+        f"INSERT INTO etf_snapshot_asof (as_of_date, etf_code, snapshot_date) "
+        f"SELECT as_of_date, etf_code, snapshot_date FROM ("
+        f"  SELECT d.as_of_date, e.etf_code, "
+        f"    (SELECT MAX(t.{date_col}) FROM {table} t "
+        f"     WHERE t.etf_code = e.etf_code AND t.{date_col} <= d.as_of_date) AS snapshot_date "
+        f"  FROM (SELECT DISTINCT {date_col} AS as_of_date FROM {table} "
+        f"        WHERE {date_col} >= ?) d "
+        f"  CROSS JOIN (SELECT DISTINCT etf_code FROM {table}) e"
+        f") WHERE snapshot_date IS NOT NULL",
+        (date_from,),
+    ).rowcount
+    conn.execute(mark_dirty, (date_from,))
+    return rows
+
+
+def asof_dirty_dates(
+    conn: sqlite3.Connection, etf_code: str, date_from: str, date_to: str = None
+) -> set:
+    """
+    ETF의 date_from ~ date_to 스냅샷을 참조하는 기준일 목록을 반환한다.
+    해당 스냅샷이 바뀌면 이 기준일들의 전체 포트폴리오도 바뀐다.
+    """
+    sql = "SELECT as_of_date FROM etf_snapshot_asof WHERE etf_code = ? AND snapshot_date >= ?"
+    params = [etf_code, date_from]
+    if date_to:
+        sql += " AND snapshot_date <= ?"
+        params.append(date_to)
+    return {r[0] for r in conn.execute(sql, params).fetchall()}
@@ -0,0 +1,140 @@
+"""
+수집 저장 경로 벤치마크.
+임시 DB에 ETF 수별 합성 구성종목을 여러 수집일에 걸쳐 저장하며 초당 저장 행 수를 잰다.
+수집 실행과 같이 하나의 쓰기 연결로 ETF마다 ingest_holdings()(변경 확인 + save_holdings())와
+commit_batch()를 호출하고, 실행 끝에서 섹터 수급 집계 갱신과 커밋을 한 번 한다.
+ETF 저장마다 실행 전체 규모의 작업이 끼어들면 ETF 수가 늘수록 초당 행 수가 떨어지는 것으로 드러난다.
+
+사용법:
+    python -m crawler.bench_ingest [--etfs 25 250 2500] [--rows 40] [--days 2]
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+import crawler.naver_etf as naver_etf
+from crawler.sectors import refresh_sector_flow
+
+logger = logging.getLogger(__name__)
+
+UNIVERSE = 3000  # 합성 종목 수
+
+
+def _initial_holdings(rng: random.Random, rows: int) -> dict:
+    """{stock_code: [주식수, 비중]} 초기 포트폴리오."""
+    return {
+        f"{code:06d}": [rng.randint(1, 500) * 100, round(rng.uniform(0.1, 5.0), 2)]
+        for code in rng.sample(range(1, UNIVERSE + 1), rows)
+    }
+
+
+def _next_day(rng: random.Random, holdings: dict):
+    """실제 수집처럼 일부 종목의 주식수·비중을 바꾸고 가끔 한 종목을 교체한다."""
+    for values in holdings.values():
+        if rng.random() < 0.3:
+            values[0] += rng.choice([-500, -100, 100, 300, 1000])
+            values[1] = round(max(values[1] + rng.uniform(-0.2, 0.2), 0.01), 2)
+    if rng.random() < 0.2:
+        del holdings[rng.choice(sorted(holdings))]
+        while True:
+            code = f"{rng.randint(1, UNIVERSE):06d}"
+            if code not in holdings:
+                holdings[code] = [rng.randint(1, 500) * 100, round(rng.uniform(0.1, 2.0), 2)]
+                break
+
+
+def _as_rows(holdings: dict) -> list:
+    return [
+        {"stock_code": code, "stock_name": f"종목{code}", "stock_count": count, "weight": weight}
+        for code, (count, weight) in sorted(holdings.items())
+    ]
+
+
+def bench_ingest(etfs: int, rows: int = 40, days: int = 2, seed: int = 0) -> dict:
+    """
+    임시 DB에 etfs개 ETF의 days일치 구성종목을 수집 실행처럼 저장한다.
+
+    Args:
+        etfs: ETF 수
+        rows: ETF별 구성종목 수
+        days: 수집일 수 (첫날은 이력이 없어 측정에서 제외)
+        seed: 합성 데이터 난수 시드
+
+    Returns:
+        {"etfs", "rows", "saved_rows", "save_seconds", "finish_seconds", "rows_per_sec"}
+        (둘째 날부터의 합계. save는 ETF별 저장, finish는 실행 끝 집계 갱신 + 커밋 시간)
+    """
+    rng = random.Random(seed)
+    portfolios = {f"B{i:05d}": _initial_holdings(rng, rows) for i in range(etfs)}
+    saved_rows, save_seconds, finish_seconds = 0, 0.0, 0.0
+
+    original_path = naver_etf.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        naver_etf.DB_PATH = os.path.join(tmp, "bench.db")
+        try:
+            naver_etf.init_db()
+            conn = naver_etf.get_db_connection()
+            try:
+                for day in range(days):
+                    collect_date = f"2026-{1 + day // 28:02d}-{1 + day % 28:02d}"
+                    started = time.perf_counter()
+                    day_rows = 0
+                    for i, (etf_code, holdings) in enumerate(portfolios.items(), 1):
+                        if day:
+                            _next_day(rng, holdings)
+                        result = naver_etf.ingest_holdings(
+                            etf_code, etf_code, _as_rows(holdings), collect_date, conn
+                        )
+                        day_rows += result["count"]
+                        naver_etf.commit_batch(conn, i)
+                    saved = time.perf_counter()
+                    refresh_sector_flow(conn)
+                    conn.commit()
+                    finished = time.perf_counter()
+                    if day:
+                        saved_rows += day_rows
+                        save_seconds += saved - started
+                        finish_seconds += finished - saved
+                    logger.debug("%s: %d행 저장", collect_date, day_rows)
+            finally:
+                conn.close()
+        finally:
+            naver_etf.DB_PATH = original_path
+
+    elapsed = save_seconds + finish_seconds
+    return {
+        "etfs": etfs,
+        "rows": rows,
+        "saved_rows": saved_rows,
+        "save_seconds": round(save_seconds, 3),
+        "finish_seconds": round(finish_seconds, 3),
+        "rows_per_sec": round(saved_rows / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="수집 저장 경로 벤치마크 (합성 구성종목, 임시 DB)")
+    parser.add_argument("--etfs", type=int, nargs="+", default=[25, 250, 2500], help="ETF 수")
+    parser.add_argument("--rows", type=int, default=40, help="ETF별 구성종목 수")
+    parser.add_argument("--days", type=int, default=2, help="수집일 수 (첫날 제외하고 측정)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    print(f"{'ETF 수':>7} {'저장 행':>10} {'저장(s)':>9} {'실행 끝(s)':>10} {'행/초':>10}")
+    for r in (bench_ingest(n, args.rows, args.days) for n in args.etfs):
+        print(f"{r['etfs']:>7} {r['saved_rows']:>10,} {r['save_seconds']:>9.3f} "
+              f"{r['finish_seconds']:>10.3f} {r['rows_per_sec']:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+구성종목 파서 벤치마크.
+저장된 네이버 종목 페이지 모음(기본 tests/fixtures/naver)을 lxml 섹션 파서와
+BeautifulSoup 기준 구현(config.PARSER_BACKEND = "lxml" / "bs4")으로 각각 파싱해
+페이지별 시간과 결과 일치 여부를 비교한다.
+
+사용법:
+    python -m crawler.bench_parser [--corpus tests/fixtures/naver] [--repeat 20]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from config import BASE_DIR
+from crawler.naver_etf import (
+    _extract_asset_section,
+    _parse_holdings_html,
+    _parse_holdings_section,
+    decode_page,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS = os.path.join(BASE_DIR, "tests", "fixtures", "naver")
+
+
+def _best(func, repeat: int) -> float:
+    """repeat번 실행한 최소 시간 (초)."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench(corpus: str, repeat: int = 20) -> list:
+    """
+    corpus의 페이지마다 두 파서의 파싱 시간을 잰다.
+    lxml은 수집 경로와 같이 섹션 잘라내기 + 섹션 파싱, bs4는 전체 문서 파싱 시간이다.
+
+    Args:
+        corpus: .html 페이지가 있는 디렉터리
+        repeat: 페이지별 반복 횟수 (최소 시간 사용)
+
+    Returns:
+        [{"page", "bytes", "holdings", "lxml", "bs4", "same"}, ...] (시간은 초)
+    """
+    results = []
+    for name in sorted(os.listdir(corpus)):
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(corpus, name), "rb") as f:
+            content = f.read()
+        html = decode_page(content)
+
+        fast = _parse_holdings_section(_extract_asset_section(html), name)
+        reference = _parse_holdings_html(html, name)
+        results.append({
+            "page": name,
+            "bytes": len(content),
+            "holdings": len(reference),
+            "lxml": _best(
+                lambda: _parse_holdings_section(_extract_asset_section(html), name), repeat
+            ),
+            "bs4": _best(lambda: _parse_holdings_html(html, name), repeat),
+            "same": fast == reference,
+        })
+    return results
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="구성종목 파서 벤치마크 (lxml vs bs4)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="저장된 페이지 디렉터리")
+    parser.add_argument("--repeat", type=int, default=20, help="페이지별 반복 횟수")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.ERROR,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    results = bench(args.corpus, args.repeat)
+    print(f"{'페이지':24} {'크기':>9} {'종목':>5} {'lxml(ms)':>9} {'bs4(ms)':>9} {'배속':>7}  결과")
+    for r in results:
+        speedup = r["bs4"] / r["lxml"] if r["lxml"] else float("inf")
+        print(f"{r['page']:24} {r['bytes']:>9,} {r['holdings']:>5} {r['lxml'] * 1000:>9.3f} "
+              f"{r['bs4'] * 1000:>9.3f} {speedup:>6.1f}x  {'일치' if r['same'] else '불일치'}")
+    total_lxml = sum(r["lxml"] for r in results)
+    total_bs4 = sum(r["bs4"] for r in results)
+    print(f"{'합계':24} {'':>9} {'':>5} {total_lxml * 1000:>9.3f} {total_bs4 * 1000:>9.3f} "
+          f"{(total_bs4 / total_lxml if total_lxml else 0):>6.1f}x")
+    if not all(r["same"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
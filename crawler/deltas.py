@@ -0,0 +1,285 @@
+"""
+구성종목 일별 변화량 테이블.
+ETF 스냅샷이 저장될 때 직전 스냅샷과의 종목별 주식수/비중 변화와 편입/편출 여부를
+etf_holdings_delta에 기록한다. 기간 변화는 기간 내 변화량의 합으로 구하므로
+시그널 계산이 스냅샷 두 개를 읽어 비교하지 않고 집계 쿼리 하나로 끝난다.
+
+- count_change: 주식수 변화 (NULL은 0으로 계산)
+- weight_change: 비중 변화 (NULL은 0으로 계산)
+- entered / exited: 편입 / 편출이면 1
+
+변화량은 ETF의 스냅샷 날짜에만 생기므로 (기준일 A, 기준일 B] 구간의 합은
+etf_snapshot_asof 기준 두 날짜의 전체 포트폴리오 차이와 같다.
+
+etf_holdings_cumulative는 변화량의 (ETF, 종목)별 누적합(prefix sum)을 변화가 있던 날짜마다
+보관한다. 임의 구간 (A, B]의 변화는 종목마다 B 이전 마지막 누적값 - A 이전 마지막 누적값이므로
+구간 길이와 무관하게 (ETF, 종목) 쌍마다 인덱스 탐색 두 번으로 구한다. 누적값은 보관 압축
+대상이 아니어서 몇 년 구간도 기본 DB만으로 계산한다. etf_stock_pair는 누적값이 있는 쌍 목록이다.
+"""
+
+import logging
+import sqlite3
+
+from config import HOLDINGS_STORAGE
+from crawler.events import event_dates, reconstruct_snapshot
+from crawler.retention import ARCHIVE_SCHEMA, archived_through, attach_holdings_archive
+
+logger = logging.getLogger(__name__)
+
+
+def create_delta_schema(conn: sqlite3.Connection):
+    """
+    변화량 테이블을 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS etf_holdings_delta (
+            collect_date DATE NOT NULL,
+            etf_code TEXT NOT NULL,
+            stock_id INTEGER NOT NULL,
+            count_change INTEGER NOT NULL,
+            weight_change REAL NOT NULL,
+            entered INTEGER NOT NULL DEFAULT 0,
+            exited INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (collect_date, etf_code, stock_id)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_delta_etf_date
+            ON etf_holdings_delta(etf_code, collect_date);
+
+        CREATE TABLE IF NOT EXISTS etf_holdings_cumulative (
+            etf_code TEXT NOT NULL,
+            stock_id INTEGER NOT NULL,
+            collect_date DATE NOT NULL,
+            cum_count INTEGER NOT NULL,
+            cum_weight REAL NOT NULL,
+            held INTEGER NOT NULL,
+            PRIMARY KEY (etf_code, stock_id, collect_date)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS etf_stock_pair (
+            etf_code TEXT NOT NULL,
+            stock_id INTEGER NOT NULL,
+            PRIMARY KEY (etf_code, stock_id)
+        ) WITHOUT ROWID;
+    """)
+
+
+def diff_snapshots(prev: dict, new: dict) -> list:
+    """
+    두 스냅샷의 종목별 변화량을 계산한다. 변화가 없는 종목은 제외한다.
+
+    Args:
+        prev: 직전 스냅샷 {stock_id: (stock_count, weight)}
+        new: 새 스냅샷 {stock_id: (stock_count, weight)}
+
+    Returns:
+        [(stock_id, count_change, weight_change, entered, exited), ...]
+    """
+    rows = []
+    for stock_id, (count, weight) in new.items():
+        old = prev.get(stock_id)
+        if old is None:
+            rows.append((stock_id, count or 0, weight or 0, 1, 0))
+        elif old != (count, weight):
+            rows.append(
+                (stock_id, (count or 0) - (old[0] or 0), (weight or 0) - (old[1] or 0), 0, 0)
+            )
+
+    for stock_id, (count, weight) in prev.items():
+        if stock_id not in new:
+            rows.append((stock_id, -(count or 0), -(weight or 0), 0, 1))
+
+    return rows
+
+
+def _snapshot_dates(conn: sqlite3.Connection, etf_code: str, date_from: str) -> list:
+    """date_from 이후(포함) ETF의 스냅샷 날짜 목록 (오래된 순)."""
+    if HOLDINGS_STORAGE == "events":
+        return event_dates(conn, etf_code, date_from=date_from)
+    return [
+        r[0]
+        for r in conn.execute(
+            "SELECT DISTINCT collect_date FROM etf_holdings "
+            "WHERE etf_code = ? AND collect_date >= ? ORDER BY collect_date",
+            (etf_code, date_from),
+        )
+    ]
+
+
+def _load_map(conn: sqlite3.Connection, etf_code: str, snapshot_date: str) -> dict:
+    """ETF 스냅샷을 {stock_id: (stock_count, weight)}로 읽는다."""
+    if HOLDINGS_STORAGE == "events":
+        return {
+            h["stock_id"]: (h["stock_count"], h["weight"])
+            for h in reconstruct_snapshot(conn, etf_code, snapshot_date)
+        }
+    return {
+        stock_id: (count, weight)
+        for stock_id, count, weight in conn.execute(
+            "SELECT stock_id, stock_count, weight FROM etf_holdings "
+            "WHERE etf_code = ? AND collect_date = ?",
+            (etf_code, snapshot_date),
+        )
+    }
+
+
+def _previous_map(conn: sqlite3.Connection, etf_code: str, before_date: str) -> dict:
+    """before_date 직전(당일 제외) ETF 스냅샷. 없으면 빈 dict."""
+    if HOLDINGS_STORAGE == "events":
+        table, date_col = "etf_holdings_event", "event_date"
+    else:
+        table, date_col = "etf_holdings", "collect_date"
+    prev_date = conn.execute(
+        f"SELECT MAX({date_col}) FROM {table} WHERE etf_code = ? AND {date_col} < ?",
+        (etf_code, before_date),
+    ).fetchone()[0]
+    return _load_map(conn, etf_code, prev_date) if prev_date else {}
+
+
+def refresh_deltas(
+    conn: sqlite3.Connection, etf_code: str, date_from: str, date_to: str = None
+) -> int:
+    """
+    ETF 이력이 date_from ~ date_to 사이에서 바뀐 뒤 변화량을 다시 계산한다.
+    기간 직후 첫 스냅샷의 변화량도 직전 스냅샷이 바뀌었으므로 함께 다시 계산한다.
+    구성종목 쓰기와 같은 트랜잭션에서 호출한다.
+
+    Args:
+        conn: DB 연결
+        etf_code: ETF 종목코드
+        date_from: 시작 날짜 (포함)
+        date_to: 종료 날짜 (포함). None이면 date_from 이후 전체
+            (이벤트 저장 방식은 이후 이력도 다시 쓰일 수 있으므로 항상 전체)
+
+    Returns:
+        기록한 변화량 행 수
+    """
+    if HOLDINGS_STORAGE == "events":
+        date_to = None
+
+    dates = _snapshot_dates(conn, etf_code, date_from)
+    if date_to:
+        following = [d for d in dates if d > date_to][:1]
+        dates = [d for d in dates if d <= date_to] + following
+
+    sql = "DELETE FROM etf_holdings_delta WHERE etf_code = ? AND collect_date >= ?"
+    params = [etf_code, date_from]
+    if date_to:
+        sql += " AND collect_date <= ?"
+        params.append(dates[-1] if dates and dates[-1] > date_to else date_to)
+    conn.execute(sql, params)
+
+    prev = _previous_map(conn, etf_code, date_from)
+    written = 0
+    for snapshot_date in dates:
+        new = _load_map(conn, etf_code, snapshot_date)
+        rows = diff_snapshots(prev, new)
+        conn.executemany(
+            "INSERT INTO etf_holdings_delta "
+            "(collect_date, etf_code, stock_id, count_change, weight_change, entered, exited) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(snapshot_date, etf_code) + r for r in rows],
+        )
+        written += len(rows)
+        prev = new
+
+    refresh_cumulative(conn, etf_code, date_from)
+    return written
+
+
+def refresh_cumulative(conn: sqlite3.Connection, etf_code: str, date_from: str):
+    """
+    ETF의 date_from 이후 누적 변화량을 변화량 테이블에서 다시 계산한다.
+    date_from 직전 마지막 누적값에 이후 변화량의 누적합을 더한다 (refresh_deltas()에서 호출).
+
+    Args:
+        conn: DB 연결
+        etf_code: ETF 종목코드
+        date_from: 시작 날짜 (포함)
+    """
+    conn.execute(
+        "DELETE FROM etf_holdings_cumulative WHERE etf_code = ? AND collect_date >= ?",
+        (etf_code, date_from),
+    )
+    conn.execute(
+        "INSERT INTO etf_holdings_cumulative "
+        "(etf_code, stock_id, collect_date, cum_count, cum_weight, held) "
+        "SELECT d.etf_code, d.stock_id, d.collect_date, "
+        "  IFNULL(b.cum_count, 0) + SUM(d.count_change) OVER w, "
+        "  IFNULL(b.cum_weight, 0) + SUM(d.weight_change) OVER w, "
+        "  IFNULL(b.held, 0) + SUM(d.entered - d.exited) OVER w "
+        "FROM etf_holdings_delta d "
+        "LEFT JOIN etf_holdings_cumulative b "
+        "  ON b.etf_code = d.etf_code AND b.stock_id = d.stock_id AND b.collect_date = ("
+        "    SELECT MAX(collect_date) FROM etf_holdings_cumulative "
+        "    WHERE etf_code = d.etf_code AND stock_id = d.stock_id AND collect_date < ?1) "
+        "WHERE d.etf_code = ?2 AND d.collect_date >= ?1 "
+        "WINDOW w AS (PARTITION BY d.stock_id ORDER BY d.collect_date)",
+        (date_from, etf_code),
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO etf_stock_pair (etf_code, stock_id) "
+        "SELECT DISTINCT etf_code, stock_id FROM etf_holdings_delta "
+        "WHERE etf_code = ? AND collect_date >= ?",
+        (etf_code, date_from),
+    )
+
+
+def rebuild_cumulative(conn: sqlite3.Connection, with_archive: bool = False) -> int:
+    """
+    누적 변화량 전체를 변화량 테이블에서 다시 만든다 (기존 DB 백필용).
+
+    Args:
+        conn: DB 연결
+        with_archive: 보관 DB로 옮긴 변화량도 포함할지 여부
+            (보관 DB를 attach하므로 트랜잭션 밖에서 호출)
+
+    Returns:
+        기록한 누적 행 수
+    """
+    source = "etf_holdings_delta"
+    if with_archive and archived_through(conn) and attach_holdings_archive(conn, readonly=False):
+        source = (
+            f"(SELECT * FROM etf_holdings_delta "
+            f"UNION ALL SELECT * FROM {ARCHIVE_SCHEMA}.etf_holdings_delta)"
+        )
+
+    conn.execute("DELETE FROM etf_holdings_cumulative")
+    rows = conn.execute(
+        f"INSERT INTO etf_holdings_cumulative "
+        f"(etf_code, stock_id, collect_date, cum_count, cum_weight, held) "
+        f"SELECT etf_code, stock_id, collect_date, "
+        f"  SUM(count_change) OVER w, SUM(weight_change) OVER w, SUM(entered - exited) OVER w "
+        f"FROM {source} "
+        f"WINDOW w AS (PARTITION BY etf_code, stock_id ORDER BY collect_date)"
+    ).rowcount
+    conn.execute(
+        "INSERT OR IGNORE INTO etf_stock_pair (etf_code, stock_id) "
+        "SELECT DISTINCT etf_code, stock_id FROM etf_holdings_cumulative"
+    )
+    return rows
+
+
+def rebuild_deltas(conn: sqlite3.Connection, etf_codes: list = None, date_from: str = None) -> int:
+    """
+    여러 ETF의 변화량을 date_from 이후(없으면 전체) 다시 계산한다 (일괄 적재/백필용).
+
+    Args:
+        conn: DB 연결
+        etf_codes: 대상 ETF 코드 리스트. None이면 스냅샷이 있는 모든 ETF
+        date_from: 시작 날짜 (포함)
+
+    Returns:
+        기록한 변화량 행 수
+    """
+    if etf_codes is None:
+        table = "etf_holdings_event" if HOLDINGS_STORAGE == "events" else "etf_holdings"
+        etf_codes = [r[0] for r in conn.execute(f"SELECT DISTINCT etf_code FROM {table}")]
+
+    written = 0
+    for etf_code in etf_codes:
+        written += refresh_deltas(conn, etf_code, date_from or "")
+    return written
@@ -0,0 +1,294 @@
+"""
+동시 수집 엔진.
+여러 ETF의 페이지 요청·파싱을 워커 스레드(concurrent) 또는 프로세스(sharded)에서
+병렬로 처리하고, DB 쓰기는 단일 writer(호출 스레드)가 순서대로 수행한다.
+호스트별 토큰 버킷으로 요청 속도를 제한하여 서버 부하 기준을 지킨다.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import crawler.naver_etf as naver_etf
+from config import (
+    CRAWL_BURST_PER_HOST,
+    CRAWL_CONCURRENCY,
+    CRAWL_RATE_PER_HOST,
+    CRAWL_SHARDS,
+    NAVER_ITEM_URL,
+)
+from crawler.naver_etf import (
+    commit_batch,
+    fetch_holdings_result,
+    get_db_connection,
+    ingest_fetch_result,
+    load_fetch_cache,
+)
+from crawler.runs import record_etf_status
+
+logger = logging.getLogger(__name__)
+
+# sharded 모드: 샤드별 진행 상황 로그 간격 (ETF 수)
+_SHARD_PROGRESS_EVERY = 10
+# sharded 모드: 결과 큐 최대 길이 (writer가 밀리면 샤드가 대기)
+_SHARD_QUEUE_SIZE = 64
+# sharded 모드: 샤드 프로세스에 넘기는 요청·파싱 설정 (spawn한 샤드는 config를 새로 import한다)
+_SHARD_SETTINGS = ("NAVER_ITEM_URL", "CRAWL_HEADERS", "PARSER_BACKEND", "ARCHIVE_ENABLED")
+
+
+class TokenBucket:
+    """
+    스레드 안전한 토큰 버킷 속도 제한기.
+
+    rate개/초 속도로 토큰이 충전되며 최대 capacity개까지 쌓인다.
+    acquire()는 토큰 1개를 얻을 때까지 대기한다.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 1개를 소비한다. 토큰이 없으면 충전될 때까지 대기한다."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(url: str) -> TokenBucket:
+    """
+    URL 호스트별 토큰 버킷을 반환한다. 같은 호스트는 같은 버킷을 공유한다.
+
+    Args:
+        url: 요청 URL
+
+    Returns:
+        해당 호스트의 TokenBucket
+    """
+    host = urlparse(url).netloc
+    with _host_limiters_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            limiter = TokenBucket(CRAWL_RATE_PER_HOST, CRAWL_BURST_PER_HOST)
+            _host_limiters[host] = limiter
+        return limiter
+
+
+def _error_result(etf_name: str, etf_code: str) -> dict:
+    """저장 단계에서 실패한 ETF의 수집 결과."""
+    return {"etf_name": etf_name, "etf_code": etf_code, "status": "error", "count": 0}
+
+
+def _fetch_worker(etf_code: str, cache: dict) -> dict:
+    """워커 스레드: 속도 제한 후 페이지 요청 + 파싱까지 수행한다."""
+    get_host_limiter(NAVER_ITEM_URL.format(code=etf_code)).acquire()
+    return fetch_holdings_result(etf_code, cache)
+
+
+def collect_concurrent(
+    etf_items: list, collect_date: str, concurrency: int = None, run_id: int = None
+) -> list:
+    """
+    ETF 목록을 동시에 수집한다.
+
+    워커 스레드가 요청·파싱을 병렬로 수행하고, 완료되는 순서대로
+    호출 스레드가 하나의 DB 연결로 저장한다. 커밋은 INGEST_BATCH_SIZE 단위.
+
+    Args:
+        etf_items: [(etf_name, etf_code), ...]
+        collect_date: 수집 날짜 (YYYY-MM-DD)
+        concurrency: 동시 워커 수. None이면 config.CRAWL_CONCURRENCY
+        run_id: 실행 ID. 있으면 ETF별 결과를 실행 기록에 함께 저장
+
+    Returns:
+        각 ETF의 수집 결과 리스트 (etf_items 순서)
+    """
+    concurrency = concurrency or CRAWL_CONCURRENCY
+    results = {}
+
+    conn = get_db_connection()
+    try:
+        fetch_cache = load_fetch_cache(conn)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(_fetch_worker, etf_code, fetch_cache.get(etf_code)): (
+                    etf_name, etf_code,
+                )
+                for etf_name, etf_code in etf_items
+            }
+
+            for future in as_completed(futures):
+                etf_name, etf_code = futures[future]
+                try:
+                    results[etf_code] = ingest_fetch_result(
+                        etf_name, etf_code, future.result(), collect_date, conn
+                    )
+                except Exception as e:
+                    results[etf_code] = _error_result(etf_name, etf_code)
+                    logger.error("수집 실패: %s [%s] - %s", etf_name, etf_code, e)
+                record_etf_status(conn, run_id, results[etf_code])
+                commit_batch(conn, len(results))
+        conn.commit()
+    finally:
+        conn.close()
+
+    return [results[etf_code] for _, etf_code in etf_items]
+
+
+def _shard_worker(shard_id: int, etf_items: list, cache: dict, rate: float, burst: float,
+                  settings: dict, result_queue):
+    """
+    샤드 프로세스: 맡은 ETF를 순서대로 요청·파싱하여 결과를 큐에 넣는다.
+    끝나면 (shard_id, None, None, None) 종료 표시를 넣는다.
+
+    Args:
+        shard_id: 샤드 번호
+        etf_items: 이 샤드가 맡은 [(etf_name, etf_code), ...]
+        cache: 이 샤드 ETF들의 fetch 캐시 {etf_code: dict}
+        rate: 이 샤드의 초당 요청 수 (호스트 전체 속도의 1/샤드 수)
+        burst: 이 샤드의 토큰 버킷 용량
+        settings: 부모 프로세스의 요청·파싱 설정 {이름: 값} (_SHARD_SETTINGS)
+        result_queue: writer로 결과를 보내는 큐
+    """
+    for name, value in settings.items():
+        setattr(naver_etf, name, value)
+    limiter = TokenBucket(rate, burst)
+    try:
+        for etf_name, etf_code in etf_items:
+            limiter.acquire()
+            try:
+                fetched = fetch_holdings_result(etf_code, cache.get(etf_code))
+            except Exception as e:
+                logger.error("샤드 %d 요청·파싱 실패: %s [%s] - %s", shard_id, etf_name, etf_code, e)
+                fetched = None
+            result_queue.put((shard_id, etf_name, etf_code, fetched))
+    finally:
+        result_queue.put((shard_id, None, None, None))
+
+
+def collect_sharded(
+    etf_items: list, collect_date: str, shards: int = None, run_id: int = None
+) -> list:
+    """
+    ETF 목록을 여러 프로세스로 나누어 수집한다.
+
+    ETF를 샤드 프로세스에 고르게 나누어 요청·파싱(CPU 작업)을 GIL 없이 병렬로 수행하고,
+    파싱 결과는 큐로 받아 호출 프로세스의 단일 DB 연결이 저장한다.
+    호스트별 요청 속도는 샤드 수로 나누어 각 샤드에 배분한다.
+
+    Args:
+        etf_items: [(etf_name, etf_code), ...]
+        collect_date: 수집 날짜 (YYYY-MM-DD)
+        shards: 샤드 프로세스 수. None이면 config.CRAWL_SHARDS
+        run_id: 실행 ID. 있으면 ETF별 결과를 실행 기록에 함께 저장
+
+    Returns:
+        각 ETF의 수집 결과 리스트 (etf_items 순서)
+    """
+    shards = max(1, min(shards or CRAWL_SHARDS, len(etf_items)))
+    shard_items = [etf_items[i::shards] for i in range(shards)]
+    rate = CRAWL_RATE_PER_HOST / shards
+    burst = max(1.0, CRAWL_BURST_PER_HOST / shards)
+    settings = {name: getattr(naver_etf, name) for name in _SHARD_SETTINGS}
+    results = {}
+
+    conn = get_db_connection()
+    try:
+        fetch_cache = load_fetch_cache(conn)
+
+        # 부모의 스레드·HTTP 세션 상태를 물려받지 않도록 spawn으로 시작
+        ctx = multiprocessing.get_context("spawn")
+        result_queue = ctx.Queue(maxsize=_SHARD_QUEUE_SIZE)
+        procs = []
+        for shard_id, items in enumerate(shard_items):
+            cache = {code: fetch_cache[code] for _, code in items if code in fetch_cache}
+            proc = ctx.Process(
+                target=_shard_worker,
+                args=(shard_id, items, cache, rate, burst, settings, result_queue),
+                name=f"etf-shard-{shard_id}",
+                daemon=True,
+            )
+            proc.start()
+            procs.append(proc)
+
+        done = [0] * shards
+        running = set(range(shards))
+        try:
+            while running:
+                try:
+                    shard_id, etf_name, etf_code, fetched = result_queue.get(timeout=1.0)
+                except queue.Empty:
+                    # 종료 표시 없이 죽은 샤드는 남은 ETF를 오류로 처리
+                    for shard_id in list(running):
+                        if not procs[shard_id].is_alive() and result_queue.empty():
+                            logger.error(
+                                "샤드 %d 비정상 종료 (exitcode=%s)",
+                                shard_id, procs[shard_id].exitcode,
+                            )
+                            running.discard(shard_id)
+                    continue
+
+                if etf_name is None:
+                    running.discard(shard_id)
+                    logger.info(
+                        "샤드 %d 완료: %d/%d", shard_id, done[shard_id], len(shard_items[shard_id])
+                    )
+                    continue
+
+                try:
+                    if fetched is None:
+                        raise RuntimeError("요청·파싱 실패")
+                    results[etf_code] = ingest_fetch_result(
+                        etf_name, etf_code, fetched, collect_date, conn
+                    )
+                except Exception as e:
+                    results[etf_code] = _error_result(etf_name, etf_code)
+                    logger.error("수집 실패: %s [%s] - %s", etf_name, etf_code, e)
+                record_etf_status(conn, run_id, results[etf_code])
+                commit_batch(conn, len(results))
+
+                done[shard_id] += 1
+                if done[shard_id] % _SHARD_PROGRESS_EVERY == 0:
+                    logger.info(
+                        "샤드 %d 진행: %d/%d", shard_id, done[shard_id], len(shard_items[shard_id])
+                    )
+            conn.commit()
+        finally:
+            for proc in procs:
+                if proc.is_alive():
+                    proc.terminate()
+                proc.join()
+            result_queue.close()
+    finally:
+        conn.close()
+
+    for etf_name, etf_code in etf_items:
+        if etf_code not in results:
+            results[etf_code] = _error_result(etf_name, etf_code)
+            logger.error("수집 결과 없음: %s [%s]", etf_name, etf_code)
+
+    return [results[etf_code] for _, etf_code in etf_items]
@@ -0,0 +1,539 @@
+"""
+구성종목 변경 이벤트 저장소.
+ETF·날짜별 전체 스냅샷 대신 변경분(편입/편출/주식수 변경/비중 변경)만 기록하고,
+주기적인 체크포인트(전체 스냅샷)에서 이벤트를 순서대로 적용해 임의 날짜의 스냅샷을 복원한다.
+
+사용법:
+    python -m crawler.events migrate [--purge]
+    python -m crawler.events compare [--etfs 25] [--stocks 40] [--years 3]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from config import EVENT_CHECKPOINT_INTERVAL, HOLDINGS_STORAGE
+from crawler.stocks import load_stocks
+
+logger = logging.getLogger(__name__)
+
+EVENT_ADDED = "added"
+EVENT_REMOVED = "removed"
+EVENT_COUNT_CHANGED = "count_changed"  # 주식수 변경 (비중도 함께 바뀔 수 있음)
+EVENT_WEIGHT_CHANGED = "weight_changed"  # 주식수는 같고 비중만 변경
+
+
+def create_event_schema(conn: sqlite3.Connection):
+    """
+    이벤트/체크포인트 테이블을 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS etf_holdings_event (
+            etf_code TEXT NOT NULL,
+            event_date DATE NOT NULL,
+            stock_id INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            stock_count INTEGER,
+            weight REAL,
+            prev_count INTEGER,
+            prev_weight REAL,
+            PRIMARY KEY (etf_code, event_date, stock_id)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_event_date
+            ON etf_holdings_event(event_date);
+
+        CREATE TABLE IF NOT EXISTS etf_holdings_checkpoint (
+            etf_code TEXT NOT NULL,
+            checkpoint_date DATE NOT NULL,
+            stock_id INTEGER NOT NULL,
+            stock_count INTEGER,
+            weight REAL,
+            PRIMARY KEY (etf_code, checkpoint_date, stock_id)
+        ) WITHOUT ROWID;
+    """)
+
+
+def diff_holdings(prev: dict, new: dict) -> list:
+    """
+    두 스냅샷의 차이를 이벤트 리스트로 만든다.
+
+    Args:
+        prev: 이전 스냅샷 {stock_id: (stock_count, weight)}
+        new: 새 스냅샷 {stock_id: (stock_count, weight)}
+
+    Returns:
+        [(stock_id, event_type, stock_count, weight, prev_count, prev_weight), ...]
+    """
+    events = []
+    for stock_id, (count, weight) in new.items():
+        old = prev.get(stock_id)
+        if old is None:
+            events.append((stock_id, EVENT_ADDED, count, weight, None, None))
+        elif old[0] != count:
+            events.append((stock_id, EVENT_COUNT_CHANGED, count, weight, old[0], old[1]))
+        elif old[1] != weight:
+            events.append((stock_id, EVENT_WEIGHT_CHANGED, count, weight, old[0], old[1]))
+
+    for stock_id, (count, weight) in prev.items():
+        if stock_id not in new:
+            events.append((stock_id, EVENT_REMOVED, None, None, count, weight))
+
+    return events
+
+
+def _to_map(holdings: list) -> dict:
+    """stock_id가 붙은 구성종목 리스트를 {stock_id: (stock_count, weight)}로 변환한다."""
+    return {h["stock_id"]: (h["stock_count"], h["weight"]) for h in holdings}
+
+
+def _to_list(conn: sqlite3.Connection, snapshot: dict) -> list:
+    """{stock_id: (stock_count, weight)}를 stock_master와 합쳐 종목명 순 구성종목 리스트로 변환한다."""
+    stocks = load_stocks(conn, snapshot)
+    holdings = [
+        {
+            "stock_id": stock_id,
+            "stock_code": stocks[stock_id][0],
+            "stock_name": stocks[stock_id][1],
+            "stock_count": count,
+            "weight": weight,
+        }
+        for stock_id, (count, weight) in snapshot.items()
+    ]
+    holdings.sort(key=lambda h: (h["stock_name"], h["stock_id"]))
+    return holdings
+
+
+def _reconstruct_map(
+    conn: sqlite3.Connection, etf_code: str, as_of_date: str, inclusive: bool = True
+) -> dict:
+    """직전 체크포인트 + 이후 이벤트로 as_of_date 시점 스냅샷을 복원한다."""
+    op = "<=" if inclusive else "<"
+    row = conn.execute(
+        f"SELECT MAX(checkpoint_date) FROM etf_holdings_checkpoint "
+        f"WHERE etf_code = ? AND checkpoint_date {op} ?",
+        (etf_code, as_of_date),
+    ).fetchone()
+    checkpoint_date = row[0]
+
+    snapshot = {}
+    if checkpoint_date:
+        for stock_id, count, weight in conn.execute(
+            "SELECT stock_id, stock_count, weight FROM etf_holdings_checkpoint "
+            "WHERE etf_code = ? AND checkpoint_date = ?",
+            (etf_code, checkpoint_date),
+        ):
+            snapshot[stock_id] = (count, weight)
+
+    for stock_id, event_type, count, weight in conn.execute(
+        f"SELECT stock_id, event_type, stock_count, weight FROM etf_holdings_event "
+        f"WHERE etf_code = ? AND event_date > ? AND event_date {op} ? "
+        f"ORDER BY event_date",
+        (etf_code, checkpoint_date or "", as_of_date),
+    ):
+        if event_type == EVENT_REMOVED:
+            snapshot.pop(stock_id, None)
+        else:
+            snapshot[stock_id] = (count, weight)
+
+    return snapshot
+
+
+def reconstruct_snapshot(conn: sqlite3.Connection, etf_code: str, as_of_date: str) -> list:
+    """
+    as_of_date 시점(당일 포함)의 ETF 구성종목을 복원한다.
+
+    Args:
+        conn: DB 연결
+        etf_code: ETF 종목코드
+        as_of_date: 기준 날짜 (YYYY-MM-DD)
+
+    Returns:
+        [{"stock_id", "stock_code", "stock_name", "stock_count", "weight"}, ...] (종목명 순)
+    """
+    return _to_list(conn, _reconstruct_map(conn, etf_code, as_of_date))
+
+
+def reconstruct_all(conn: sqlite3.Connection, as_of_date: str) -> dict:
+    """
+    as_of_date 시점의 모든 ETF 구성종목을 복원한다.
+
+    Returns:
+        {etf_code: [{"stock_id", "stock_code", "stock_name", "stock_count", "weight"}, ...]}
+    """
+    etf_codes = [
+        r[0]
+        for r in conn.execute(
+            "SELECT DISTINCT etf_code FROM etf_holdings_checkpoint WHERE checkpoint_date <= ?",
+            (as_of_date,),
+        )
+    ]
+    result = {}
+    for etf_code in etf_codes:
+        holdings = reconstruct_snapshot(conn, etf_code, as_of_date)
+        if holdings:
+            result[etf_code] = holdings
+    return result
+
+
+def event_dates(
+    conn: sqlite3.Connection, etf_code: str = None, date_from: str = None, date_to: str = None
+) -> list:
+    """
+    이벤트가 기록된 날짜(=스냅샷이 바뀐 날짜) 목록을 오래된 순으로 반환한다.
+
+    Args:
+        conn: DB 연결
+        etf_code: 특정 ETF만 조회 (None이면 전체)
+        date_from: 시작 날짜 (포함)
+        date_to: 종료 날짜 (포함)
+    """
+    sql = "SELECT DISTINCT event_date FROM etf_holdings_event WHERE 1 = 1"
+    params = []
+    if etf_code:
+        sql += " AND etf_code = ?"
+        params.append(etf_code)
+    if date_from:
+        sql += " AND event_date >= ?"
+        params.append(date_from)
+    if date_to:
+        sql += " AND event_date <= ?"
+        params.append(date_to)
+    sql += " ORDER BY event_date"
+    return [r[0] for r in conn.execute(sql, params)]
+
+
+def _write_events(
+    conn: sqlite3.Connection, etf_code: str, collect_date: str, prev: dict, new: dict
+) -> int:
+    """이벤트를 기록하고 필요하면 체크포인트를 남긴다. 기록한 이벤트 수를 반환한다."""
+    events = diff_holdings(prev, new)
+    conn.executemany(
+        "INSERT OR REPLACE INTO etf_holdings_event "
+        "(etf_code, event_date, stock_id, event_type, stock_count, weight, "
+        "prev_count, prev_weight) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(etf_code, collect_date) + e for e in events],
+    )
+
+    row = conn.execute(
+        "SELECT MAX(checkpoint_date) FROM etf_holdings_checkpoint "
+        "WHERE etf_code = ? AND checkpoint_date < ?",
+        (etf_code, collect_date),
+    ).fetchone()
+    last_checkpoint = row[0]
+
+    if last_checkpoint is None:
+        need_checkpoint = True
+    else:
+        since = conn.execute(
+            "SELECT COUNT(DISTINCT event_date) FROM etf_holdings_event "
+            "WHERE etf_code = ? AND event_date > ? AND event_date <= ?",
+            (etf_code, last_checkpoint, collect_date),
+        ).fetchone()[0]
+        need_checkpoint = since >= EVENT_CHECKPOINT_INTERVAL
+
+    if need_checkpoint:
+        conn.executemany(
+            "INSERT OR REPLACE INTO etf_holdings_checkpoint "
+            "(etf_code, checkpoint_date, stock_id, stock_count, weight) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(etf_code, collect_date, stock_id, c, w) for stock_id, (c, w) in new.items()],
+        )
+
+    return len(events)
+
+
+def _delete_from(conn: sqlite3.Connection, etf_code: str, date_from: str):
+    """date_from 이후(포함)의 이벤트와 체크포인트를 삭제한다."""
+    conn.execute(
+        "DELETE FROM etf_holdings_event WHERE etf_code = ? AND event_date >= ?",
+        (etf_code, date_from),
+    )
+    conn.execute(
+        "DELETE FROM etf_holdings_checkpoint WHERE etf_code = ? AND checkpoint_date >= ?",
+        (etf_code, date_from),
+    )
+
+
+def record_events(etf_code: str, holdings: list, collect_date: str, conn: sqlite3.Connection):
+    """
+    새 스냅샷을 직전 상태와 비교하여 변경 이벤트로 기록한다.
+    collect_date 이후에 이미 기록된 이벤트가 있으면 그 뒤 이력도 다시 쓴다.
+
+    Args:
+        etf_code: ETF 종목코드
+        holdings: stock_id가 붙은 구성종목 리스트
+        collect_date: 수집 날짜
+        conn: DB 연결
+    """
+    later = event_dates(conn, etf_code, date_from=collect_date)
+    later = [d for d in later if d > collect_date]
+    if later:
+        snapshots = [(collect_date, holdings)] + [
+            (d, reconstruct_snapshot(conn, etf_code, d)) for d in later
+        ]
+        replace_range(conn, etf_code, collect_date, later[-1], snapshots)
+        return
+
+    _delete_from(conn, etf_code, collect_date)
+    prev = _reconstruct_map(conn, etf_code, collect_date, inclusive=False)
+    _write_events(conn, etf_code, collect_date, prev, _to_map(holdings))
+
+
+def replace_range(
+    conn: sqlite3.Connection, etf_code: str, date_from: str, date_to: str, snapshots: list
+):
+    """
+    기간 내 이력을 주어진 스냅샷들로 교체한다. 기간 이후 이력은 새 기준에 맞게 다시 기록한다.
+
+    Args:
+        conn: DB 연결
+        etf_code: ETF 종목코드
+        date_from: 시작 날짜 (포함)
+        date_to: 종료 날짜 (포함)
+        snapshots: [(collect_date, stock_id가 붙은 구성종목 리스트), ...] 날짜 오름차순
+    """
+    after = [d for d in event_dates(conn, etf_code, date_from=date_to) if d > date_to]
+    tail = [(d, reconstruct_snapshot(conn, etf_code, d)) for d in after]
+
+    _delete_from(conn, etf_code, date_from)
+    prev = _reconstruct_map(conn, etf_code, date_from, inclusive=False)
+    for collect_date, holdings in list(snapshots) + tail:
+        new = _to_map(holdings)
+        if new == prev:
+            continue
+        _write_events(conn, etf_code, collect_date, prev, new)
+        prev = new
+
+
+def migrate_from_snapshots(conn: sqlite3.Connection, purge: bool = False) -> dict:
+    """
+    기존 etf_holdings 스냅샷으로부터 이벤트/체크포인트를 생성한다.
+
+    Args:
+        conn: DB 연결
+        purge: True면 복원 결과가 원본과 같은지 확인한 뒤 etf_holdings 행을 삭제
+            (HOLDINGS_STORAGE=events이고 보관 압축한 적이 없을 때만)
+
+    Returns:
+        {"etfs": int, "snapshots": int, "events": int}
+    """
+    if purge and HOLDINGS_STORAGE != "events":
+        raise RuntimeError(
+            f"HOLDINGS_STORAGE={HOLDINGS_STORAGE}에서는 etf_holdings를 삭제할 수 없습니다 "
+            "(스냅샷 테이블을 계속 읽으므로 events로 바꾼 뒤에만 삭제합니다)."
+        )
+    if purge:
+        from crawler.retention import archived_through
+
+        through = archived_through(conn)
+        if through:
+            raise RuntimeError(
+                f"{through} 이전 구성종목이 보관 DB에 있어 etf_holdings를 삭제할 수 없습니다 "
+                "(보관 DB의 행은 이벤트로 옮기지 않으므로 삭제하면 이력이 사라집니다)."
+            )
+    etf_codes = [
+        r[0] for r in conn.execute("SELECT DISTINCT etf_code FROM etf_holdings ORDER BY etf_code")
+    ]
+    stats = {"etfs": len(etf_codes), "snapshots": 0, "events": 0}
+
+    for etf_code in etf_codes:
+        rows = conn.execute(
+            "SELECT collect_date, stock_id, stock_count, weight FROM etf_holdings "
+            "WHERE etf_code = ? ORDER BY collect_date",
+            (etf_code,),
+        ).fetchall()
+
+        by_date = {}
+        for collect_date, stock_id, count, weight in rows:
+            by_date.setdefault(collect_date, {})[stock_id] = (count, weight)
+
+        _delete_from(conn, etf_code, "")
+        prev = {}
+        for collect_date, snapshot in by_date.items():
+            stats["events"] += _write_events(conn, etf_code, collect_date, prev, snapshot)
+            stats["snapshots"] += 1
+            prev = snapshot
+
+        if purge:
+            for collect_date, snapshot in by_date.items():
+                if _reconstruct_map(conn, etf_code, collect_date) != snapshot:
+                    raise RuntimeError(f"이벤트 복원 불일치: {etf_code} {collect_date}")
+            conn.execute("DELETE FROM etf_holdings WHERE etf_code = ?", (etf_code,))
+
+        conn.commit()
+
+    logger.info(
+        "이벤트 마이그레이션 완료: ETF %d / 스냅샷 %d / 이벤트 %d",
+        stats["etfs"], stats["snapshots"], stats["events"],
+    )
+    return stats
+
+
+def compare_storage(
+    etfs: int = 25, stocks: int = 40, years: int = 3,
+    count_change_rate: float = 0.05, weight_change_rate: float = 0.3, seed: int = 0,
+) -> dict:
+    """
+    합성 데이터로 스냅샷 저장과 이벤트 저장의 크기·조회 지연을 비교한다.
+
+    ETF마다 stocks개 종목으로 시작해 영업일마다 종목별로
+    count_change_rate 확률로 주식수가, weight_change_rate 확률로 비중이 바뀐다.
+    하루라도 바뀐 ETF만 저장하는 규칙은 두 방식이 같다.
+
+    Returns:
+        {"days", "snapshot_rows", "event_rows", "checkpoint_rows",
+         "snapshot_bytes", "event_bytes", "snapshot_ms", "event_ms"}
+    """
+    from crawler.naver_etf import create_schema
+
+    rng = random.Random(seed)
+    workdir = tempfile.mkdtemp(prefix="etf_compare_")
+    snap_path = os.path.join(workdir, "snapshot.db")
+    event_path = os.path.join(workdir, "events.db")
+    snap = sqlite3.connect(snap_path)
+    ev = sqlite3.connect(event_path)
+    create_schema(snap)
+    create_event_schema(ev)
+
+    day = date(2026, 1, 1) - timedelta(days=365 * years)
+    days = []
+    while len(days) < 250 * years:
+        if day.weekday() < 5:
+            days.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+
+    next_stock = 0
+    for e in range(etfs):
+        etf_code = f"E{e:04d}"
+        portfolio = {}
+        for _ in range(stocks):
+            portfolio[next_stock] = (rng.randint(100, 100000), round(rng.uniform(0.5, 8), 2))
+            next_stock += 1
+
+        prev = {}
+        for d in days:
+            changed = {}
+            for stock_id, (count, weight) in portfolio.items():
+                if rng.random() < count_change_rate:
+                    count = max(1, count + rng.randint(-500, 500))
+                if rng.random() < weight_change_rate:
+                    weight = round(max(0.01, weight + rng.uniform(-0.3, 0.3)), 2)
+                changed[stock_id] = (count, weight)
+            if rng.random() < count_change_rate:
+                changed.pop(rng.choice(list(changed)))
+                changed[next_stock] = (rng.randint(100, 100000), round(rng.uniform(0.5, 8), 2))
+                next_stock += 1
+            portfolio = changed
+
+            if portfolio == prev:
+                continue
+            snap.executemany(
+                "INSERT INTO etf_holdings (etf_code, collect_date, stock_id, stock_count, weight) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(etf_code, d, n, c, w) for n, (c, w) in portfolio.items()],
+            )
+            _write_events(ev, etf_code, d, prev, portfolio)
+            prev = dict(portfolio)
+        snap.commit()
+        ev.commit()
+
+    for conn in (snap, ev):
+        conn.execute("VACUUM")
+
+    probes = [(f"E{rng.randrange(etfs):04d}", rng.choice(days)) for _ in range(200)]
+
+    started = time.perf_counter()
+    for etf_code, d in probes:
+        snap.execute(
+            "SELECT stock_id, stock_count, weight FROM etf_holdings "
+            "WHERE etf_code = ? AND collect_date = ("
+            "  SELECT MAX(collect_date) FROM etf_holdings WHERE etf_code = ? AND collect_date <= ?)",
+            (etf_code, etf_code, d),
+        ).fetchall()
+    snapshot_ms = (time.perf_counter() - started) * 1000 / len(probes)
+
+    started = time.perf_counter()
+    for etf_code, d in probes:
+        _reconstruct_map(ev, etf_code, d)
+    event_ms = (time.perf_counter() - started) * 1000 / len(probes)
+
+    stats = {
+        "days": len(days),
+        "snapshot_rows": snap.execute("SELECT COUNT(*) FROM etf_holdings").fetchone()[0],
+        "event_rows": ev.execute("SELECT COUNT(*) FROM etf_holdings_event").fetchone()[0],
+        "checkpoint_rows": ev.execute("SELECT COUNT(*) FROM etf_holdings_checkpoint").fetchone()[0],
+        "snapshot_bytes": os.path.getsize(snap_path),
+        "event_bytes": os.path.getsize(event_path),
+        "snapshot_ms": round(snapshot_ms, 3),
+        "event_ms": round(event_ms, 3),
+    }
+    snap.close()
+    ev.close()
+    for path in (snap_path, event_path):
+        os.remove(path)
+    os.rmdir(workdir)
+    return stats
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="구성종목 이벤트 저장소 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = sub.add_parser("migrate", help="etf_holdings → 이벤트 저장소 마이그레이션")
+    migrate_parser.add_argument(
+        "--purge", action="store_true", help="검증 후 etf_holdings 행 삭제 (HOLDINGS_STORAGE=events 전용)"
+    )
+
+    compare_parser = sub.add_parser("compare", help="합성 데이터로 저장 크기/조회 지연 비교")
+    compare_parser.add_argument("--etfs", type=int, default=25)
+    compare_parser.add_argument("--stocks", type=int, default=40)
+    compare_parser.add_argument("--years", type=int, default=3)
+    compare_parser.add_argument("--count-change-rate", type=float, default=0.05)
+    compare_parser.add_argument("--weight-change-rate", type=float, default=0.3)
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if args.command == "migrate":
+        from crawler.naver_etf import create_schema, get_db_connection
+
+        conn = get_db_connection()
+        try:
+            create_schema(conn)
+            migrate_from_snapshots(conn, purge=args.purge)
+        finally:
+            conn.close()
+    elif args.command == "compare":
+        stats = compare_storage(
+            etfs=args.etfs, stocks=args.stocks, years=args.years,
+            count_change_rate=args.count_change_rate,
+            weight_change_rate=args.weight_change_rate,
+        )
+        print(f"영업일 {stats['days']}일")
+        print(
+            f"스냅샷: {stats['snapshot_rows']:,}행 / {stats['snapshot_bytes'] / 1e6:.1f}MB / "
+            f"조회 {stats['snapshot_ms']}ms"
+        )
+        print(
+            f"이벤트: {stats['event_rows']:,}행 + 체크포인트 {stats['checkpoint_rows']:,}행 / "
+            f"{stats['event_bytes'] / 1e6:.1f}MB / 복원 {stats['event_ms']}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+과거 구성종목 덤프 일괄 적재.
+다른 출처에서 내보낸 CSV / JSON Lines / JSON 배열 파일을 한 행씩 스트리밍으로 읽어
+etf_master로 ETF를 매핑한 뒤 큰 트랜잭션 단위로 etf_holdings에 적재한다.
+파일 전체를 메모리에 올리지 않으므로 수천만 행도 일정한 메모리로 처리한다.
+
+입력 컬럼: etf_code 또는 etf_name, collect_date(또는 date), stock_name,
+          stock_code(선택), stock_count, weight
+
+사용법:
+    python -m crawler.importer holdings_2023.csv holdings_2024.jsonl.gz
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import logging
+import re
+import sqlite3
+import time
+
+from config import HOLDINGS_STORAGE, IMPORT_BATCH_SIZE, IMPORT_COMMIT_ROWS
+from crawler.asof import rebuild_asof
+from crawler.deltas import rebuild_deltas
+from crawler.ledger import rebuild_ledger
+from crawler.naver_etf import backfill_fingerprints, flush_columnar, get_db_connection
+from crawler.sectors import refresh_sector_flow
+from crawler.stocks import get_stock_id
+
+logger = logging.getLogger(__name__)
+
+_DATE_RE = re.compile(r"^(\d{4})[-./]?(\d{2})[-./]?(\d{2})")
+
+# 진행 상황 로그 간격 (행)
+_PROGRESS_EVERY = 1_000_000
+
+
+def _open_text(path: str):
+    """.gz 파일은 압축을 풀며 읽는 텍스트 스트림을 연다."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _detect_format(path: str) -> str:
+    """확장자로 입력 형식을 추정한다."""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "json"
+
+
+def _iter_json(f):
+    """
+    JSON 배열 또는 JSON Lines를 객체 단위로 스트리밍한다.
+    배열이어도 전체를 파싱하지 않고 버퍼에서 원소를 하나씩 잘라 디코딩한다.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    in_array = None
+
+    while True:
+        chunk = f.read(1 << 16)
+        buf += chunk
+        pos = 0
+
+        while True:
+            # 공백과 배열 구분자 건너뛰기
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if in_array is None:
+                in_array = buf[pos] == "["
+                if in_array:
+                    pos += 1
+                    continue
+            if in_array and buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break  # 원소가 청크 경계에 걸림 → 더 읽기
+            yield obj
+            pos = end
+
+        buf = buf[pos:]
+        if not chunk:
+            return
+
+
+def iter_records(path: str, fmt: str = None):
+    """
+    입력 파일의 레코드를 dict로 하나씩 반환한다.
+
+    Args:
+        path: 파일 경로 (.gz 지원)
+        fmt: "csv" | "jsonl" | "json". None이면 확장자로 판단
+    """
+    fmt = fmt or _detect_format(path)
+    with _open_text(path) as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            yield from _iter_json(f)
+
+
+def _normalize_date(value) -> str:
+    """YYYY-MM-DD / YYYYMMDD / YYYY.MM.DD 형식을 YYYY-MM-DD로 맞춘다."""
+    m = _DATE_RE.match(str(value).strip())
+    if not m:
+        raise ValueError(f"날짜 형식 오류: {value!r}")
+    return f"{m.group(1)}-{m.group(2)}-{m.group(3)}"
+
+
+def _to_int(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(str(value).replace(",", "").strip())
+
+
+def _to_float(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).replace("%", "").replace(",", "").strip())
+
+
+def _load_etf_map(conn: sqlite3.Connection) -> tuple:
+    """etf_master에서 (코드 집합, 이름→코드 딕셔너리)를 만든다."""
+    codes = set()
+    by_name = {}
+    for r in conn.execute("SELECT etf_code, etf_name FROM etf_master").fetchall():
+        codes.add(r["etf_code"])
+        by_name[r["etf_name"]] = r["etf_code"]
+    return codes, by_name
+
+
+def import_files(paths: list, fmt: str = None) -> dict:
+    """
+    덤프 파일들을 etf_holdings에 적재한다.
+
+    - etf_code가 etf_master에 있으면 그대로, 없으면 etf_name으로 코드 매핑
+    - 종목은 stock_code(없으면 stock_name)로 stock_master의 stock_id에 매핑
+    - IMPORT_BATCH_SIZE행마다 executemany, IMPORT_COMMIT_ROWS행마다 커밋
+    - UNIQUE(etf_code, collect_date, stock_id)에 걸리는 행은 무시 (기존 데이터 우선)
+
+    Args:
+        paths: 파일 경로 리스트
+        fmt: 입력 형식. None이면 파일마다 확장자로 판단
+
+    Returns:
+        {"read", "inserted", "duplicates", "unknown_etf", "invalid", "elapsed", "rows_per_sec"}
+    """
+    if HOLDINGS_STORAGE == "events":
+        raise RuntimeError(
+            "HOLDINGS_STORAGE=events에서는 일괄 적재를 지원하지 않습니다. "
+            "snapshot/both 모드로 적재한 뒤 이벤트 저장소로 마이그레이션하세요."
+        )
+
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "unknown_etf": 0, "invalid": 0}
+    started = time.perf_counter()
+    affected_etfs = set()
+    affected_dates = set()
+
+    conn = get_db_connection()
+    try:
+        codes, by_name = _load_etf_map(conn)
+        stock_ids = {}
+        batch = []
+        pending = 0
+
+        def flush():
+            nonlocal pending
+            if not batch:
+                return
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO etf_holdings "
+                "(etf_code, collect_date, stock_id, stock_count, weight) "
+                "VALUES (?, ?, ?, ?, ?)",
+                batch,
+            )
+            inserted = conn.total_changes - before
+            stats["inserted"] += inserted
+            stats["duplicates"] += len(batch) - inserted
+            pending += len(batch)
+            batch.clear()
+            if pending >= IMPORT_COMMIT_ROWS:
+                conn.commit()
+                pending = 0
+
+        for path in paths:
+            logger.info("적재 시작: %s", path)
+            for rec in iter_records(path, fmt):
+                stats["read"] += 1
+
+                etf_code = str(rec.get("etf_code") or "").strip()
+                if etf_code not in codes:
+                    etf_code = by_name.get(str(rec.get("etf_name") or "").strip())
+                if not etf_code:
+                    stats["unknown_etf"] += 1
+                    continue
+
+                try:
+                    stock_name = str(rec.get("stock_name") or "").strip()
+                    if not stock_name:
+                        raise ValueError("종목명 없음")
+                    collect_date = _normalize_date(rec.get("collect_date") or rec.get("date"))
+                    stock_count = _to_int(rec.get("stock_count"))
+                    weight = _to_float(rec.get("weight"))
+                except (TypeError, ValueError) as e:
+                    stats["invalid"] += 1
+                    if stats["invalid"] <= 10:
+                        logger.warning("잘못된 행 (%s #%d): %s", path, stats["read"], e)
+                    continue
+
+                stock_code = str(rec.get("stock_code") or "").strip() or None
+                stock_id = get_stock_id(conn, stock_code, stock_name, stock_ids)
+                batch.append((etf_code, collect_date, stock_id, stock_count, weight))
+                affected_etfs.add(etf_code)
+                if collect_date not in affected_dates:
+                    # 컬럼형 스냅샷 갱신 대상 (행과 같은 트랜잭션에 기록)
+                    conn.execute(
+                        "INSERT OR IGNORE INTO columnar_dirty (collect_date) VALUES (?)",
+                        (collect_date,),
+                    )
+                    affected_dates.add(collect_date)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    flush()
+
+                if stats["read"] % _PROGRESS_EVERY == 0:
+                    elapsed = time.perf_counter() - started
+                    logger.info(
+                        "진행: %d행 읽음 / %d행 적재 / %.0f행/초",
+                        stats["read"], stats["inserted"], stats["read"] / elapsed,
+                    )
+
+        flush()
+        backfill_fingerprints(conn, sorted(affected_etfs))
+        if affected_dates:
+            rebuild_asof(conn, min(affected_dates))
+            rebuild_deltas(conn, sorted(affected_etfs), min(affected_dates))
+            rebuild_ledger(conn, min(affected_dates))
+            refresh_sector_flow(conn)
+        conn.commit()
+        flush_columnar(conn)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed"] = round(elapsed, 2)
+    stats["rows_per_sec"] = round(stats["read"] / elapsed) if elapsed > 0 else 0
+    logger.info(
+        "적재 완료: 읽음 %d / 적재 %d / 중복 %d / ETF 미확인 %d / 오류 %d / %.1f초 (%d행/초)",
+        stats["read"], stats["inserted"], stats["duplicates"], stats["unknown_etf"],
+        stats["invalid"], stats["elapsed"], stats["rows_per_sec"],
+    )
+    return stats
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="과거 구성종목 덤프 일괄 적재")
+    parser.add_argument("paths", nargs="+", help="CSV / JSONL / JSON 파일 (.gz 가능)")
+    parser.add_argument("--format", choices=["csv", "jsonl", "json"], default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    import_files(args.paths, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+수집일 원장(ledger).
+수집일마다 전체 포트폴리오 요약(보유 ETF 수, 그날 저장한 ETF 수, 종목 수, 행 수)을
+collect_ledger에 기록한다. 분석 모듈은 수집 날짜 목록과 마지막 수집 정보를
+구성종목 테이블의 DISTINCT / COUNT(DISTINCT) 조회 대신 이 테이블의 기본키로 읽는다.
+
+- etf_count: 기준일에 스냅샷이 있는 ETF 수 (etf_snapshot_asof 행 수)
+- saved_etf_count: 그날 스냅샷을 저장한 ETF 수
+- stock_count: 전체 포트폴리오의 종목 수
+- row_count: 전체 포트폴리오의 구성종목 행 수
+
+기준일 인덱스가 바뀐 날짜를 저장 시점에 같은 트랜잭션에서 다시 계산한다.
+보관 DB로 옮긴 날짜의 행은 그대로 남아 보관 DB를 attach하지 않고도 날짜 목록을 만든다.
+
+원장을 고칠 때마다 data_generation의 세대 번호도 같은 트랜잭션에서 올린다.
+분석 결과 캐시(analyzer/cache.py)는 이 번호를 키에 넣어, 어느 프로세스가 수집을 커밋하든
+모든 웹 워커의 캐시가 다음 조회부터 새 데이터로 계산하게 한다.
+"""
+
+import logging
+import sqlite3
+
+from config import HOLDINGS_STORAGE
+from crawler.events import reconstruct_snapshot
+from crawler.retention import ARCHIVE_SCHEMA, archived_through, attach_holdings_archive
+
+logger = logging.getLogger(__name__)
+
+
+def create_ledger_schema(conn: sqlite3.Connection):
+    """
+    수집일 원장 테이블을 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS collect_ledger (
+            collect_date DATE PRIMARY KEY,
+            etf_count INTEGER NOT NULL,
+            saved_etf_count INTEGER NOT NULL,
+            stock_count INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS data_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        );
+
+        INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, 0);
+    """)
+
+
+def bump_generation(conn: sqlite3.Connection):
+    """분석 결과가 바뀌는 쓰기와 같은 트랜잭션에서 데이터 세대 번호를 올린다."""
+    conn.execute("UPDATE data_generation SET generation = generation + 1 WHERE id = 1")
+
+
+def data_generation(conn: sqlite3.Connection) -> int:
+    """
+    현재 데이터 세대 번호를 반환한다.
+
+    Returns:
+        세대 번호. 테이블이 없으면 None
+    """
+    try:
+        row = conn.execute("SELECT generation FROM data_generation WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def _summarize_events(conn: sqlite3.Connection, dates: list) -> list:
+    """이벤트 저장 방식: 기준일마다 ETF 스냅샷을 복원해 요약한다."""
+    rows = []
+    for collect_date in dates:
+        asof = conn.execute(
+            "SELECT etf_code, snapshot_date FROM etf_snapshot_asof WHERE as_of_date = ?",
+            (collect_date,),
+        ).fetchall()
+        if not asof:
+            continue
+        etfs, stocks, row_count = set(), set(), 0
+        for etf_code, _ in asof:
+            holdings = reconstruct_snapshot(conn, etf_code, collect_date)
+            if holdings:
+                etfs.add(etf_code)
+            stocks.update(h["stock_id"] for h in holdings)
+            row_count += len(holdings)
+        saved = sum(1 for _, snapshot_date in asof if snapshot_date == collect_date)
+        rows.append((collect_date, len(etfs), saved, len(stocks), row_count))
+    return rows
+
+
+def _summary_sql(prefix: str, where: str) -> str:
+    """스냅샷 저장 방식: 기준일 인덱스와 구성종목을 조인해 날짜별로 요약하는 INSERT 문."""
+    return (
+        f"INSERT OR REPLACE INTO collect_ledger "
+        f"(collect_date, etf_count, saved_etf_count, stock_count, row_count) "
+        f"SELECT a.as_of_date, COUNT(DISTINCT a.etf_code), "
+        f"  COUNT(DISTINCT CASE WHEN a.snapshot_date = a.as_of_date THEN a.etf_code END), "
+        f"  COUNT(DISTINCT h.stock_id), COUNT(*) "
+        f"FROM {prefix}etf_snapshot_asof a "
+        f"JOIN {prefix}etf_holdings h "
+        f"  ON h.etf_code = a.etf_code AND h.collect_date = a.snapshot_date "
+        f"WHERE {where} GROUP BY a.as_of_date"
+    )
+
+
+def refresh_ledger(conn: sqlite3.Connection, dates) -> int:
+    """
+    기준일 인덱스가 바뀐 날짜들의 원장 행을 다시 계산한다.
+    더 이상 수집일이 아닌 날짜는 삭제하고, 보관 DB로 옮긴 날짜는 건드리지 않는다.
+    구성종목 쓰기와 같은 트랜잭션에서 refresh_asof() 뒤에 호출한다.
+
+    Args:
+        conn: DB 연결
+        dates: 다시 계산할 날짜들
+
+    Returns:
+        기록한 원장 행 수
+    """
+    through = archived_through(conn) or ""
+    dates = sorted(d for d in set(dates) if d > through)
+    if not dates:
+        return 0
+
+    bump_generation(conn)
+    conn.executemany(
+        "DELETE FROM collect_ledger WHERE collect_date = ?", [(d,) for d in dates]
+    )
+    if HOLDINGS_STORAGE == "events":
+        rows = _summarize_events(conn, dates)
+        conn.executemany(
+            "INSERT INTO collect_ledger "
+            "(collect_date, etf_count, saved_etf_count, stock_count, row_count) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        return len(rows)
+
+    return sum(
+        conn.execute(_summary_sql("", "a.as_of_date = ?"), (d,)).rowcount for d in dates
+    )
+
+
+def rebuild_ledger(
+    conn: sqlite3.Connection, date_from: str = None, with_archive: bool = False
+) -> int:
+    """
+    date_from 이후(없으면 전체) 원장을 기준일 인덱스에서 다시 만든다 (일괄 적재/백필용).
+
+    Args:
+        conn: DB 연결
+        date_from: 시작 날짜 (포함)
+        with_archive: 보관 DB로 옮긴 날짜도 보관 DB에서 다시 계산할지 여부
+            (보관 DB를 attach하므로 트랜잭션 밖에서 호출)
+
+    Returns:
+        기록한 원장 행 수
+    """
+    date_from = date_from or ""
+    through = archived_through(conn) or ""
+    bump_generation(conn)
+
+    if HOLDINGS_STORAGE == "events":
+        dates = [
+            r[0]
+            for r in conn.execute(
+                "SELECT DISTINCT as_of_date FROM etf_snapshot_asof WHERE as_of_date >= ?",
+                (date_from,),
+            )
+        ]
+        conn.execute("DELETE FROM collect_ledger WHERE collect_date >= ?", (date_from,))
+        return refresh_ledger(conn, dates)
+
+    written = 0
+    if (
+        with_archive
+        and through
+        and date_from <= through
+        and attach_holdings_archive(conn, readonly=False)
+    ):
+        conn.execute(
+            "DELETE FROM collect_ledger WHERE collect_date >= ? AND collect_date <= ?",
+            (date_from, through),
+        )
+        written += conn.execute(
+            _summary_sql(f"{ARCHIVE_SCHEMA}.", "a.as_of_date >= ?"), (date_from,)
+        ).rowcount
+
+    hot_from = max(date_from, through)
+    conn.execute(
+        "DELETE FROM collect_ledger WHERE collect_date >= ? AND collect_date > ?",
+        (hot_from, through),
+    )
+    written += conn.execute(
+        _summary_sql("", "a.as_of_date >= ? AND a.as_of_date > ?"), (hot_from, through)
+    ).rowcount
+    return written
@@ -3,60 +3,245 @@
 각 ETF의 구성종목(종목명, 주식수, 비중)을 수집하여 SQLite에 날짜별로 저장한다.
 """
 
+import hashlib
 import logging
 import random
 import re
 import sqlite3
+import threading
 import time
 from datetime import date
 
+import lxml.html
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
-from config import CRAWL_HEADERS, CRAWL_SLEEP, DB_PATH, ETF_LIST
+from config import (
+    ARCHIVE_DB_PATH,
+    ARCHIVE_ENABLED,
+    COLUMNAR_ENABLED,
+    CRAWL_CONCURRENCY,
+    CRAWL_HEADERS,
+    CRAWL_MODE,
+    CRAWL_RETRY_BASE,
+    CRAWL_RETRY_MAX,
+    CRAWL_SLEEP,
+    DB_PATH,
+    ETF_LIST,
+    HOLDINGS_STORAGE,
+    INGEST_BATCH_SIZE,
+    NAVER_ITEM_URL,
+    PARSER_BACKEND,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+)
+from crawler.asof import asof_dirty_dates, create_asof_schema, rebuild_asof, refresh_asof
+from crawler.deltas import (
+    create_delta_schema,
+    rebuild_cumulative,
+    rebuild_deltas,
+    refresh_deltas,
+)
+from crawler.events import (
+    create_event_schema,
+    record_events,
+    reconstruct_snapshot,
+    replace_range,
+)
+from crawler.ledger import create_ledger_schema, rebuild_ledger, refresh_ledger
+from crawler.sectors import create_sector_schema, refresh_sector_flow, sector_flow_stale
+from crawler.retention import create_retention_schema
+from crawler.runs import (
+    RETRY_STATUSES,
+    create_run_schema,
+    finish_run,
+    prepare_run,
+    record_etf_status,
+)
+from crawler.stocks import (
+    create_stock_schema,
+    detach_legacy_tables,
+    migrate_legacy_tables,
+    with_stock_ids,
+)
 
 logger = logging.getLogger(__name__)
 
+# 크롤러 전용 HTTP 세션 (연결 풀 재사용)
+_session = None
+_session_lock = threading.Lock()
+
+# etf_asset 섹션 시작/다음 섹션 시작 위치 탐색용
+_ASSET_SECTION_RE = re.compile(r'<div[^>]*class="section etf_asset"')
+_NEXT_SECTION_RE = re.compile(r'<div[^>]*class="section ')
+_STOCK_LINK_RE = re.compile(r"/item/main\.naver\?code=(\w+)")
+
+# holdings_fingerprint() 형식 버전. 바뀌면 init_db()가 저장된 지문을 모두 다시 계산한다
+# (2: 종목명 대신 종목코드 기준)
+FINGERPRINT_VERSION = 2
+
 
 def get_db_connection() -> sqlite3.Connection:
-    """SQLite DB 연결을 반환한다."""
+    """
+    SQLite DB 연결을 반환한다.
+    수집 실행은 이 연결 하나를 끝까지 재사용하므로 PRAGMA도 실행당 한 번만 적용된다.
+    """
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
+    # 새 DB에만 적용된다 (기존 DB는 python -m crawler.retention compact --vacuum-full로 변환)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    if ARCHIVE_ENABLED:
+        # 페이지 아카이브는 별도 DB 파일을 attach하여 같은 writer 연결로 기록한다
+        conn.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DB_PATH,))
+        conn.execute(f"PRAGMA archive.journal_mode={SQLITE_JOURNAL_MODE}")
     return conn
 
 
+def create_schema(conn: sqlite3.Connection):
+    """
+    DB 테이블 및 인덱스를 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    create_stock_schema(conn)
+    legacy_tables = detach_legacy_tables(conn)
+
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS etf_master (
+            etf_code TEXT PRIMARY KEY,
+            etf_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS etf_holdings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            etf_code TEXT NOT NULL,
+            collect_date DATE NOT NULL,
+            stock_id INTEGER NOT NULL REFERENCES stock_master(stock_id),
+            stock_count INTEGER,
+            weight REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(etf_code, collect_date, stock_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_holdings_date
+            ON etf_holdings(collect_date);
+        CREATE INDEX IF NOT EXISTS idx_holdings_etf_date
+            ON etf_holdings(etf_code, collect_date);
+        CREATE INDEX IF NOT EXISTS idx_holdings_stock
+            ON etf_holdings(stock_id, collect_date);
+
+        CREATE TABLE IF NOT EXISTS etf_fingerprint (
+            etf_code TEXT PRIMARY KEY,
+            collect_date DATE NOT NULL,
+            fingerprint TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS etf_fingerprint_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS columnar_dirty (
+            collect_date DATE PRIMARY KEY
+        );
+
+        CREATE TABLE IF NOT EXISTS columnar_etf (
+            etf_idx INTEGER PRIMARY KEY,
+            etf_code TEXT NOT NULL UNIQUE
+        );
+
+        CREATE TABLE IF NOT EXISTS etf_fetch_cache (
+            etf_code TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            content_length INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    create_event_schema(conn)
+    create_run_schema(conn)
+    create_asof_schema(conn)
+    create_delta_schema(conn)
+    create_retention_schema(conn)
+    create_ledger_schema(conn)
+    create_sector_schema(conn)
+
+    # 종목명(TEXT) 기반 기존 테이블 → stock_id 기반으로 이전
+    migrate_legacy_tables(conn, legacy_tables)
+    conn.commit()
+
+
 def init_db():
     """DB 테이블 및 인덱스를 초기화한다."""
     conn = get_db_connection()
     try:
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS etf_master (
-                etf_code TEXT PRIMARY KEY,
-                etf_name TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS etf_holdings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                etf_code TEXT NOT NULL,
-                collect_date DATE NOT NULL,
-                stock_name TEXT NOT NULL,
-                stock_count INTEGER,
-                weight REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(etf_code, collect_date, stock_name)
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_holdings_date
-                ON etf_holdings(collect_date);
-            CREATE INDEX IF NOT EXISTS idx_holdings_etf_date
-                ON etf_holdings(etf_code, collect_date);
-            CREATE INDEX IF NOT EXISTS idx_holdings_stock
-                ON etf_holdings(stock_name, collect_date);
-        """)
+        create_schema(conn)
         conn.commit()
         logger.info("DB 테이블 및 인덱스 초기화 완료")
+
+        if ARCHIVE_ENABLED:
+            from crawler.archive import init_archive
+
+            init_archive(conn)
+
+        backfilled = backfill_fingerprints(conn)
+        conn.commit()
+        if backfilled:
+            logger.info("구성종목 지문 백필 완료: %d개 ETF", backfilled)
+
+        # 지문 형식이 바뀌었으면 저장된 지문을 새 형식으로 다시 계산한다
+        if fingerprint_version(conn) != FINGERPRINT_VERSION:
+            recomputed = backfill_fingerprints(conn, [
+                r["etf_code"] for r in conn.execute("SELECT etf_code FROM etf_fingerprint")
+            ])
+            conn.execute(
+                "INSERT OR REPLACE INTO etf_fingerprint_version (id, version) VALUES (1, ?)",
+                (FINGERPRINT_VERSION,),
+            )
+            conn.commit()
+            if recomputed:
+                logger.info(
+                    "구성종목 지문 형식 v%d 재계산 완료: %d개 ETF", FINGERPRINT_VERSION, recomputed
+                )
+
+        if not conn.execute("SELECT 1 FROM etf_snapshot_asof LIMIT 1").fetchone():
+            indexed = rebuild_asof(conn)
+            conn.commit()
+            if indexed:
+                logger.info("기준일 스냅샷 인덱스 백필 완료: %d행", indexed)
+                flush_columnar(conn)
+
+        if not conn.execute("SELECT 1 FROM etf_holdings_delta LIMIT 1").fetchone():
+            deltas = rebuild_deltas(conn)
+            conn.commit()
+            if deltas:
+                logger.info("구성종목 변화량 백필 완료: %d행", deltas)
+
+        if not conn.execute("SELECT 1 FROM etf_holdings_cumulative LIMIT 1").fetchone():
+            cumulative = rebuild_cumulative(conn, with_archive=True)
+            conn.commit()
+            if cumulative:
+                logger.info("누적 변화량 백필 완료: %d행", cumulative)
+
+        if not conn.execute("SELECT 1 FROM collect_ledger LIMIT 1").fetchone():
+            ledger = rebuild_ledger(conn, with_archive=True)
+            conn.commit()
+            if ledger:
+                logger.info("수집일 원장 백필 완료: %d일", ledger)
+
+        # 섹터 분류 등 집계 설정이 마지막 집계 때와 다르면 다시 집계한다
+        if sector_flow_stale(conn):
+            refresh_sector_flow(conn)
+            conn.commit()
+            logger.info("섹터 수급 집계 갱신 완료")
     finally:
         conn.close()
 
@@ -76,39 +261,261 @@ def seed_etf_master():
         conn.close()
 
 
-def fetch_holdings(etf_code: str) -> list:
+def get_session() -> requests.Session:
     """
-    네이버 증권에서 ETF 구성종목 데이터를 크롤링한다.
-    main.naver 페이지의 etf_asset 섹션에서 구성종목을 파싱한다.
+    크롤러가 공유하는 HTTP 세션을 반환한다.
+    ETF마다 TCP/TLS 연결을 새로 맺지 않도록 연결 풀을 재사용한다.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(CRAWL_HEADERS)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(CRAWL_CONCURRENCY, 1))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def load_fetch_cache(conn: sqlite3.Connection) -> dict:
+    """
+    ETF별 조건부 요청 정보(ETag, Last-Modified, 섹션 해시)를 조회한다.
+
+    Returns:
+        {etf_code: {"etag", "last_modified", "content_hash", "content_length"}}
+    """
+    rows = conn.execute(
+        "SELECT etf_code, etag, last_modified, content_hash, content_length "
+        "FROM etf_fetch_cache"
+    ).fetchall()
+    return {r["etf_code"]: dict(r) for r in rows}
+
+
+def save_fetch_cache(etf_code: str, fetched: dict, conn: sqlite3.Connection):
+    """
+    조건부 요청 정보를 갱신한다. 저장(또는 변경 없음 확인)이 끝난 뒤에만 호출한다.
 
     Args:
         etf_code: ETF 종목코드
+        fetched: fetch_holdings_result() 결과
+        conn: DB 연결
+    """
+    conn.execute(
+        "INSERT OR REPLACE INTO etf_fetch_cache "
+        "(etf_code, etag, last_modified, content_hash, content_length, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+        (
+            etf_code,
+            fetched["etag"],
+            fetched["last_modified"],
+            fetched["content_hash"],
+            fetched["content_length"],
+        ),
+    )
+
+
+def _extract_asset_section(html: str) -> str:
+    """
+    HTML에서 etf_asset 섹션 부분 문자열을 잘라낸다.
+    시세 등 자주 바뀌는 다른 영역을 제외하고 구성종목 영역만 해시하기 위해 사용한다.
 
     Returns:
-        구성종목 리스트 [{"stock_name": str, "stock_count": int, "weight": float}, ...]
+        섹션 문자열. 섹션이 없으면 None
     """
-    url = f"https://finance.naver.com/item/main.naver?code={etf_code}"
+    start = _ASSET_SECTION_RE.search(html)
+    if not start:
+        return None
+    end = _NEXT_SECTION_RE.search(html, start.end())
+    return html[start.start():end.start() if end else len(html)]
+
+
+def fetch_holdings_result(etf_code: str, cache: dict = None) -> dict:
+    """
+    조건부 요청으로 ETF 페이지를 받아 구성종목을 파싱한다.
+
+    - 서버가 304 Not Modified를 주면 본문 없이 변경 없음으로 처리
+    - etf_asset 섹션 해시가 직전과 같으면 파싱과 변경 비교를 생략
+
+    Args:
+        etf_code: ETF 종목코드
+        cache: load_fetch_cache()의 해당 ETF 항목 (없으면 None)
+
+    Returns:
+        {"status": "ok" | "not_modified" | "same_content" | "error",
+         "holdings": list, "etag", "last_modified", "content_hash",
+         "content_length": int, "bytes_saved": int, "parse_skipped": bool}
+    """
+    cache = cache or {}
+    url = NAVER_ITEM_URL.format(code=etf_code)
+    result = {
+        "status": "error",
+        "holdings": [],
+        "etag": cache.get("etag"),
+        "last_modified": cache.get("last_modified"),
+        "content_hash": cache.get("content_hash"),
+        "content_length": cache.get("content_length") or 0,
+        "bytes_saved": 0,
+        "parse_skipped": False,
+    }
+
+    headers = {}
+    if cache.get("content_hash"):
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
 
     try:
-        resp = requests.get(url, headers=CRAWL_HEADERS, timeout=15)
+        resp = get_session().get(url, headers=headers, timeout=15)
+        if resp.status_code == 304:
+            result["status"] = "not_modified"
+            result["bytes_saved"] = result["content_length"]
+            result["parse_skipped"] = True
+            return result
         resp.raise_for_status()
     except requests.RequestException as e:
         logger.error("크롤링 요청 실패 [%s]: %s", etf_code, e)
-        return []
+        return result
 
-    # 인코딩 처리: Content-Type은 euc-kr이지만 실제는 utf-8인 경우가 있음
-    # meta charset을 우선 확인하고, utf-8 시도 후 실패하면 euc-kr로 fallback
+    result["etag"] = resp.headers.get("ETag")
+    result["last_modified"] = resp.headers.get("Last-Modified")
+    result["content_length"] = len(resp.content)
+    if ARCHIVE_ENABLED:
+        result["body"] = resp.content
+
+    html = decode_page(resp.content)
+    section = _extract_asset_section(html)
+    if section is not None:
+        content_hash = hashlib.sha256(section.encode("utf-8")).hexdigest()
+        if content_hash == cache.get("content_hash"):
+            result["status"] = "same_content"
+            result["parse_skipped"] = True
+            return result
+        result["content_hash"] = content_hash
+    else:
+        result["content_hash"] = None
+
+    result["status"] = "ok"
+    result["holdings"] = parse_holdings(html, etf_code, section=section)
+    return result
+
+
+def decode_page(content: bytes) -> str:
+    """
+    응답 본문을 문자열로 디코딩한다.
+
+    인코딩 처리: Content-Type은 euc-kr이지만 실제는 utf-8인 경우가 있음
+    meta charset을 우선 확인하고, utf-8 시도 후 실패하면 euc-kr로 fallback
+    """
     try:
-        html = resp.content.decode("utf-8")
+        return content.decode("utf-8")
     except UnicodeDecodeError:
-        html = resp.content.decode("euc-kr", errors="replace")
+        return content.decode("euc-kr", errors="replace")
 
-    return _parse_holdings_html(html, etf_code)
+
+def fetch_holdings(etf_code: str) -> list:
+    """
+    네이버 증권에서 ETF 구성종목 데이터를 크롤링한다.
+    main.naver 페이지의 etf_asset 섹션에서 구성종목을 파싱한다.
+
+    Args:
+        etf_code: ETF 종목코드
+
+    Returns:
+        구성종목 리스트
+        [{"stock_code": str, "stock_name": str, "stock_count": int, "weight": float}, ...]
+    """
+    return fetch_holdings_result(etf_code)["holdings"]
+
+
+def parse_holdings(html: str, etf_code: str, section: str = None) -> list:
+    """
+    config.PARSER_BACKEND에 따라 구성종목 파서를 선택한다.
+
+    Args:
+        html: 페이지 HTML 문자열
+        etf_code: ETF 종목코드 (로깅용)
+        section: 이미 잘라낸 etf_asset 섹션 문자열 (lxml 백엔드에서 재사용)
+
+    Returns:
+        구성종목 리스트
+    """
+    if PARSER_BACKEND == "bs4":
+        return _parse_holdings_html(html, etf_code)
+    if section is None:
+        section = _extract_asset_section(html)
+    return _parse_holdings_section(section, etf_code)
+
+
+def _parse_holdings_section(section: str, etf_code: str) -> list:
+    """
+    etf_asset 섹션 문자열만 lxml로 파싱한다.
+    전체 문서 트리를 만들지 않는 빠른 경로이며, 결과는 _parse_holdings_html과 동일하다.
+
+    Args:
+        section: _extract_asset_section()으로 잘라낸 섹션 문자열
+        etf_code: ETF 종목코드 (로깅용)
+
+    Returns:
+        구성종목 리스트
+    """
+    if not section:
+        logger.warning("etf_asset 섹션 없음 [%s]", etf_code)
+        return []
+
+    holdings = []
+    root = lxml.html.fragment_fromstring(section, create_parent="div")
+
+    for row in root.iter("tr"):
+        # 종목 링크가 있는 행만 처리
+        link = next(
+            (m for m in (_STOCK_LINK_RE.search(a.get("href", "")) for a in row.iter("a")) if m),
+            None,
+        )
+        if not link:
+            continue
+
+        tds = list(row.iter("td"))
+        if len(tds) < 3:
+            continue
+
+        try:
+            stock_name = _cell_text(tds[0])
+            if not stock_name:
+                continue
+
+            count_text = _cell_text(tds[1]).replace(",", "")
+            stock_count = int(count_text) if count_text else None
+
+            weight_text = _cell_text(tds[2]).replace("%", "")
+            weight = float(weight_text) if weight_text else None
+
+            if stock_count is None or weight is None:
+                continue
+
+            holdings.append({
+                "stock_code": link.group(1),
+                "stock_name": stock_name,
+                "stock_count": stock_count,
+                "weight": weight,
+            })
+        except (ValueError, IndexError) as e:
+            logger.warning("파싱 오류 [%s] row: %s - %s", etf_code, row.text_content(), e)
+            continue
+
+    return holdings
+
+
+def _cell_text(td) -> str:
+    """BeautifulSoup get_text(strip=True)와 같은 규칙으로 셀 텍스트를 만든다."""
+    return "".join(t.strip() for t in td.itertext())
 
 
 def _parse_holdings_html(html: str, etf_code: str) -> list:
     """
     ETF 구성종목 HTML의 etf_asset 섹션을 파싱한다.
+    전체 문서를 BeautifulSoup 트리로 만드는 기준(reference) 구현이다.
 
     Args:
         html: HTML 문자열
@@ -130,7 +537,7 @@ def _parse_holdings_html(html: str, etf_code: str) -> list:
 
     for row in rows:
         # 종목 링크가 있는 행만 처리
-        link = row.find("a", href=re.compile(r"/item/main\.naver\?code="))
+        link = row.find("a", href=_STOCK_LINK_RE)
         if not link:
             continue
 
@@ -153,6 +560,7 @@ def _parse_holdings_html(html: str, etf_code: str) -> list:
                 continue
 
             holdings.append({
+                "stock_code": _STOCK_LINK_RE.search(link["href"]).group(1),
                 "stock_name": stock_name,
                 "stock_count": stock_count,
                 "weight": weight,
@@ -164,9 +572,147 @@ def _parse_holdings_html(html: str, etf_code: str) -> list:
     return holdings
 
 
+def holdings_fingerprint(holdings: list) -> str:
+    """
+    구성종목의 정규화된 지문(SHA-256)을 계산한다.
+    (종목코드, 주식수, 비중)을 종목코드 순으로 정렬해 해시하므로 행 순서와 무관하다.
+    종목코드가 없는 행만 종목명으로 구분한다 (이름이 같은 다른 종목이 한 항목으로 합쳐지지 않도록).
+    같은 종목이 여러 번 나오면 DB 저장 결과와 같게 마지막 값을 사용한다.
+    형식을 바꾸면 FINGERPRINT_VERSION을 올린다.
+
+    Args:
+        holdings: 구성종목 리스트
+
+    Returns:
+        16진수 해시 문자열
+    """
+    latest = {}
+    for h in holdings:
+        key = f"code\x1e{h['stock_code']}" if h.get("stock_code") else f"name\x1e{h['stock_name']}"
+        latest[key] = (h["stock_count"], h["weight"])
+    digest = hashlib.sha256()
+    for key in sorted(latest):
+        count, weight = latest[key]
+        digest.update(
+            f"{key}\x1f{'' if count is None else int(count)}\x1f"
+            f"{'' if weight is None else repr(float(weight))}\n".encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+def fingerprint_version(conn: sqlite3.Connection) -> int:
+    """저장된 지문의 형식 버전 (기록이 없으면 종목명 기준이던 1)."""
+    row = conn.execute("SELECT version FROM etf_fingerprint_version WHERE id = 1").fetchone()
+    return row[0] if row else 1
+
+
+def update_fingerprint(
+    etf_code: str, holdings: list, collect_date: str, conn: sqlite3.Connection
+):
+    """
+    ETF의 최신 구성종목 지문을 갱신한다. 기존 지문보다 오래된 날짜면 무시한다.
+
+    Args:
+        etf_code: ETF 종목코드
+        holdings: 저장한 구성종목 리스트
+        collect_date: 수집 날짜
+        conn: DB 연결
+    """
+    conn.execute(
+        "INSERT INTO etf_fingerprint (etf_code, collect_date, fingerprint, row_count) "
+        "VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(etf_code) DO UPDATE SET "
+        "collect_date = excluded.collect_date, fingerprint = excluded.fingerprint, "
+        "row_count = excluded.row_count, updated_at = CURRENT_TIMESTAMP "
+        "WHERE excluded.collect_date >= etf_fingerprint.collect_date",
+        (etf_code, collect_date, holdings_fingerprint(holdings), len(holdings)),
+    )
+
+
+def load_etf_snapshot(
+    conn: sqlite3.Connection, etf_code: str, as_of_date: str = None, before: bool = False
+) -> tuple:
+    """
+    저장 방식(HOLDINGS_STORAGE)과 무관하게 ETF의 특정 시점 스냅샷을 조회한다.
+
+    Args:
+        conn: DB 연결
+        etf_code: ETF 종목코드
+        as_of_date: 기준 날짜. None이면 최신
+        before: True면 as_of_date 당일은 제외 (직전 스냅샷)
+
+    Returns:
+        (스냅샷 날짜, 구성종목 리스트). 없으면 (None, [])
+    """
+    if HOLDINGS_STORAGE == "events":
+        table, date_col = "etf_holdings_event", "event_date"
+    else:
+        table, date_col = "etf_holdings", "collect_date"
+
+    sql = f"SELECT MAX({date_col}) FROM {table} WHERE etf_code = ?"
+    params = [etf_code]
+    if as_of_date:
+        sql += f" AND {date_col} {'<' if before else '<='} ?"
+        params.append(as_of_date)
+    snapshot_date = conn.execute(sql, params).fetchone()[0]
+
+    if not snapshot_date:
+        return None, []
+
+    if HOLDINGS_STORAGE == "events":
+        return snapshot_date, reconstruct_snapshot(conn, etf_code, snapshot_date)
+
+    rows = conn.execute(
+        "SELECT h.stock_id, s.stock_code, s.stock_name, h.stock_count, h.weight "
+        "FROM etf_holdings h JOIN stock_master s ON s.stock_id = h.stock_id "
+        "WHERE h.etf_code = ? AND h.collect_date = ?",
+        (etf_code, snapshot_date),
+    ).fetchall()
+    return snapshot_date, [dict(r) for r in rows]
+
+
+def backfill_fingerprints(conn: sqlite3.Connection, etf_codes: list = None) -> int:
+    """
+    ETF별 최신 스냅샷에서 지문을 다시 계산해 저장한다.
+    etf_codes가 없으면 지문이 없는 ETF만 대상으로 한다 (마이그레이션).
+
+    Args:
+        conn: DB 연결
+        etf_codes: 다시 계산할 ETF 코드 리스트
+
+    Returns:
+        갱신한 ETF 수
+    """
+    if etf_codes is None:
+        table = "etf_holdings_event" if HOLDINGS_STORAGE == "events" else "etf_holdings"
+        etf_codes = [
+            r["etf_code"]
+            for r in conn.execute(
+                f"SELECT DISTINCT h.etf_code FROM {table} h "
+                "LEFT JOIN etf_fingerprint f ON h.etf_code = f.etf_code "
+                "WHERE f.etf_code IS NULL"
+            ).fetchall()
+        ]
+
+    for etf_code in etf_codes:
+        latest_date, holdings = load_etf_snapshot(conn, etf_code)
+        if not latest_date:
+            conn.execute("DELETE FROM etf_fingerprint WHERE etf_code = ?", (etf_code,))
+            continue
+
+        conn.execute(
+            "INSERT OR REPLACE INTO etf_fingerprint "
+            "(etf_code, collect_date, fingerprint, row_count) VALUES (?, ?, ?, ?)",
+            (etf_code, latest_date, holdings_fingerprint(holdings), len(holdings)),
+        )
+
+    return len(etf_codes)
+
+
 def is_data_changed(etf_code: str, new_holdings: list, conn: sqlite3.Connection) -> bool:
     """
     직전 수집일 데이터와 비교하여 변경 여부를 확인한다.
+    etf_fingerprint 테이블의 지문 1건 조회 + 새 데이터 해시 계산으로 비교한다.
 
     Args:
         etf_code: ETF 종목코드
@@ -179,37 +725,82 @@ def is_data_changed(etf_code: str, new_holdings: list, conn: sqlite3.Connection)
     if not new_holdings:
         return False
 
-    # 직전 수집일의 데이터 조회
     row = conn.execute(
-        "SELECT MAX(collect_date) as latest_date FROM etf_holdings WHERE etf_code = ?",
-        (etf_code,),
+        "SELECT fingerprint FROM etf_fingerprint WHERE etf_code = ?", (etf_code,)
     ).fetchone()
 
-    if not row or not row["latest_date"]:
-        return True  # 이전 데이터 없음 → 저장 필요
+    if row is None:
+        # 지문이 아직 없으면 기존 스냅샷에서 계산해 둔다
+        backfill_fingerprints(conn, [etf_code])
+        row = conn.execute(
+            "SELECT fingerprint FROM etf_fingerprint WHERE etf_code = ?", (etf_code,)
+        ).fetchone()
+        if row is None:
+            return True  # 이전 데이터 없음 → 저장 필요
 
-    latest_date = row["latest_date"]
-    prev_holdings = conn.execute(
-        "SELECT stock_name, stock_count, weight FROM etf_holdings "
-        "WHERE etf_code = ? AND collect_date = ? ORDER BY stock_name",
-        (etf_code, latest_date),
-    ).fetchall()
+    return row["fingerprint"] != holdings_fingerprint(new_holdings)
+
+
+def _insert_snapshot(
+    etf_code: str, holdings: list, collect_date: str, conn: sqlite3.Connection
+):
+    """etf_holdings에 (etf_code, collect_date) 스냅샷을 통째로 교체해 넣는다. stock_id가 필요하다."""
+    conn.execute(
+        "DELETE FROM etf_holdings WHERE etf_code = ? AND collect_date = ?",
+        (etf_code, collect_date),
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO etf_holdings "
+        "(etf_code, collect_date, stock_id, stock_count, weight) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (etf_code, collect_date, h["stock_id"], h["stock_count"], h["weight"])
+            for h in holdings
+        ],
+    )
+
+
+def _mark_columnar_dirty(
+    conn: sqlite3.Connection, etf_code: str, date_from: str, date_to: str = None
+) -> set:
+    """
+    ETF 이력이 바뀌어 전체 포트폴리오가 달라지는 기준일을 columnar_dirty에 기록한다
+    (쓰기 전후로 호출). 바뀐 스냅샷을 참조하는 이후 기준일도 함께 기록된다.
+    이벤트 저장 방식은 이후 이력도 다시 쓰일 수 있으므로 date_to를 무시한다.
+
+    Returns:
+        기록한 기준일 집합 (수집일 원장 갱신 대상)
+    """
+    if HOLDINGS_STORAGE == "events":
+        date_to = None
+    dates = {date_from} | asof_dirty_dates(conn, etf_code, date_from, date_to)
+    conn.executemany(
+        "INSERT OR IGNORE INTO columnar_dirty (collect_date) VALUES (?)", [(d,) for d in dates]
+    )
+    return dates
 
-    if len(prev_holdings) != len(new_holdings):
-        return True
 
-    # 새 데이터를 종목명 기준으로 정렬하여 비교
-    prev_set = {(r["stock_name"], r["stock_count"], r["weight"]) for r in prev_holdings}
-    new_set = {(h["stock_name"], h["stock_count"], h["weight"]) for h in new_holdings}
+def flush_columnar(conn: sqlite3.Connection):
+    """커밋된 변경을 컬럼형 스냅샷 파일에 반영한다 (COLUMNAR_ENABLED일 때)."""
+    if not COLUMNAR_ENABLED:
+        return
+    from analyzer.signal import refresh_columnar
 
-    return prev_set != new_set
+    try:
+        refresh_columnar(conn)
+    except Exception as e:
+        # 파일 갱신에 실패해도 dirty 날짜는 SQLite 조회로 대체되므로 수집 결과는 유지된다
+        logger.error("컬럼형 스냅샷 갱신 실패: %s", e)
 
 
 def save_holdings(
     etf_code: str, holdings: list, collect_date: str, conn: sqlite3.Connection
 ):
     """
-    구성종목 데이터를 날짜별로 저장한다.
+    구성종목 데이터를 날짜별로 저장하고 지문, 기준일 인덱스, 변화량, 수집일 원장을 갱신한다.
+    같은 날짜에 다시 저장하면 그 날짜의 스냅샷을 통째로 교체한다.
+    저장 방식은 config.HOLDINGS_STORAGE를 따른다.
+    섹터 수급 집계는 갱신하지 않으므로 호출자가 실행 끝에서 refresh_sector_flow()를 호출해야 한다.
 
     Args:
         etf_code: ETF 종목코드
@@ -217,16 +808,150 @@ def save_holdings(
         collect_date: 수집 날짜 (YYYY-MM-DD)
         conn: DB 연결
     """
-    for h in holdings:
+    holdings = with_stock_ids(conn, holdings)
+    dirty = _mark_columnar_dirty(conn, etf_code, collect_date, collect_date)
+    if HOLDINGS_STORAGE in ("snapshot", "both"):
+        _insert_snapshot(etf_code, holdings, collect_date, conn)
+    if HOLDINGS_STORAGE in ("events", "both"):
+        record_events(etf_code, holdings, collect_date, conn)
+    refresh_asof(conn, etf_code, collect_date)
+    refresh_deltas(conn, etf_code, collect_date, collect_date)
+    dirty |= _mark_columnar_dirty(conn, etf_code, collect_date, collect_date)
+    refresh_ledger(conn, dirty)
+    update_fingerprint(etf_code, holdings, collect_date, conn)
+
+
+def replace_snapshots(
+    etf_code: str, date_from: str, date_to: str, snapshots: list, conn: sqlite3.Connection
+):
+    """
+    기간 내 ETF 이력을 주어진 스냅샷들로 교체한다 (리플레이/일괄 적재용).
+    지문과 섹터 수급 집계는 갱신하지 않으므로 호출자가 backfill_fingerprints()와
+    refresh_sector_flow()를 호출해야 한다.
+
+    Args:
+        etf_code: ETF 종목코드
+        date_from: 시작 날짜 (포함)
+        date_to: 종료 날짜 (포함)
+        snapshots: [(collect_date, 구성종목 리스트), ...] 날짜 오름차순
+        conn: DB 연결
+    """
+    snapshots = [(d, with_stock_ids(conn, holdings)) for d, holdings in snapshots]
+    dirty = _mark_columnar_dirty(conn, etf_code, date_from, date_to)
+    if HOLDINGS_STORAGE in ("snapshot", "both"):
         conn.execute(
-            "INSERT OR REPLACE INTO etf_holdings "
-            "(etf_code, collect_date, stock_name, stock_count, weight) "
-            "VALUES (?, ?, ?, ?, ?)",
-            (etf_code, collect_date, h["stock_name"], h["stock_count"], h["weight"]),
+            "DELETE FROM etf_holdings WHERE etf_code = ? AND collect_date BETWEEN ? AND ?",
+            (etf_code, date_from, date_to),
+        )
+        for collect_date, holdings in snapshots:
+            _insert_snapshot(etf_code, holdings, collect_date, conn)
+    if HOLDINGS_STORAGE in ("events", "both"):
+        replace_range(conn, etf_code, date_from, date_to, snapshots)
+    refresh_asof(conn, etf_code, date_from)
+    refresh_deltas(conn, etf_code, date_from, date_to)
+    dirty |= _mark_columnar_dirty(conn, etf_code, date_from, date_to)
+    refresh_ledger(conn, dirty)
+
+
+def ingest_holdings(
+    etf_name: str, etf_code: str, holdings: list, collect_date: str, conn: sqlite3.Connection
+) -> dict:
+    """
+    크롤링한 구성종목을 변경 여부 확인 후 DB에 저장한다.
+    수집 모드와 무관하게 DB 쓰기는 모두 이 함수를 거친다.
+
+    Args:
+        etf_name: ETF 이름
+        etf_code: ETF 종목코드
+        holdings: 크롤링한 구성종목 리스트
+        collect_date: 수집 날짜
+        conn: DB 연결
+
+    Returns:
+        수집 결과 {"etf_name": str, "etf_code": str, "status": str, "count": int}
+    """
+    result = {"etf_name": etf_name, "etf_code": etf_code, "status": "skip", "count": 0}
+
+    if not holdings:
+        result["status"] = "empty"
+        logger.warning("구성종목 데이터 없음: %s [%s]", etf_name, etf_code)
+        return result
+
+    if is_data_changed(etf_code, holdings, conn):
+        save_holdings(etf_code, holdings, collect_date, conn)
+        result["status"] = "saved"
+        result["count"] = len(holdings)
+        logger.info(
+            "저장 완료: %s [%s] - %d종목", etf_name, etf_code, len(holdings)
         )
+    else:
+        result["status"] = "unchanged"
+        logger.info("변경 없음 (저장 스킵): %s [%s]", etf_name, etf_code)
+
+    return result
+
 
+def ingest_fetch_result(
+    etf_name: str, etf_code: str, fetched: dict, collect_date: str, conn: sqlite3.Connection
+) -> dict:
+    """
+    fetch_holdings_result() 결과를 DB에 반영한다.
+    304 또는 섹션 해시 동일이면 변경 비교 없이 "unchanged"로 처리한다.
+
+    커밋은 호출자가 배치 단위로 수행한다. ETF 하나의 쓰기는 SAVEPOINT로 묶여
+    실패 시 해당 ETF만 되돌리고 같은 트랜잭션의 다른 ETF는 유지된다.
+
+    Args:
+        etf_name: ETF 이름
+        etf_code: ETF 종목코드
+        fetched: fetch_holdings_result() 결과
+        collect_date: 수집 날짜
+        conn: DB 연결
 
-def collect_single_etf(etf_name: str, etf_code: str, collect_date: str) -> dict:
+    Returns:
+        수집 결과 (ingest_holdings 결과 + "bytes_saved", "parse_skipped")
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    conn.execute("SAVEPOINT ingest_etf")
+    try:
+        if fetched["status"] in ("not_modified", "same_content"):
+            result = {
+                "etf_name": etf_name, "etf_code": etf_code, "status": "unchanged", "count": 0,
+            }
+            logger.info("변경 없음 (%s): %s [%s]", fetched["status"], etf_name, etf_code)
+        else:
+            result = ingest_holdings(
+                etf_name, etf_code, fetched["holdings"], collect_date, conn
+            )
+
+        if result["status"] in ("saved", "unchanged"):
+            save_fetch_cache(etf_code, fetched, conn)
+
+        if ARCHIVE_ENABLED and fetched["status"] != "error":
+            from crawler.archive import archive_page
+
+            archive_page(etf_code, collect_date, fetched.get("body"), conn)
+    except Exception:
+        conn.execute("ROLLBACK TO ingest_etf")
+        raise
+    finally:
+        conn.execute("RELEASE ingest_etf")
+
+    result["bytes_saved"] = fetched["bytes_saved"]
+    result["parse_skipped"] = fetched["parse_skipped"]
+    return result
+
+
+def commit_batch(conn: sqlite3.Connection, processed: int):
+    """INGEST_BATCH_SIZE개 ETF를 처리할 때마다 커밋한다. 0이면 실행 끝에서만 커밋한다."""
+    if INGEST_BATCH_SIZE and processed % INGEST_BATCH_SIZE == 0:
+        conn.commit()
+
+
+def collect_single_etf(
+    etf_name: str, etf_code: str, collect_date: str, conn: sqlite3.Connection = None
+) -> dict:
     """
     단일 ETF의 구성종목을 수집하고 DB에 저장한다.
 
@@ -234,6 +959,7 @@ def collect_single_etf(etf_name: str, etf_code: str, collect_date: str) -> dict:
         etf_name: ETF 이름
         etf_code: ETF 종목코드
         collect_date: 수집 날짜
+        conn: 수집 실행이 공유하는 DB 연결. None이면 새로 열고 바로 커밋한다.
 
     Returns:
         수집 결과 {"etf_name": str, "status": str, "count": int}
@@ -241,27 +967,23 @@ def collect_single_etf(etf_name: str, etf_code: str, collect_date: str) -> dict:
     result = {"etf_name": etf_name, "etf_code": etf_code, "status": "skip", "count": 0}
 
     try:
-        holdings = fetch_holdings(etf_code)
-        if not holdings:
-            result["status"] = "empty"
-            logger.warning("구성종목 데이터 없음: %s [%s]", etf_name, etf_code)
-            return result
-
-        conn = get_db_connection()
+        own_conn = conn is None
+        if own_conn:
+            conn = get_db_connection()
         try:
-            if is_data_changed(etf_code, holdings, conn):
-                save_holdings(etf_code, holdings, collect_date, conn)
+            row = conn.execute(
+                "SELECT etf_code, etag, last_modified, content_hash, content_length "
+                "FROM etf_fetch_cache WHERE etf_code = ?",
+                (etf_code,),
+            ).fetchone()
+            fetched = fetch_holdings_result(etf_code, dict(row) if row else None)
+            result = ingest_fetch_result(etf_name, etf_code, fetched, collect_date, conn)
+            if own_conn:
+                refresh_sector_flow(conn)
                 conn.commit()
-                result["status"] = "saved"
-                result["count"] = len(holdings)
-                logger.info(
-                    "저장 완료: %s [%s] - %d종목", etf_name, etf_code, len(holdings)
-                )
-            else:
-                result["status"] = "unchanged"
-                logger.info("변경 없음 (저장 스킵): %s [%s]", etf_name, etf_code)
         finally:
-            conn.close()
+            if own_conn:
+                conn.close()
 
     except Exception as e:
         result["status"] = "error"
@@ -270,33 +992,120 @@ def collect_single_etf(etf_name: str, etf_code: str, collect_date: str) -> dict:
     return result
 
 
-def collect_all_etf_data() -> list:
+def _collect_sequential(etf_items: list, collect_date: str, run_id: int = None) -> list:
+    """
+    ETF 목록을 하나의 DB 연결로 순차 수집한다. 요청 사이에 CRAWL_SLEEP만큼 대기한다.
+
+    Args:
+        etf_items: [(etf_name, etf_code), ...]
+        collect_date: 수집 날짜
+        run_id: 실행 ID. 있으면 ETF별 결과를 실행 기록에 함께 저장
+
+    Returns:
+        각 ETF의 수집 결과 리스트 (etf_items 순서)
+    """
+    results = []
+    conn = get_db_connection()
+    try:
+        for i, (etf_name, etf_code) in enumerate(etf_items):
+            if i > 0:
+                time.sleep(CRAWL_SLEEP + random.uniform(0.0, 0.7))
+
+            result = collect_single_etf(etf_name, etf_code, collect_date, conn)
+            record_etf_status(conn, run_id, result)
+            results.append(result)
+            commit_batch(conn, len(results))
+        conn.commit()
+    finally:
+        conn.close()
+
+    return results
+
+
+def collect_all_etf_data(mode: str = None, resume: bool = False) -> list:
     """
     모든 ETF의 구성종목 데이터를 수집한다.
     크롤링 실패 시 해당 ETF만 스킵하고 나머지를 계속 수집한다.
 
+    실행마다 collect_run / collect_run_etf에 ETF별 상태를 기록하며,
+    empty/error로 끝난 ETF는 같은 실행 안에서 CRAWL_RETRY_BASE * 2^(n-1)초
+    대기 후 최대 CRAWL_RETRY_MAX회 다시 수집한다.
+
+    Args:
+        mode: 수집 모드 ("sequential", "concurrent", "sharded"). None이면 config.CRAWL_MODE
+        resume: True면 같은 날짜의 마지막 실행을 이어서, 실패했거나 누락된 ETF만 수집
+
     Returns:
-        각 ETF의 수집 결과 리스트
+        이번 실행에서 수집한 각 ETF의 수집 결과 리스트
     """
+    mode = mode or CRAWL_MODE
     today = date.today().strftime("%Y-%m-%d")
-    results = []
 
-    logger.info("=== 전체 ETF 데이터 수집 시작 (%s) ===", today)
+    conn = get_db_connection()
+    try:
+        run_id, targets = prepare_run(conn, today, mode, list(ETF_LIST.items()), resume)
+        conn.commit()
+    finally:
+        conn.close()
 
-    for i, (etf_name, etf_code) in enumerate(ETF_LIST.items()):
-        if i > 0:
-            time.sleep(CRAWL_SLEEP + random.uniform(0.0, 0.7))
+    logger.info("=== 전체 ETF 데이터 수집 시작 (%s, %s, run %d) ===", today, mode, run_id)
+
+    if mode == "concurrent":
+        from crawler.engine import collect_concurrent
+
+        collect = collect_concurrent
+    elif mode == "sharded":
+        from crawler.engine import collect_sharded
+
+        collect = collect_sharded
+    else:
+        collect = _collect_sequential
+
+    results = {}
+    pending = targets
+    for attempt in range(CRAWL_RETRY_MAX + 1):
+        if not pending:
+            break
+        if attempt > 0:
+            delay = CRAWL_RETRY_BASE * 2 ** (attempt - 1)
+            logger.info(
+                "재시도 %d/%d: %d개 ETF, %.1f초 후", attempt, CRAWL_RETRY_MAX, len(pending), delay
+            )
+            time.sleep(delay)
 
-        result = collect_single_etf(etf_name, etf_code, today)
-        results.append(result)
+        for result in collect(pending, today, run_id=run_id):
+            results[result["etf_code"]] = result
+        pending = [
+            (etf_name, etf_code)
+            for etf_name, etf_code in pending
+            if results[etf_code]["status"] in RETRY_STATUSES
+        ]
+
+    conn = get_db_connection()
+    try:
+        # 섹터 수급 집계는 ETF마다가 아니라 실행 끝에서 한 번만 다시 계산한다
+        refresh_sector_flow(conn)
+        run_status = finish_run(conn, run_id)
+        conn.commit()
+        flush_columnar(conn)
+    finally:
+        conn.close()
+
+    results = [results[etf_code] for _, etf_code in targets]
 
     saved = sum(1 for r in results if r["status"] == "saved")
     unchanged = sum(1 for r in results if r["status"] == "unchanged")
-    errors = sum(1 for r in results if r["status"] in ("error", "empty"))
+    errors = sum(1 for r in results if r["status"] in RETRY_STATUSES)
+    bytes_saved = sum(r.get("bytes_saved", 0) for r in results)
+    parses_skipped = sum(1 for r in results if r.get("parse_skipped"))
 
     logger.info(
-        "=== 수집 완료: 저장 %d / 변경없음 %d / 오류 %d ===",
-        saved, unchanged, errors,
+        "=== 수집 완료 (%s): 저장 %d / 변경없음 %d / 오류 %d ===",
+        run_status, saved, unchanged, errors,
+    )
+    logger.info(
+        "=== 조건부 요청 절약: 전송 %d bytes / 파싱 %d회 ===",
+        bytes_saved, parses_skipped,
     )
 
     return results
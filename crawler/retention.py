@@ -0,0 +1,283 @@
+"""
+구성종목 보관(retention) 압축.
+HOLDINGS_HOT_DAYS보다 오래된 etf_holdings / etf_snapshot_asof / etf_holdings_delta 행을
+별도 보관 DB(HOLDINGS_ARCHIVE_DB_PATH)로 옮겨 기본 테이블은 최근 구간만 유지한다.
+ETF별로 보관 기준일 직전의 마지막 스냅샷은 기본 테이블에도 남겨, 최근 구간의
+기준일 스냅샷 조회와 변경 비교가 보관 DB 없이 동작하게 한다.
+
+보관 DB로 옮긴 마지막 날짜는 holdings_retention에 기록되며, 분석 모듈은 요청이
+그 날짜 이전에 닿을 때만 보관 DB를 읽기 전용으로 attach해 조회한다.
+날짜 하나씩 짧은 트랜잭션으로 옮기고, 옮길 때마다 증분 VACUUM으로 빈 페이지를 반환한다.
+
+사용법:
+    python -m crawler.retention compact [--hot-days 730] [--vacuum-full]
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+
+from config import (
+    HOLDINGS_ARCHIVE_DB_PATH,
+    HOLDINGS_HOT_DAYS,
+    HOLDINGS_STORAGE,
+    SQLITE_JOURNAL_MODE,
+    VACUUM_PAGES_PER_STEP,
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = "holdings_archive"
+
+
+def create_retention_schema(conn: sqlite3.Connection):
+    """
+    보관 상태 테이블을 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS holdings_retention (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            archived_through DATE NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def archived_through(conn: sqlite3.Connection) -> str:
+    """
+    보관 DB로 옮긴 마지막 날짜를 반환한다. 이 날짜 이하는 보관 DB에서 조회해야 한다.
+
+    Returns:
+        YYYY-MM-DD. 옮긴 데이터가 없으면 None
+    """
+    try:
+        row = conn.execute(
+            "SELECT archived_through FROM holdings_retention WHERE id = 1"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def attach_holdings_archive(conn: sqlite3.Connection, readonly: bool = True) -> bool:
+    """
+    보관 DB를 holdings_archive 스키마로 attach한다. 이미 attach되어 있으면 그대로 둔다.
+
+    Args:
+        conn: DB 연결
+        readonly: True면 읽기 전용 URI로 attach (분석기 읽기 연결용)
+
+    Returns:
+        attach 여부 (읽기 전용인데 보관 DB 파일이 없으면 False)
+    """
+    attached = {r[1] for r in conn.execute("PRAGMA database_list").fetchall()}
+    if ARCHIVE_SCHEMA in attached:
+        return True
+    if readonly:
+        if not os.path.exists(HOLDINGS_ARCHIVE_DB_PATH):
+            return False
+        conn.execute(
+            f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (f"file:{HOLDINGS_ARCHIVE_DB_PATH}?mode=ro",)
+        )
+    else:
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (HOLDINGS_ARCHIVE_DB_PATH,))
+        conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode={SQLITE_JOURNAL_MODE}")
+    return True
+
+
+def _create_archive_tables(conn: sqlite3.Connection):
+    """보관 DB에 기본 테이블과 같은 구조의 테이블을 만든다 (행 ID 없이 키 순으로 저장)."""
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.etf_holdings (
+            etf_code TEXT NOT NULL,
+            collect_date DATE NOT NULL,
+            stock_id INTEGER NOT NULL,
+            stock_count INTEGER,
+            weight REAL,
+            created_at TIMESTAMP,
+            PRIMARY KEY (etf_code, collect_date, stock_id)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_holdings_date
+            ON etf_holdings(collect_date);
+
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.etf_snapshot_asof (
+            as_of_date DATE NOT NULL,
+            etf_code TEXT NOT NULL,
+            snapshot_date DATE NOT NULL,
+            PRIMARY KEY (as_of_date, etf_code)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.etf_holdings_delta (
+            collect_date DATE NOT NULL,
+            etf_code TEXT NOT NULL,
+            stock_id INTEGER NOT NULL,
+            count_change INTEGER NOT NULL,
+            weight_change REAL NOT NULL,
+            entered INTEGER NOT NULL DEFAULT 0,
+            exited INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (collect_date, etf_code, stock_id)
+        ) WITHOUT ROWID;
+    """)
+
+
+def _move_date(conn: sqlite3.Connection, collect_date: str) -> int:
+    """
+    한 날짜의 행을 보관 DB로 옮긴다. ETF별 경계 스냅샷(temp.retention_keep)은
+    보관 DB에 복사만 하고 기본 테이블에 남긴다.
+
+    Returns:
+        기본 테이블에서 삭제한 etf_holdings 행 수
+    """
+    conn.execute(
+        f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.etf_holdings "
+        f"(etf_code, collect_date, stock_id, stock_count, weight, created_at) "
+        f"SELECT etf_code, collect_date, stock_id, stock_count, weight, created_at "
+        f"FROM etf_holdings WHERE collect_date = ?",
+        (collect_date,),
+    )
+    moved = conn.execute(
+        "DELETE FROM etf_holdings WHERE collect_date = ? AND etf_code NOT IN "
+        "(SELECT etf_code FROM temp.retention_keep WHERE snapshot_date = ?)",
+        (collect_date, collect_date),
+    ).rowcount
+
+    for table, date_col in (
+        ("etf_snapshot_asof", "as_of_date"),
+        ("etf_holdings_delta", "collect_date"),
+    ):
+        conn.execute(
+            f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} "
+            f"SELECT * FROM {table} WHERE {date_col} = ?",
+            (collect_date,),
+        )
+        conn.execute(f"DELETE FROM {table} WHERE {date_col} = ?", (collect_date,))
+
+    conn.execute(
+        "INSERT INTO holdings_retention (id, archived_through) VALUES (1, ?) "
+        "ON CONFLICT(id) DO UPDATE SET updated_at = CURRENT_TIMESTAMP, "
+        "archived_through = MAX(archived_through, excluded.archived_through)",
+        (collect_date,),
+    )
+    return moved
+
+
+def compact(hot_days: int = None, vacuum_full: bool = False) -> dict:
+    """
+    보관 기준일 이전 데이터를 보관 DB로 옮긴다.
+
+    처리 흐름:
+    1. 보관 기준일 = 오늘 - hot_days. ETF별 기준일 직전 마지막 스냅샷 날짜를 경계로 기록
+    2. 기준일 이전 날짜마다 BEGIN IMMEDIATE → 보관 DB에 복사 → 기본 테이블에서 삭제
+       (경계 스냅샷 제외) → 보관 상태 갱신 → 커밋 → 증분 VACUUM
+    3. vacuum_full이면 기존 DB를 증분 VACUUM 모드로 바꾸기 위해 마지막에 전체 VACUUM 1회
+
+    Args:
+        hot_days: 기본 테이블에 남길 기간 (일). None이면 config.HOLDINGS_HOT_DAYS
+        vacuum_full: 증분 VACUUM 모드가 아닌 기존 DB를 변환할지 여부 (전체 잠금)
+
+    Returns:
+        {"cutoff", "dates", "rows", "freed_pages", "elapsed"}
+    """
+    if HOLDINGS_STORAGE == "events":
+        raise RuntimeError(
+            "HOLDINGS_STORAGE=events에서는 보관 압축을 지원하지 않습니다 "
+            "(이벤트 저장소는 변경분만 저장하므로 대상이 아닙니다)."
+        )
+    from crawler.naver_etf import get_db_connection
+
+    started = time.perf_counter()
+    hot_days = hot_days or HOLDINGS_HOT_DAYS
+    cutoff = (date.today() - timedelta(days=hot_days)).strftime("%Y-%m-%d")
+    stats = {"cutoff": cutoff, "dates": 0, "rows": 0, "freed_pages": 0}
+
+    conn = get_db_connection()
+    conn.isolation_level = None  # 날짜별 트랜잭션을 직접 관리
+    try:
+        create_retention_schema(conn)
+        attach_holdings_archive(conn, readonly=False)
+        _create_archive_tables(conn)
+
+        dates = [
+            r[0]
+            for r in conn.execute(
+                "SELECT DISTINCT collect_date FROM etf_holdings WHERE collect_date < ? "
+                "ORDER BY collect_date",
+                (cutoff,),
+            ).fetchall()
+        ]
+        conn.execute("DROP TABLE IF EXISTS temp.retention_keep")
+        conn.execute(
+            "CREATE TEMP TABLE retention_keep AS "
+            "SELECT etf_code, MAX(collect_date) AS snapshot_date FROM etf_holdings "
+            "WHERE collect_date < ? GROUP BY etf_code",
+            (cutoff,),
+        )
+        incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+        for collect_date in dates:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stats["rows"] += _move_date(conn, collect_date)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            stats["dates"] += 1
+            if incremental:
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                # execute()는 이 PRAGMA를 한 단계(1페이지)만 실행하므로 executescript로 끝까지 실행
+                conn.executescript(f"PRAGMA incremental_vacuum({int(VACUUM_PAGES_PER_STEP)});")
+                stats["freed_pages"] += before - conn.execute(
+                    "PRAGMA freelist_count"
+                ).fetchone()[0]
+
+        if vacuum_full and not incremental:
+            logger.info("증분 VACUUM 모드로 변환 (전체 VACUUM)")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        elif dates and not incremental:
+            logger.info(
+                "증분 VACUUM이 꺼진 DB입니다. 빈 페이지는 새 데이터에 재사용되며, "
+                "파일 크기를 줄이려면 --vacuum-full로 한 번 변환하세요."
+            )
+    finally:
+        conn.close()
+
+    stats["elapsed"] = round(time.perf_counter() - started, 2)
+    logger.info(
+        "보관 압축 완료 (기준일 %s): %d일 / %d행 이동 / 빈 페이지 %d개 반환 / %.2f초",
+        cutoff, stats["dates"], stats["rows"], stats["freed_pages"], stats["elapsed"],
+    )
+    return stats
+
+
+def main():
+    """명령행 진입점."""
+    parser = argparse.ArgumentParser(description="구성종목 보관 압축 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact_parser = sub.add_parser("compact", help="오래된 구성종목을 보관 DB로 이동")
+    compact_parser.add_argument("--hot-days", type=int, default=None, help="기본 테이블 유지 기간 (일)")
+    compact_parser.add_argument(
+        "--vacuum-full", action="store_true", help="기존 DB를 증분 VACUUM 모드로 변환 (전체 잠금)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if args.command == "compact":
+        compact(args.hot_days, args.vacuum_full)
+
+
+if __name__ == "__main__":
+    main()
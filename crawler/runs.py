@@ -0,0 +1,150 @@
+"""
+수집 실행 기록.
+수집 실행마다 ETF별 상태를 저장하여, 중간에 실패하거나 일부 ETF가 empty/error로
+끝난 경우 같은 날짜의 실패·누락 ETF만 다시 수집(resume)할 수 있게 한다.
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대상 상태
+RETRY_STATUSES = ("error", "empty")
+# 완료로 보는 상태 (resume 시 다시 수집하지 않음)
+DONE_STATUSES = ("saved", "unchanged")
+
+
+def create_run_schema(conn: sqlite3.Connection):
+    """
+    수집 실행 기록 테이블을 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS collect_run (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            collect_date DATE NOT NULL,
+            mode TEXT NOT NULL,
+            status TEXT NOT NULL,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_collect_run_date
+            ON collect_run(collect_date);
+
+        CREATE TABLE IF NOT EXISTS collect_run_etf (
+            run_id INTEGER NOT NULL,
+            etf_code TEXT NOT NULL,
+            etf_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (run_id, etf_code)
+        );
+    """)
+
+
+def prepare_run(
+    conn: sqlite3.Connection, collect_date: str, mode: str, etf_items: list, resume: bool
+) -> tuple:
+    """
+    수집 실행을 시작하고 이번에 수집할 ETF 목록을 결정한다.
+
+    resume이면 같은 날짜의 마지막 실행을 이어서 사용하고, 완료(saved/unchanged)되지
+    않은 ETF와 실행 기록에 없는 ETF만 대상으로 한다. 이어갈 실행이 없으면 새로 시작한다.
+
+    Args:
+        conn: DB 연결
+        collect_date: 수집 날짜
+        mode: 수집 모드
+        etf_items: 전체 [(etf_name, etf_code), ...]
+        resume: 이어서 수집 여부
+
+    Returns:
+        (run_id, 수집 대상 [(etf_name, etf_code), ...])
+    """
+    if resume:
+        row = conn.execute(
+            "SELECT run_id FROM collect_run WHERE collect_date = ? "
+            "ORDER BY run_id DESC LIMIT 1",
+            (collect_date,),
+        ).fetchone()
+        if row:
+            run_id = row["run_id"]
+            done = {
+                r["etf_code"]
+                for r in conn.execute(
+                    "SELECT etf_code FROM collect_run_etf WHERE run_id = ? AND status IN (?, ?)",
+                    (run_id, *DONE_STATUSES),
+                ).fetchall()
+            }
+            targets = [(name, code) for name, code in etf_items if code not in done]
+            conn.execute(
+                "UPDATE collect_run SET status = 'running', mode = ?, finished_at = NULL "
+                "WHERE run_id = ?",
+                (mode, run_id),
+            )
+            _mark_pending(conn, run_id, targets)
+            logger.info(
+                "수집 이어하기: run %d, 완료 %d개 / 재수집 %d개", run_id, len(done), len(targets)
+            )
+            return run_id, targets
+
+    run_id = conn.execute(
+        "INSERT INTO collect_run (collect_date, mode, status) VALUES (?, ?, 'running')",
+        (collect_date, mode),
+    ).lastrowid
+    _mark_pending(conn, run_id, etf_items)
+    return run_id, list(etf_items)
+
+
+def _mark_pending(conn: sqlite3.Connection, run_id: int, etf_items: list):
+    """대상 ETF를 pending으로 기록한다. 기존 시도 횟수는 유지한다."""
+    conn.executemany(
+        "INSERT INTO collect_run_etf (run_id, etf_code, etf_name, status) "
+        "VALUES (?, ?, ?, 'pending') "
+        "ON CONFLICT(run_id, etf_code) DO UPDATE SET status = 'pending', "
+        "updated_at = CURRENT_TIMESTAMP",
+        [(run_id, code, name) for name, code in etf_items],
+    )
+
+
+def record_etf_status(conn: sqlite3.Connection, run_id: int, result: dict):
+    """
+    ETF 하나의 수집 결과를 실행 기록에 반영한다. 같은 트랜잭션에서 커밋된다.
+
+    Args:
+        conn: 수집 writer DB 연결
+        run_id: 실행 ID (None이면 기록하지 않음)
+        result: 수집 결과 dict
+    """
+    if run_id is None:
+        return
+    conn.execute(
+        "UPDATE collect_run_etf SET status = ?, attempts = attempts + 1, "
+        "updated_at = CURRENT_TIMESTAMP WHERE run_id = ? AND etf_code = ?",
+        (result["status"], run_id, result["etf_code"]),
+    )
+
+
+def finish_run(conn: sqlite3.Connection, run_id: int) -> str:
+    """
+    실행을 종료 처리한다. 실패한 ETF가 남아 있으면 "partial", 아니면 "done".
+
+    Returns:
+        실행 상태
+    """
+    remaining = conn.execute(
+        "SELECT COUNT(*) AS cnt FROM collect_run_etf "
+        "WHERE run_id = ? AND status NOT IN (?, ?)",
+        (run_id, *DONE_STATUSES),
+    ).fetchone()["cnt"]
+    status = "partial" if remaining else "done"
+    conn.execute(
+        "UPDATE collect_run SET status = ?, finished_at = CURRENT_TIMESTAMP WHERE run_id = ?",
+        (status, run_id),
+    )
+    return status
@@ -0,0 +1,202 @@
+"""
+섹터 수급 집계(rollup).
+config.ETF_SECTORS의 섹터별로 최근 수집일 기준 비교 기간(config.SIGNAL_HORIZONS)마다
+섹터 ETF들의 매수/매도/순매수 주식수, 비중 변화, 편입/편출 수를 sector_flow에,
+섹터별 순매수·순매도 상위 종목을 sector_flow_stock에 기록한다.
+"전체" 섹터는 모든 ETF의 합계다.
+
+수집 / 리플레이 / 일괄 적재 실행이 끝날 때 한 번 다시 계산하므로 (ETF 저장마다가 아니라),
+API는 요청마다 집계하지 않고 이 두 테이블의 기본키 구간만 읽는다.
+집계에 쓴 설정(섹터 분류, 비교 기간, 상위 종목 수)의 해시를 sector_flow_state에 남겨,
+앱 시작 시 설정이 바뀐 경우에만 다시 집계한다 (sector_flow_stale()).
+비교 기간은 최근 수집일 구간이므로 기본 변화량 테이블(etf_holdings_delta)만 읽는다.
+
+- buy_shares / sell_shares: (ETF, 종목)별 기간 순변화 중 증가분 합 / 감소분 합
+- net_shares: 기간 순변화 합 (buy_shares - sell_shares)
+- etf_count: 기간 내 구성종목이 바뀐 섹터 ETF 수
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+
+from config import ETF_LIST, ETF_SECTORS, SECTOR_FLOW_TOP_N, SIGNAL_HORIZONS
+
+logger = logging.getLogger(__name__)
+
+ALL_SECTORS = "전체"
+DEFAULT_SECTOR = "기타"  # 섹터 분류에 없는 ETF
+
+
+def create_sector_schema(conn: sqlite3.Connection):
+    """
+    섹터 수급 집계 테이블을 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sector_flow (
+            days INTEGER NOT NULL,
+            sector TEXT NOT NULL,
+            date_from DATE NOT NULL,
+            date_to DATE NOT NULL,
+            etf_count INTEGER NOT NULL,
+            buy_shares INTEGER NOT NULL,
+            sell_shares INTEGER NOT NULL,
+            net_shares INTEGER NOT NULL,
+            weight_change REAL NOT NULL,
+            entered INTEGER NOT NULL,
+            exited INTEGER NOT NULL,
+            PRIMARY KEY (days, sector)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS sector_flow_stock (
+            days INTEGER NOT NULL,
+            sector TEXT NOT NULL,
+            side TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            stock_id INTEGER NOT NULL,
+            etf_count INTEGER NOT NULL,
+            net_shares INTEGER NOT NULL,
+            weight_change REAL NOT NULL,
+            PRIMARY KEY (days, sector, side, rank)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS sector_flow_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            config_hash TEXT NOT NULL
+        );
+    """)
+
+
+def _config_hash() -> str:
+    """집계 결과를 바꾸는 설정(ETF별 섹터, 비교 기간, 상위 종목 수)의 해시."""
+    sectors = sorted(
+        (ETF_LIST[name], sector) for name, sector in ETF_SECTORS.items() if name in ETF_LIST
+    )
+    payload = json.dumps(
+        [sectors, sorted(set(SIGNAL_HORIZONS)), SECTOR_FLOW_TOP_N], ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sector_flow_stale(conn: sqlite3.Connection) -> bool:
+    """
+    마지막 집계 이후 집계 설정이 바뀌었거나 아직 집계한 적이 없는지 확인한다.
+
+    Args:
+        conn: DB 연결
+
+    Returns:
+        다시 집계해야 하면 True
+    """
+    row = conn.execute("SELECT config_hash FROM sector_flow_state WHERE id = 1").fetchone()
+    return row is None or row[0] != _config_hash()
+
+
+def _sector_values() -> tuple:
+    """ETF 종목코드 → 섹터 매핑을 SQL VALUES 절과 이름 있는 파라미터로 만든다."""
+    pairs = [(ETF_LIST[name], sector) for name, sector in ETF_SECTORS.items() if name in ETF_LIST]
+    if not pairs:
+        return "SELECT NULL, NULL WHERE 0", {}
+    values = ", ".join(f"(:etf{i}, :sector{i})" for i in range(len(pairs)))
+    params = {}
+    for i, (etf_code, sector) in enumerate(pairs):
+        params[f"etf{i}"] = etf_code
+        params[f"sector{i}"] = sector
+    return f"VALUES {values}", params
+
+
+def refresh_sector_flow(conn: sqlite3.Connection) -> int:
+    """
+    최신 수집일 기준 섹터 수급 집계를 다시 계산한다.
+    수집 / 리플레이 / 일괄 적재 실행 끝에서 커밋 전에 한 번 호출한다.
+
+    Args:
+        conn: DB 연결
+
+    Returns:
+        기록한 sector_flow 행 수
+    """
+    horizons = tuple(sorted(set(SIGNAL_HORIZONS)))
+    dates = [
+        r[0]
+        for r in conn.execute(
+            "SELECT collect_date FROM collect_ledger ORDER BY collect_date DESC LIMIT ?",
+            (max(horizons) + 1,),
+        ).fetchall()
+    ]
+    conn.execute("DELETE FROM sector_flow")
+    conn.execute("DELETE FROM sector_flow_stock")
+    conn.execute(
+        "INSERT OR REPLACE INTO sector_flow_state (id, config_hash) VALUES (1, ?)",
+        (_config_hash(),),
+    )
+    if len(dates) < 2:
+        return 0
+
+    windows = [(days, dates[min(days, len(dates) - 1)]) for days in horizons]
+    params = {"latest": dates[0], "oldest": min(d for _, d in windows)}
+    columns = []
+    for i, (_, date_from) in enumerate(windows):
+        params[f"f{i}"] = date_from
+        cond = f"CASE WHEN d.collect_date > :f{i} THEN"
+        columns.append(
+            f"SUM({cond} d.count_change END) AS c{i}, "
+            f"SUM({cond} d.weight_change END) AS w{i}, "
+            f"SUM({cond} d.entered - d.exited END) AS n{i}"
+        )
+
+    mapping, mapping_params = _sector_values()
+    params.update(mapping_params)
+
+    flows, stocks = [], []
+    for i, (days, _) in enumerate(windows):
+        for sector_expr, group in (("sector", "GROUP BY sector"), (f"'{ALL_SECTORS}'", "")):
+            flows.append(
+                f"SELECT {days}, {sector_expr}, :f{i}, :latest, "
+                f"COUNT(DISTINCT etf_code), IFNULL(SUM(MAX(c{i}, 0)), 0), "
+                f"IFNULL(SUM(MAX(-c{i}, 0)), 0), IFNULL(SUM(c{i}), 0), "
+                f"IFNULL(ROUND(SUM(w{i}), 4), 0), IFNULL(SUM(n{i} > 0), 0), "
+                f"IFNULL(SUM(n{i} < 0), 0) "
+                f"FROM win WHERE c{i} IS NOT NULL {group}"
+            )
+            stocks.append(
+                f"SELECT {days} AS days, {sector_expr} AS sector, stock_id, "
+                f"COUNT(*) AS etf_count, SUM(c{i}) AS net, ROUND(SUM(w{i}), 4) AS w "
+                f"FROM win WHERE c{i} IS NOT NULL GROUP BY {sector_expr}, stock_id"
+            )
+
+    win = (
+        f"WITH sectors(etf_code, sector) AS ({mapping}), "
+        f"win AS MATERIALIZED ("
+        f"  SELECT d.etf_code, d.stock_id, IFNULL(s.sector, '{DEFAULT_SECTOR}') AS sector, "
+        f"    {', '.join(columns)} "
+        f"  FROM etf_holdings_delta d LEFT JOIN sectors s ON s.etf_code = d.etf_code "
+        f"  WHERE d.collect_date > :oldest AND d.collect_date <= :latest "
+        f"  GROUP BY d.etf_code, d.stock_id"
+        f") "
+    )
+    written = conn.execute(
+        f"INSERT INTO sector_flow "
+        f"(days, sector, date_from, date_to, etf_count, buy_shares, sell_shares, "
+        f" net_shares, weight_change, entered, exited) "
+        f"{win}{' UNION ALL '.join(flows)}",
+        params,
+    ).rowcount
+    conn.execute(
+        f"INSERT INTO sector_flow_stock "
+        f"(days, sector, side, rank, stock_id, etf_count, net_shares, weight_change) "
+        f"{win}"
+        f"SELECT days, sector, side, rank, stock_id, etf_count, net, w FROM ("
+        f"  SELECT days, sector, CASE WHEN net > 0 THEN 'buy' ELSE 'sell' END AS side, "
+        f"    ROW_NUMBER() OVER (PARTITION BY days, sector, net > 0 "
+        f"      ORDER BY ABS(net) DESC, etf_count DESC, stock_id) AS rank, "
+        f"    stock_id, etf_count, net, w "
+        f"  FROM ({' UNION ALL '.join(stocks)}) WHERE net != 0"
+        f") WHERE rank <= :top_n",
+        {**params, "top_n": SECTOR_FLOW_TOP_N},
+    )
+    return written
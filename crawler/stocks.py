@@ -0,0 +1,222 @@
+"""
+종목 차원 테이블(stock_master).
+구성종목 행마다 종목명 문자열을 저장하는 대신, 종목 링크(/item/main.naver?code=)에서
+파싱한 종목코드 기준의 정수 stock_id를 부여하고 종목명은 속성으로 둔다.
+종목코드를 알 수 없는 행(일괄 적재 등)은 종목명으로 매핑하며, 이후 같은 이름의
+종목코드가 파싱되면 해당 행에 코드를 채워 같은 stock_id를 유지한다.
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# stock_name 컬럼을 stock_id로 바꾸는 구성종목 테이블
+_STOCK_TABLES = ("etf_holdings", "etf_holdings_event", "etf_holdings_checkpoint")
+
+
+def create_stock_schema(conn: sqlite3.Connection):
+    """
+    stock_master 테이블을 생성한다.
+
+    Args:
+        conn: DB 연결
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS stock_master (
+            stock_id INTEGER PRIMARY KEY,
+            stock_code TEXT UNIQUE,
+            stock_name TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_stock_name
+            ON stock_master(stock_name);
+    """)
+
+
+def get_stock_id(
+    conn: sqlite3.Connection, stock_code: str, stock_name: str, cache: dict = None
+) -> int:
+    """
+    종목코드(없으면 종목명)에 해당하는 stock_id를 반환한다. 없으면 새로 등록한다.
+
+    - 종목코드가 있으면 코드로 찾고, 종목명이 바뀌었으면 최신 이름으로 갱신
+    - 코드로 못 찾으면 코드 없이 등록된 같은 이름의 종목에 코드를 채운다
+    - 종목코드가 없으면 종목명으로 찾는다 (코드가 있는 종목 우선)
+
+    Args:
+        conn: DB 연결
+        stock_code: 종목코드 (없으면 None)
+        stock_name: 종목명
+        cache: 여러 행을 처리할 때 공유하는 {(stock_code, stock_name): stock_id}
+
+    Returns:
+        stock_id
+    """
+    key = (stock_code, stock_name)
+    if cache is not None and key in cache:
+        return cache[key]
+
+    if stock_code:
+        row = conn.execute(
+            "SELECT stock_id, stock_name FROM stock_master WHERE stock_code = ?", (stock_code,)
+        ).fetchone()
+        if row:
+            stock_id = row[0]
+            if row[1] != stock_name:
+                conn.execute(
+                    "UPDATE stock_master SET stock_name = ?, updated_at = CURRENT_TIMESTAMP "
+                    "WHERE stock_id = ?",
+                    (stock_name, stock_id),
+                )
+        else:
+            row = conn.execute(
+                "SELECT stock_id FROM stock_master "
+                "WHERE stock_code IS NULL AND stock_name = ? LIMIT 1",
+                (stock_name,),
+            ).fetchone()
+            if row:
+                stock_id = row[0]
+                conn.execute(
+                    "UPDATE stock_master SET stock_code = ?, updated_at = CURRENT_TIMESTAMP "
+                    "WHERE stock_id = ?",
+                    (stock_code, stock_id),
+                )
+            else:
+                stock_id = conn.execute(
+                    "INSERT INTO stock_master (stock_code, stock_name) VALUES (?, ?)",
+                    (stock_code, stock_name),
+                ).lastrowid
+    else:
+        row = conn.execute(
+            "SELECT stock_id FROM stock_master WHERE stock_name = ? "
+            "ORDER BY stock_code IS NULL, stock_id LIMIT 1",
+            (stock_name,),
+        ).fetchone()
+        if row:
+            stock_id = row[0]
+        else:
+            stock_id = conn.execute(
+                "INSERT INTO stock_master (stock_code, stock_name) VALUES (NULL, ?)",
+                (stock_name,),
+            ).lastrowid
+
+    if cache is not None:
+        cache[key] = stock_id
+    return stock_id
+
+
+def with_stock_ids(conn: sqlite3.Connection, holdings: list) -> list:
+    """
+    구성종목 리스트의 각 항목에 stock_id를 붙인 새 리스트를 반환한다.
+    이미 stock_id가 있는 항목은 그대로 둔다.
+
+    Args:
+        conn: DB 연결
+        holdings: [{"stock_code"(선택), "stock_name", "stock_count", "weight"}, ...]
+
+    Returns:
+        [{..., "stock_id"}, ...]
+    """
+    cache = {}
+    return [
+        h if "stock_id" in h else {
+            **h,
+            "stock_id": get_stock_id(conn, h.get("stock_code"), h["stock_name"], cache),
+        }
+        for h in holdings
+    ]
+
+
+def load_stocks(conn: sqlite3.Connection, stock_ids) -> dict:
+    """
+    stock_id 목록의 종목 정보를 조회한다.
+
+    Returns:
+        {stock_id: (stock_code, stock_name)}
+    """
+    stock_ids = list(stock_ids)
+    result = {}
+    # SQLite 바인딩 변수 수 제한을 넘지 않도록 나누어 조회
+    for i in range(0, len(stock_ids), 500):
+        chunk = stock_ids[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for stock_id, stock_code, stock_name in conn.execute(
+            f"SELECT stock_id, stock_code, stock_name FROM stock_master "
+            f"WHERE stock_id IN ({placeholders})",
+            chunk,
+        ):
+            result[stock_id] = (stock_code, stock_name)
+    return result
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> list:
+    """테이블 컬럼명 리스트. 테이블이 없으면 빈 리스트."""
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def detach_legacy_tables(conn: sqlite3.Connection) -> list:
+    """
+    stock_name 컬럼을 가진 기존 구성종목 테이블을 {table}_legacy로 이름을 바꾸고
+    인덱스를 삭제한다. 이후 create_schema가 stock_id 기반 테이블을 새로 만든다.
+
+    Args:
+        conn: DB 연결
+
+    Returns:
+        마이그레이션할 원래 테이블명 리스트 (이전에 중단된 마이그레이션 포함)
+    """
+    legacy = [t for t in _STOCK_TABLES if _columns(conn, f"{t}_legacy")]
+    for table in _STOCK_TABLES:
+        if table in legacy or "stock_name" not in _columns(conn, table):
+            continue
+        legacy.append(table)
+        for (index_name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? "
+            "AND sql IS NOT NULL",
+            (table,),
+        ).fetchall():
+            conn.execute(f"DROP INDEX {index_name}")
+        conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+    return legacy
+
+
+def migrate_legacy_tables(conn: sqlite3.Connection, tables: list):
+    """
+    detach_legacy_tables()로 떼어낸 테이블의 행을 stock_id 기반 새 테이블로 옮긴다.
+    기존 종목명은 코드 없이 stock_master에 등록되고, 해당 ETF가 다음에 저장될 때 코드가 채워진다.
+
+    Args:
+        conn: 새 테이블이 생성된 DB 연결
+        tables: 원래 테이블명 리스트
+    """
+    if not tables:
+        return
+
+    for table in tables:
+        conn.execute(
+            f"INSERT INTO stock_master (stock_name) "
+            f"SELECT DISTINCT l.stock_name FROM {table}_legacy l "
+            f"WHERE NOT EXISTS (SELECT 1 FROM stock_master m WHERE m.stock_name = l.stock_name)"
+        )
+
+    conn.execute("DROP TABLE IF EXISTS temp.stock_name_map")
+    conn.execute(
+        "CREATE TEMP TABLE stock_name_map AS "
+        "SELECT stock_name, MIN(stock_id) AS stock_id FROM stock_master GROUP BY stock_name"
+    )
+
+    for table in tables:
+        old_cols = [c for c in _columns(conn, f"{table}_legacy") if c != "stock_name"]
+        new_cols = set(_columns(conn, table))
+        cols = [c for c in old_cols if c in new_cols]
+        moved = conn.execute(
+            f"INSERT INTO {table} ({', '.join(cols)}, stock_id) "
+            f"SELECT {', '.join('l.' + c for c in cols)}, m.stock_id "
+            f"FROM {table}_legacy l JOIN stock_name_map m ON m.stock_name = l.stock_name"
+        ).rowcount
+        conn.execute(f"DROP TABLE {table}_legacy")
+        logger.info("stock_id 마이그레이션: %s %d행", table, moved)
+
+    conn.execute("DROP TABLE temp.stock_name_map")
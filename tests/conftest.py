@@ -0,0 +1,185 @@
+"""
+테스트 공통 설정.
+config 값은 각 모듈이 import 시점에 복사해 가므로, set_config()는 config와 이미 import된
+crawler / analyzer / app 모듈의 같은 이름을 함께 바꾼다 (테스트가 끝나면 원래대로 돌아간다).
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "naver")
+FIXTURE_PAGES = sorted(f for f in os.listdir(FIXTURE_DIR) if f.endswith(".html"))
+
+
+def read_fixture(name: str) -> bytes:
+    """저장된 네이버 종목 페이지 원본(바이트)을 읽는다."""
+    with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+        return f.read()
+
+
+def set_config(monkeypatch, **values):
+    """config와 import된 프로젝트 모듈의 설정 값을 함께 바꾼다."""
+    for name, value in values.items():
+        monkeypatch.setattr(config, name, value)
+        for module_name, module in list(sys.modules.items()):
+            if module is None or module_name.split(".")[0] not in ("crawler", "analyzer", "app"):
+                continue
+            if name in vars(module):
+                monkeypatch.setattr(module, name, value)
+
+
+def recent_dates(count: int) -> list:
+    """오늘까지 count일의 날짜 (오래된 순, YYYY-MM-DD)."""
+    today = date.today()
+    return [(today - timedelta(days=n)).strftime("%Y-%m-%d") for n in range(count - 1, -1, -1)]
+
+
+def synthetic_history(dates: list, etfs: int = 4, seed: int = 0, quiet_after: int = None) -> list:
+    """
+    합성 구성종목 이력 [(수집일, ETF 코드, 구성종목), ...]을 만든다.
+    날짜마다 일부 ETF만 바뀌며 편입 / 편출 / 주식수·비중 변화가 섞여 나온다.
+    quiet_after가 있으면 마지막 ETF는 그 날짜 인덱스 이후로 바뀌지 않는다.
+    """
+    rng = random.Random(seed)
+    stocks = [(f"{800000 + i:06d}", f"합성종목{i:02d}") for i in range(20)]
+    codes = [f"{960001 + i}" for i in range(etfs)]
+    portfolios = {
+        code: {stock: [rng.randint(1, 50) * 100, round(rng.uniform(0.5, 10), 2)]
+               for stock in rng.sample(stocks, 8)}
+        for code in codes
+    }
+    history = []
+    for i, collect_date in enumerate(dates):
+        for code, holdings in portfolios.items():
+            if i and (rng.random() < 0.3 or (quiet_after is not None and code == codes[-1]
+                                             and i > quiet_after)):
+                continue  # 이날은 변경 없음 (직전 스냅샷 유지)
+            if i:
+                for stock in list(holdings):
+                    roll = rng.random()
+                    if roll < 0.1 and len(holdings) > 4:
+                        del holdings[stock]  # 편출
+                    elif roll < 0.5:
+                        holdings[stock][0] += rng.choice([-300, -100, 100, 100, 200, 500])
+                        holdings[stock][1] = round(holdings[stock][1] + rng.uniform(-1, 1), 2)
+                if rng.random() < 0.5:
+                    stock = rng.choice([s for s in stocks if s not in holdings])
+                    holdings[stock] = [rng.randint(1, 50) * 100, round(rng.uniform(0.5, 5), 2)]
+            history.append((collect_date, code, [
+                {"stock_code": stock[0], "stock_name": stock[1],
+                 "stock_count": max(count, 100), "weight": weight}
+                for stock, (count, weight) in sorted(holdings.items())
+            ]))
+    return history
+
+
+def save_history(history: list):
+    """합성 이력을 수집 시와 같은 규칙(변경된 ETF만 저장)으로 저장한다."""
+    from crawler.naver_etf import flush_columnar, get_db_connection, ingest_holdings
+
+    conn = get_db_connection()
+    try:
+        for collect_date, etf_code, holdings in history:
+            ingest_holdings(f"합성 ETF {etf_code}", etf_code, holdings, collect_date, conn)
+        conn.commit()
+        flush_columnar(conn)
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    임시 디렉터리의 DB / 컬럼형 파일 / 보관 DB 경로로 바꾼다 (페이지 아카이브는 끈다).
+    스키마는 만들지 않으므로 설정을 바꾼 뒤 init_db()를 호출한다.
+    읽기 연결 풀과 분석 결과 캐시는 테스트마다 새로 쓴다.
+    """
+    import analyzer.cache
+    import analyzer.columnar  # noqa: F401  (설정을 바꾸기 전에 import해 둔다)
+    import analyzer.engine  # noqa: F401
+    import analyzer.pool
+    import analyzer.signal  # noqa: F401
+    import analyzer.vectorized  # noqa: F401
+    import crawler.archive  # noqa: F401
+    import crawler.retention  # noqa: F401
+    import crawler.engine  # noqa: F401
+    import crawler.naver_etf  # noqa: F401
+
+    path = str(tmp_path / "active_etf.db")
+    set_config(
+        monkeypatch,
+        DB_PATH=path,
+        COLUMNAR_DIR=str(tmp_path / "columnar"),
+        HOLDINGS_ARCHIVE_DB_PATH=str(tmp_path / "holdings_archive.db"),
+        ARCHIVE_DB_PATH=str(tmp_path / "page_archive.db"),
+        ARCHIVE_ENABLED=False,
+    )
+    monkeypatch.setattr(analyzer.pool, "_pool", None)
+    # 세대 번호는 DB마다 0부터 시작하므로 이전 테스트의 결과가 남지 않게 비운다
+    analyzer.cache.result_cache.clear()
+    yield path
+    if analyzer.pool._pool is not None:
+        analyzer.pool._pool.close_all()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """/item/main.naver?code=XXXXXX 요청에 server.pages의 고정 페이지를 내려준다."""
+
+    def do_GET(self):
+        code = parse_qs(urlparse(self.path).query).get("code", [""])[0]
+        self.server.requests.append((time.monotonic(), code))
+        if self.server.failures.get(code):
+            self.server.failures[code] -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if code not in self.server.pages:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = read_fixture(self.server.pages[code])
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """
+    로컬 스텁 서버를 띄운다. server.pages에 {ETF 코드: 고정 페이지 이름}을 넣고
+    server.item_url을 NAVER_ITEM_URL로 쓴다. server.requests에 (시각, 코드)가 쌓인다.
+    server.failures에 {ETF 코드: 횟수}를 넣으면 그 횟수만큼 503으로 응답한다.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.pages = {}
+    server.failures = {}
+    server.requests = []
+    server.item_url = (
+        f"http://127.0.0.1:{server.server_address[1]}/item/main.naver?code={{code}}"
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
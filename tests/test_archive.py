@@ -0,0 +1,121 @@
+"""
+페이지 아카이브 리플레이: 아카이브 페이지가 있는 날짜만 다시 만들고,
+아카이브 없이 저장된 스냅샷과 파싱 결과가 빈 날짜의 스냅샷은 그대로 두는지
+두 저장 방식(snapshot / events)에서 확인한다.
+"""
+
+import pytest
+
+from conftest import read_fixture, set_config
+
+STORAGES = pytest.mark.parametrize("storage", ["snapshot", "events"])
+
+CODE = "930001"
+OTHER = "930002"  # 아카이브 페이지가 없는 ETF (ETF_LIST에서 빠진 ETF 등)
+
+
+def _parse(page: str) -> list:
+    from crawler.naver_etf import decode_page, parse_holdings
+
+    return parse_holdings(decode_page(read_fixture(page)), CODE)
+
+
+def _init(monkeypatch, storage: str):
+    set_config(monkeypatch, ARCHIVE_ENABLED=True, HOLDINGS_STORAGE=storage)
+    from crawler.naver_etf import init_db
+
+    init_db()
+
+
+def _store(etf_code: str, collect_date: str, holdings: list = None, page: str = None):
+    """스냅샷을 저장하고, page가 있으면 그 날짜의 아카이브 페이지로 기록한다."""
+    from crawler.archive import archive_page
+    from crawler.naver_etf import get_db_connection, save_holdings
+
+    conn = get_db_connection()
+    try:
+        if page:
+            archive_page(etf_code, collect_date, read_fixture(page), conn)
+        if holdings:
+            save_holdings(etf_code, holdings, collect_date, conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _history(etf_code: str) -> dict:
+    """{스냅샷이 바뀐 날짜: [(종목명, 주식수, 비중)]}"""
+    import crawler.naver_etf as naver_etf
+    from crawler.events import event_dates
+
+    conn = naver_etf.get_db_connection()
+    try:
+        if naver_etf.HOLDINGS_STORAGE == "events":
+            dates = event_dates(conn, etf_code)
+        else:
+            dates = [r[0] for r in conn.execute(
+                "SELECT DISTINCT collect_date FROM etf_holdings WHERE etf_code = ? "
+                "ORDER BY collect_date",
+                (etf_code,),
+            )]
+        return {d: _rows(naver_etf.load_etf_snapshot(conn, etf_code, d)[1]) for d in dates}
+    finally:
+        conn.close()
+
+
+def _rows(holdings: list) -> list:
+    return sorted((h["stock_name"], h["stock_count"], h["weight"]) for h in holdings)
+
+
+@STORAGES
+def test_replay_keeps_dates_without_archived_page(db, monkeypatch, storage):
+    from crawler.archive import replay
+
+    _init(monkeypatch, storage)
+    semi = _parse("semiconductor.html")
+    bio = _parse("bio_euckr.html")
+    manual = [{"stock_name": "수동입력", "stock_count": 10, "weight": 1.0}]
+
+    # 파서 버그로 잘못 저장된 날 (아카이브 있음)
+    _store(CODE, "2026-01-02", manual, page="semiconductor.html")
+    # 아카이브 없이 저장된 날 (아카이브 기능을 켜기 전 / 임포트)
+    _store(CODE, "2026-01-05", bio)
+    # 변경 없음 (아카이브만 있음)
+    _store(CODE, "2026-01-06", page="bio_euckr.html")
+    # 마지막 아카이브 이후 (아카이브 기능을 끈 뒤) 저장된 날
+    _store(CODE, "2026-01-09", manual)
+    _store(OTHER, "2026-01-03", manual)
+
+    stats = replay("2026-01-01", "2026-01-31", workers=1)
+    assert stats["pages"] == 2
+    assert stats["saved"] == 1 and stats["kept"] == 1
+
+    history = _history(CODE)
+    assert list(history) == ["2026-01-02", "2026-01-05", "2026-01-09"]
+    assert history["2026-01-02"] == _rows(semi)
+    assert history["2026-01-05"] == _rows(bio)
+    assert history["2026-01-09"] == _rows(manual)
+    assert _history(OTHER) == {"2026-01-03": _rows(manual)}
+
+
+@STORAGES
+def test_replay_keeps_snapshot_when_page_parses_empty(db, monkeypatch, storage):
+    from crawler.archive import replay
+
+    _init(monkeypatch, storage)
+    semi = _parse("semiconductor.html")
+    bio = _parse("bio_euckr.html")
+
+    _store(CODE, "2026-01-02", semi, page="semiconductor.html")
+    # 저장된 날짜의 페이지가 지금 파서로는 비어 나온다 (파서가 깨진 경우)
+    _store(CODE, "2026-01-05", bio, page="no_section.html")
+    _store(CODE, "2026-01-06", semi, page="semiconductor.html")
+
+    stats = replay("2026-01-01", "2026-01-31", workers=1)
+    assert stats["kept"] == 1
+
+    history = _history(CODE)
+    assert list(history) == ["2026-01-02", "2026-01-05", "2026-01-06"]
+    assert history["2026-01-05"] == _rows(bio)
+    # 유지한 스냅샷이 직전 스냅샷이 되므로 그다음 날의 변경도 그대로 남는다
+    assert history["2026-01-06"] == _rows(semi)
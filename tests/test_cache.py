@@ -0,0 +1,68 @@
+"""
+분석 결과 캐시: 같은 세대에서는 캐시된 결과를 돌려주고, 다른 연결(다른 프로세스의 수집기와 같은
+경우)에서 구성종목을 커밋하면 세대 번호가 올라 다음 조회가 새로 계산되는지 확인한다.
+"""
+
+from conftest import recent_dates, save_history, synthetic_history
+
+CODE = "960001"
+
+
+def _generation() -> int:
+    from analyzer.pool import get_read_connection
+    from crawler.ledger import data_generation
+
+    conn = get_read_connection()
+    try:
+        return data_generation(conn)
+    finally:
+        conn.close()
+
+
+def test_write_from_another_connection_invalidates(db):
+    from analyzer import signal
+    from analyzer.cache import result_cache
+    from crawler.naver_etf import get_db_connection, init_db, save_holdings
+
+    init_db()
+    dates = recent_dates(5)
+    save_history(synthetic_history(dates[:-1]))
+
+    buy = signal.get_top_buy_increase(days=3, top_n=50)
+    holdings = signal.get_etf_holdings(CODE)
+    misses = result_cache.misses
+    hits = result_cache.hits
+    # 같은 세대에서는 다시 계산하지 않는다 (시그널 함수는 캐시된 compute_signals 결과를 자른다)
+    assert signal.get_top_buy_increase(days=3, top_n=50) == buy
+    assert signal.get_etf_holdings(CODE) == holdings
+    assert result_cache.misses == misses and result_cache.hits == hits + 2
+
+    # 분석 쪽 읽기 연결 풀과 별개의 연결로 새 날짜의 스냅샷을 커밋한다
+    generation = _generation()
+    new = [
+        {"stock_code": "899999", "stock_name": "캐시신규종목", "stock_count": 5000, "weight": 9.5},
+        *[dict(h, stock_count=h["stock_count"] + 1000) for h in holdings],
+    ]
+    conn = get_db_connection()
+    try:
+        save_holdings(CODE, new, dates[-1], conn)
+        conn.commit()
+    finally:
+        conn.close()
+    assert _generation() > generation
+
+    fresh_holdings = signal.get_etf_holdings(CODE)
+    fresh_buy = signal.get_top_buy_increase(days=3, top_n=50)
+    assert result_cache.misses == misses + 2
+    assert "캐시신규종목" in {h["stock_name"] for h in fresh_holdings}
+    assert fresh_holdings != holdings
+    assert "캐시신규종목" in {r["stock_name"] for r in fresh_buy}
+
+    # 새 세대의 결과는 캐시를 끄고 계산한 결과와 같다
+    result_cache.clear()
+    result_cache.maxsize, size = 0, result_cache.maxsize
+    try:
+        assert signal.get_etf_holdings(CODE) == fresh_holdings
+        assert signal.get_top_buy_increase(days=3, top_n=50) == fresh_buy
+    finally:
+        result_cache.maxsize = size
@@ -0,0 +1,219 @@
+"""
+수집 모드 비교: 고정 페이지를 내려주는 로컬 스텁 서버로 수집해
+concurrent / sharded 모드의 저장 결과가 sequential 모드와 같고, 요청 속도가 토큰 버킷 한도를 넘지 않는지
+확인한다. 중간에 끊긴 실행의 이어하기(resume)와 실행 내 재시도, 실행마다 섹터 수급 집계를
+한 번만 갱신하는지도 확인한다.
+"""
+
+import pytest
+
+import crawler.naver_etf
+
+from conftest import set_config
+
+# ETF 코드 → 내려줄 고정 페이지 (같은 페이지를 여러 ETF가 쓰기도 한다)
+PAGES = {
+    "910001": "semiconductor.html",
+    "910002": "bio_euckr.html",
+    "910003": "large.html",
+    "910004": "no_section.html",
+    "910005": "semiconductor.html",
+    "910006": "large.html",
+    "910007": "bio_euckr.html",
+    "910008": "semiconductor.html",
+}
+EMPTY = "910004"
+ETFS = {f"스텁 ETF {code}": code for code in PAGES}
+
+RATE = 10.0  # 스텁 호스트 초당 요청 수
+BURST = 2  # 스텁 호스트 토큰 버킷 용량
+
+
+def _configure(monkeypatch, tmp_path, server, name: str):
+    """name별 새 DB를 쓰고 스텁 서버로 수집하도록 설정을 바꾼다."""
+    import crawler.engine
+
+    set_config(
+        monkeypatch,
+        DB_PATH=str(tmp_path / f"{name}.db"),
+        COLUMNAR_DIR=str(tmp_path / f"columnar_{name}"),
+        ETF_LIST=ETFS,
+        NAVER_ITEM_URL=server.item_url,
+        CRAWL_SLEEP=0,
+        CRAWL_RETRY_MAX=0,
+        CRAWL_CONCURRENCY=4,
+        CRAWL_SHARDS=2,
+        CRAWL_RATE_PER_HOST=RATE,
+        CRAWL_BURST_PER_HOST=BURST,
+    )
+    # 호스트별 토큰 버킷은 처음 만들 때의 설정을 쓰므로 수집마다 새로 만든다
+    monkeypatch.setattr(crawler.engine, "_host_limiters", {})
+    server.pages = PAGES
+    server.requests.clear()
+    server.failures.clear()
+
+
+def _stored() -> dict:
+    """ETF별 최신 스냅샷 {ETF 코드: (날짜, [(종목코드, 주식수, 비중)])}."""
+    from crawler.naver_etf import get_db_connection, load_etf_snapshot
+
+    conn = get_db_connection()
+    try:
+        stored = {}
+        for code in PAGES:
+            snapshot_date, holdings = load_etf_snapshot(conn, code)
+            # 종목명은 stock_master에 종목코드당 하나(마지막에 저장한 이름)라 저장 순서에 따라
+            # 달라질 수 있으므로 (종목코드, 주식수, 비중)으로 비교한다
+            stored[code] = (snapshot_date, sorted(
+                (h["stock_code"], h["stock_count"], h["weight"]) for h in holdings
+            ))
+        return stored
+    finally:
+        conn.close()
+
+
+def _collect(monkeypatch, tmp_path, server, mode: str) -> tuple:
+    """모드별로 새 DB에 수집하고 (ETF별 상태, 저장된 구성종목)을 돌려준다."""
+    _configure(monkeypatch, tmp_path, server, mode)
+    from crawler.naver_etf import collect_all_etf_data, init_db
+
+    init_db()
+    results = collect_all_etf_data(mode=mode)
+    return {r["etf_code"]: r["status"] for r in results}, _stored()
+
+
+def _assert_rate_limited(times: list, rate: float, burst: float):
+    """
+    어느 구간에서도 요청 수가 burst + rate × 구간 길이를 넘지 않아야 한다.
+    sharded 모드는 샤드별 버킷의 속도 합이 rate, 용량 합이 burst(샤드당 최소 1)다.
+    """
+    times = sorted(times)
+    for i in range(len(times)):
+        for j in range(i, len(times)):
+            # 요청 도착 시각의 흔들림만큼 한 건 여유를 둔다
+            assert j - i + 1 <= burst + rate * (times[j] - times[i]) + 1
+    # 제한이 실제로 걸렸는지: 버킷 용량을 넘는 요청은 충전 속도대로 퍼진다
+    assert times[-1] - times[0] >= (len(times) - burst) / rate * 0.8
+
+
+@pytest.mark.parametrize("mode", ["concurrent", "sharded"])
+def test_mode_matches_sequential(db, monkeypatch, tmp_path, stub_server, mode):
+    expected_status, expected = _collect(monkeypatch, tmp_path, stub_server, "sequential")
+    assert expected_status[EMPTY] == "empty"
+    assert sum(1 for s in expected_status.values() if s == "saved") == len(PAGES) - 1
+    assert {code for code, (_, rows) in expected.items() if rows} == set(PAGES) - {EMPTY}
+
+    status, stored = _collect(monkeypatch, tmp_path, stub_server, mode)
+    assert status == expected_status
+    assert stored == expected
+
+    assert sorted(code for _, code in stub_server.requests) == sorted(PAGES)
+    _assert_rate_limited([t for t, _ in stub_server.requests], RATE, BURST)
+
+
+def _requested(server) -> list:
+    return sorted(code for _, code in server.requests)
+
+
+def _run_etf(etf_code: str) -> tuple:
+    """오늘 마지막 실행에서 ETF의 (상태, 시도 횟수)."""
+    from crawler.naver_etf import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        return tuple(conn.execute(
+            "SELECT status, attempts FROM collect_run_etf WHERE etf_code = ? "
+            "ORDER BY run_id DESC LIMIT 1",
+            (etf_code,),
+        ).fetchone())
+    finally:
+        conn.close()
+
+
+def test_resume_fetches_only_missing(db, monkeypatch, tmp_path, stub_server):
+    _, expected = _collect(monkeypatch, tmp_path, stub_server, "sequential")
+
+    _configure(monkeypatch, tmp_path, stub_server, "resume")
+    set_config(monkeypatch, INGEST_BATCH_SIZE=1)
+    from crawler.naver_etf import collect_all_etf_data, init_db
+
+    init_db()
+
+    # 세 번째 ETF를 커밋한 직후 프로세스가 죽은 것처럼 실행을 끊는다
+    commit_batch = crawler.naver_etf.commit_batch
+
+    def crash_after_three(conn, processed):
+        commit_batch(conn, processed)
+        if processed == 3:
+            raise RuntimeError("수집 중단")
+
+    monkeypatch.setattr(crawler.naver_etf, "commit_batch", crash_after_three)
+    with pytest.raises(RuntimeError):
+        collect_all_etf_data(mode="sequential")
+    done = _requested(stub_server)
+    assert len(done) == 3
+
+    monkeypatch.setattr(crawler.naver_etf, "commit_batch", commit_batch)
+    stub_server.requests.clear()
+    results = collect_all_etf_data(mode="sequential", resume=True)
+    assert _requested(stub_server) == sorted(set(PAGES) - set(done))
+    assert sorted(r["etf_code"] for r in results) == _requested(stub_server)
+    assert _stored() == expected
+
+    # 실패(404)한 ETF와 빈 ETF만 다시 수집한다
+    failed = ["910002", "910006"]
+    stub_server.pages = {code: page for code, page in PAGES.items() if code not in failed}
+    stub_server.requests.clear()
+    statuses = {r["etf_code"]: r["status"] for r in collect_all_etf_data(mode="sequential")}
+    # 요청 실패는 구성종목이 없는 것과 같이 empty로 기록된다
+    assert sorted(code for code, s in statuses.items() if s == "empty") == sorted(failed + [EMPTY])
+
+    stub_server.pages = PAGES
+    stub_server.requests.clear()
+    results = collect_all_etf_data(mode="sequential", resume=True)
+    assert _requested(stub_server) == sorted(failed + [EMPTY])
+    assert {r["etf_code"]: r["status"] for r in results} == {
+        "910002": "unchanged", "910006": "unchanged", EMPTY: "empty",
+    }
+
+
+def test_retry_within_run(db, monkeypatch, tmp_path, stub_server):
+    _configure(monkeypatch, tmp_path, stub_server, "retry")
+    set_config(monkeypatch, CRAWL_RETRY_MAX=2, CRAWL_RETRY_BASE=0.01)
+    from crawler.naver_etf import collect_all_etf_data, init_db
+
+    init_db()
+    stub_server.failures = {"910003": 1, "910005": 5}
+    statuses = {r["etf_code"]: r["status"] for r in collect_all_etf_data(mode="concurrent")}
+
+    # 한 번 실패한 ETF는 첫 재시도에서 저장되고, 계속 실패하면 CRAWL_RETRY_MAX회 후 포기한다
+    assert statuses["910003"] == "saved"
+    assert _run_etf("910003") == ("saved", 2)
+    assert statuses["910005"] == "empty"
+    assert _run_etf("910005") == ("empty", 3)
+    assert statuses[EMPTY] == "empty"
+    assert _run_etf(EMPTY) == ("empty", 3)
+    requested = _requested(stub_server)
+    assert requested.count("910001") == 1
+    assert requested.count("910003") == 2
+    assert requested.count("910005") == 3
+
+
+@pytest.mark.parametrize("mode", ["sequential", "concurrent", "sharded"])
+def test_sector_flow_refreshed_once_per_run(db, monkeypatch, tmp_path, stub_server, mode):
+    _configure(monkeypatch, tmp_path, stub_server, f"sector_{mode}")
+    from crawler.naver_etf import collect_all_etf_data, init_db
+
+    init_db()
+    # 섹터 수급 집계는 ETF 저장마다가 아니라 실행 끝에서 한 번만 다시 계산한다
+    refresh_sector_flow = crawler.naver_etf.refresh_sector_flow
+    calls = []
+
+    def counting(conn):
+        calls.append(conn)
+        return refresh_sector_flow(conn)
+
+    monkeypatch.setattr(crawler.naver_etf, "refresh_sector_flow", counting)
+    statuses = {r["etf_code"]: r["status"] for r in collect_all_etf_data(mode=mode)}
+    assert sum(1 for s in statuses.values() if s == "saved") == len(PAGES) - 1
+    assert len(calls) == 1
@@ -0,0 +1,120 @@
+"""이벤트 저장소: 스냅샷 → 이벤트 마이그레이션의 복원 결과와 etf_holdings 삭제 조건을 확인한다."""
+
+import pytest
+
+from conftest import set_config
+
+CODE = "940001"
+SNAPSHOTS = [
+    ("2026-01-02", [
+        {"stock_name": "가종목", "stock_count": 100, "weight": 10.0},
+        {"stock_name": "나종목", "stock_count": 200, "weight": 20.0},
+    ]),
+    ("2026-01-05", [
+        {"stock_name": "가종목", "stock_count": 150, "weight": 12.5},
+        {"stock_name": "다종목", "stock_count": 50, "weight": 5.0},
+    ]),
+    ("2026-01-06", [
+        {"stock_name": "가종목", "stock_count": 150, "weight": 13.0},
+        {"stock_name": "다종목", "stock_count": 60, "weight": 5.0},
+    ]),
+]
+
+
+def _rows(holdings: list) -> list:
+    return sorted((h["stock_name"], h["stock_count"], h["weight"]) for h in holdings)
+
+
+def _setup(monkeypatch):
+    """snapshot 방식으로 스냅샷을 저장해 둔다."""
+    set_config(monkeypatch, HOLDINGS_STORAGE="snapshot")
+    from crawler.naver_etf import get_db_connection, init_db, save_holdings
+
+    init_db()
+    conn = get_db_connection()
+    try:
+        for collect_date, holdings in SNAPSHOTS:
+            save_holdings(CODE, holdings, collect_date, conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _holdings_rows() -> int:
+    from crawler.naver_etf import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM etf_holdings").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_migrate_reconstructs_every_snapshot(db, monkeypatch):
+    from crawler.events import migrate_from_snapshots, reconstruct_snapshot
+    from crawler.naver_etf import get_db_connection
+
+    _setup(monkeypatch)
+    conn = get_db_connection()
+    try:
+        stats = migrate_from_snapshots(conn)
+        assert stats["snapshots"] == len(SNAPSHOTS)
+        for collect_date, holdings in SNAPSHOTS:
+            assert _rows(reconstruct_snapshot(conn, CODE, collect_date)) == _rows(holdings)
+    finally:
+        conn.close()
+    assert _holdings_rows() == sum(len(h) for _, h in SNAPSHOTS)
+
+
+@pytest.mark.parametrize("storage", ["snapshot", "both"])
+def test_purge_requires_events_storage(db, monkeypatch, storage):
+    from crawler.events import migrate_from_snapshots
+    from crawler.naver_etf import get_db_connection
+
+    _setup(monkeypatch)
+    set_config(monkeypatch, HOLDINGS_STORAGE=storage)
+    conn = get_db_connection()
+    try:
+        with pytest.raises(RuntimeError):
+            migrate_from_snapshots(conn, purge=True)
+    finally:
+        conn.close()
+    assert _holdings_rows() == sum(len(h) for _, h in SNAPSHOTS)
+
+
+def test_purge_in_events_storage(db, monkeypatch):
+    from crawler.events import migrate_from_snapshots
+    from crawler.naver_etf import get_db_connection, load_etf_snapshot
+
+    _setup(monkeypatch)
+    set_config(monkeypatch, HOLDINGS_STORAGE="events")
+    conn = get_db_connection()
+    try:
+        migrate_from_snapshots(conn, purge=True)
+        snapshot_date, holdings = load_etf_snapshot(conn, CODE)
+    finally:
+        conn.close()
+    assert _holdings_rows() == 0
+    assert snapshot_date == SNAPSHOTS[-1][0]
+    assert _rows(holdings) == _rows(SNAPSHOTS[-1][1])
+
+
+def test_purge_refused_after_compaction(db, monkeypatch):
+    from crawler.events import migrate_from_snapshots
+    from crawler.naver_etf import get_db_connection
+    from crawler.retention import compact
+
+    _setup(monkeypatch)
+    # 저장된 날짜가 모두 보관 기준일 이전이다 (ETF별 마지막 스냅샷만 기본 테이블에 남는다)
+    compact(hot_days=30)
+    hot_rows = _holdings_rows()
+    assert hot_rows == len(SNAPSHOTS[-1][1])
+
+    set_config(monkeypatch, HOLDINGS_STORAGE="events")
+    conn = get_db_connection()
+    try:
+        with pytest.raises(RuntimeError):
+            migrate_from_snapshots(conn, purge=True)
+    finally:
+        conn.close()
+    assert _holdings_rows() == hot_rows
@@ -0,0 +1,84 @@
+"""구성종목 지문: 종목코드 기준 변경 감지와 이전 형식(종목명 기준) 지문의 재계산을 확인한다."""
+
+from conftest import set_config
+
+ETFS = {"테스트 지문액티브": "920001"}
+
+# 이름이 같은 서로 다른 종목 (종목명 기준 지문이면 한 항목으로 합쳐진다)
+HOLDINGS = [
+    {"stock_code": "111110", "stock_name": "동명전자", "stock_count": 100, "weight": 1.5},
+    {"stock_code": "222220", "stock_name": "동명전자", "stock_count": 200, "weight": 2.5},
+    {"stock_code": "333330", "stock_name": "다른종목", "stock_count": 300, "weight": 3.5},
+]
+
+
+def _save(holdings: list, collect_date: str = "2026-01-02"):
+    from crawler.naver_etf import get_db_connection, save_holdings
+
+    conn = get_db_connection()
+    try:
+        save_holdings("920001", holdings, collect_date, conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _changed(holdings: list) -> bool:
+    from crawler.naver_etf import get_db_connection, is_data_changed
+
+    conn = get_db_connection()
+    try:
+        return is_data_changed("920001", holdings, conn)
+    finally:
+        conn.close()
+
+
+def _init(monkeypatch):
+    set_config(monkeypatch, ETF_LIST=ETFS)
+    from crawler.naver_etf import init_db
+
+    init_db()
+
+
+def test_same_name_stocks_are_distinct(db, monkeypatch):
+    from crawler.naver_etf import holdings_fingerprint
+
+    _init(monkeypatch)
+    _save(HOLDINGS)
+    assert not _changed(list(reversed(HOLDINGS)))
+
+    # 같은 이름의 첫 종목만 주식수가 바뀌어도 변경으로 감지해야 한다
+    changed = [dict(h) for h in HOLDINGS]
+    changed[0]["stock_count"] = 150
+    assert _changed(changed)
+    assert holdings_fingerprint(changed) != holdings_fingerprint(HOLDINGS)
+
+    # 종목코드가 없는 행은 종목명으로 구분한다
+    no_code = [{**h, "stock_code": None} for h in HOLDINGS[2:]]
+    assert holdings_fingerprint(no_code) != holdings_fingerprint(HOLDINGS[2:])
+
+
+def test_old_fingerprints_are_recomputed(db, monkeypatch):
+    from crawler.naver_etf import FINGERPRINT_VERSION, fingerprint_version, get_db_connection
+
+    _init(monkeypatch)
+    _save(HOLDINGS)
+
+    # 이전 형식으로 저장된 DB: 버전 기록이 없고 지문이 종목명 기준이다
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM etf_fingerprint_version")
+        conn.execute("UPDATE etf_fingerprint SET fingerprint = 'name-based'")
+        conn.commit()
+        assert fingerprint_version(conn) == 1
+    finally:
+        conn.close()
+    assert _changed(HOLDINGS)
+
+    _init(monkeypatch)
+    conn = get_db_connection()
+    try:
+        assert fingerprint_version(conn) == FINGERPRINT_VERSION
+    finally:
+        conn.close()
+    assert not _changed(HOLDINGS)
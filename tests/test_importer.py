@@ -0,0 +1,226 @@
+"""
+과거 구성종목 덤프 적재: JSON 스트리밍의 청크 경계 처리, UNIQUE 기준 중복 제거,
+적재 후 파생 테이블(기준일 인덱스, 변화량, 수집일 원장)이 전체 재구성 결과와 같은지,
+과거 날짜를 적재한 뒤에도 실수집이 변경 없는 ETF를 건너뛰는지 확인한다.
+"""
+
+import io
+import json
+
+import pytest
+
+from conftest import set_config
+
+ETFS = {"테스트 적재액티브": "950001", "테스트 수집액티브": "950002"}
+
+RECORDS = [
+    {"etf_code": "950001", "collect_date": "2024-01-02", "stock_name": "가종목",
+     "stock_count": "1,234", "weight": "5.5%"},
+    {"etf_name": "테스트 적재액티브", "date": "20240102", "stock_name": "나 \"우\" [B], {C}",
+     "stock_count": 10, "weight": 1.25},
+    {"etf_code": "950001", "collect_date": "2024.01.03", "stock_name": "가종목",
+     "stock_count": 1300, "weight": 5.75},
+]
+
+
+class _Trickle:
+    """read(n) 요청에도 최대 step 글자만 돌려주는 텍스트 스트림 (청크 경계를 잘게 만든다)."""
+
+    def __init__(self, text: str, step: int):
+        self._f = io.StringIO(text)
+        self._step = step
+
+    def read(self, n: int = -1) -> str:
+        return self._f.read(min(n, self._step) if n >= 0 else self._step)
+
+
+@pytest.mark.parametrize("step", [1, 7, 64])
+@pytest.mark.parametrize("layout", ["array", "lines"])
+def test_json_stream_across_chunk_boundaries(step, layout):
+    from crawler.importer import _iter_json
+
+    if layout == "array":
+        text = " [\n" + ",\n".join(json.dumps(r, ensure_ascii=False) for r in RECORDS) + "\n]\n"
+    else:
+        text = "\n".join(json.dumps(r, ensure_ascii=False) for r in RECORDS) + "\n"
+    assert list(_iter_json(_Trickle(text, step))) == RECORDS
+
+
+def _write_jsonl(path, records: list) -> str:
+    path.write_text(
+        "\n".join(json.dumps(r, ensure_ascii=False) for r in records) + "\n", encoding="utf-8"
+    )
+    return str(path)
+
+
+def _init(monkeypatch):
+    set_config(monkeypatch, ETF_LIST=ETFS)
+    from crawler.naver_etf import init_db, seed_etf_master
+
+    init_db()
+    seed_etf_master()
+
+
+def _holdings(etf_code: str) -> list:
+    from crawler.naver_etf import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        return [tuple(r) for r in conn.execute(
+            "SELECT h.collect_date, s.stock_name, h.stock_count, h.weight "
+            "FROM etf_holdings h JOIN stock_master s ON s.stock_id = h.stock_id "
+            "WHERE h.etf_code = ? ORDER BY h.collect_date, s.stock_name",
+            (etf_code,),
+        )]
+    finally:
+        conn.close()
+
+
+def test_import_deduplicates(db, monkeypatch, tmp_path):
+    from crawler.importer import import_files
+
+    _init(monkeypatch)
+    bad = [
+        {"etf_code": "999999", "collect_date": "2024-01-02", "stock_name": "미등록ETF"},
+        {"etf_code": "950001", "collect_date": "2024-01-02", "stock_name": ""},
+    ]
+    # 같은 파일 안의 중복 행은 처음 것만 남는다
+    dup = dict(RECORDS[0], stock_count=9999)
+    path = _write_jsonl(tmp_path / "dump.jsonl", RECORDS + bad + [dup])
+
+    stats = import_files([path])
+    assert stats["read"] == len(RECORDS) + len(bad) + 1
+    assert stats["inserted"] == len(RECORDS)
+    assert stats["duplicates"] == 1
+    assert stats["unknown_etf"] == 1
+    assert stats["invalid"] == 1
+
+    expected = [
+        ("2024-01-02", "가종목", 1234, 5.5),
+        ("2024-01-02", "나 \"우\" [B], {C}", 10, 1.25),
+        ("2024-01-03", "가종목", 1300, 5.75),
+    ]
+    assert _holdings("950001") == expected
+
+    # 다시 적재하면 모두 기존 행과 겹친다
+    stats = import_files([path])
+    assert stats["inserted"] == 0
+    assert stats["duplicates"] == len(RECORDS) + 1
+    assert _holdings("950001") == expected
+
+
+def _derived(conn) -> dict:
+    """적재가 갱신해야 하는 파생 테이블 내용."""
+    return {
+        "asof": [tuple(r) for r in conn.execute(
+            "SELECT as_of_date, etf_code, snapshot_date FROM etf_snapshot_asof "
+            "ORDER BY as_of_date, etf_code"
+        )],
+        "deltas": [tuple(r) for r in conn.execute(
+            "SELECT collect_date, etf_code, stock_id, count_change, weight_change, entered, exited "
+            "FROM etf_holdings_delta ORDER BY collect_date, etf_code, stock_id"
+        )],
+        "ledger": [tuple(r) for r in conn.execute(
+            "SELECT collect_date, etf_count, saved_etf_count, stock_count, row_count "
+            "FROM collect_ledger ORDER BY collect_date"
+        )],
+    }
+
+
+def _rebuild_all(conn):
+    """파생 테이블을 처음부터 다시 만든다."""
+    from crawler.asof import rebuild_asof
+    from crawler.deltas import rebuild_deltas
+    from crawler.ledger import rebuild_ledger
+
+    rebuild_asof(conn)
+    conn.execute("DELETE FROM etf_holdings_delta")
+    rebuild_deltas(conn)
+    rebuild_ledger(conn)
+
+
+def test_import_rebuilds_derived_tables(db, monkeypatch, tmp_path):
+    from crawler.importer import import_files
+    from crawler.naver_etf import get_db_connection, load_etf_snapshot, save_holdings
+
+    _init(monkeypatch)
+    conn = get_db_connection()
+    try:
+        # 실수집으로 저장된 최근 이력
+        save_holdings("950001", [
+            {"stock_code": "000001", "stock_name": "가종목", "stock_count": 2000, "weight": 6.0},
+        ], "2024-02-01", conn)
+        save_holdings("950002", [
+            {"stock_code": "000002", "stock_name": "다종목", "stock_count": 500, "weight": 2.0},
+        ], "2024-02-05", conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    # 기존 날짜보다 앞선 날짜와 사이 날짜를 적재한다
+    older = RECORDS + [
+        {"etf_code": "950002", "collect_date": "2024-02-03", "stock_name": "다종목",
+         "stock_count": 400, "weight": 1.5},
+    ]
+    import_files([_write_jsonl(tmp_path / "older.jsonl", older)])
+
+    conn = get_db_connection()
+    try:
+        imported = _derived(conn)
+        for as_of_date, etf_code, snapshot_date in imported["asof"]:
+            assert load_etf_snapshot(conn, etf_code, as_of_date)[0] == snapshot_date
+        assert {d for d, _, _ in imported["asof"]} == {
+            "2024-01-02", "2024-01-03", "2024-02-01", "2024-02-03", "2024-02-05",
+        }
+        # 적재한 날짜 다음의 기존 스냅샷 변화량도 적재한 날짜 기준으로 다시 계산된다
+        assert {(d, e) for d, e, *_ in imported["deltas"]} == {
+            ("2024-01-02", "950001"), ("2024-01-03", "950001"), ("2024-02-01", "950001"),
+            ("2024-02-03", "950002"), ("2024-02-05", "950002"),
+        }
+        assert [r[:3] for r in imported["ledger"]] == [
+            ("2024-01-02", 1, 1), ("2024-01-03", 1, 1), ("2024-02-01", 1, 1),
+            ("2024-02-03", 2, 1), ("2024-02-05", 2, 1),
+        ]
+
+        _rebuild_all(conn)
+        assert _derived(conn) == imported
+    finally:
+        conn.close()
+
+
+def _collect(monkeypatch, stub_server) -> dict:
+    from crawler.naver_etf import collect_all_etf_data
+
+    set_config(monkeypatch, NAVER_ITEM_URL=stub_server.item_url, CRAWL_SLEEP=0)
+    stub_server.pages = {"950002": "semiconductor.html"}
+    results = collect_all_etf_data(mode="sequential")
+    return {r["etf_code"]: r["status"] for r in results}
+
+
+def test_import_older_dates_keeps_change_skip(db, monkeypatch, tmp_path, stub_server):
+    from crawler.importer import import_files
+    from crawler.naver_etf import get_db_connection
+
+    _init(monkeypatch)
+    set_config(monkeypatch, ETF_LIST={"테스트 수집액티브": "950002"})
+    assert _collect(monkeypatch, stub_server)["950002"] == "saved"
+    live = _holdings("950002")
+
+    older = [
+        {"etf_code": "950002", "collect_date": "2020-01-02", "stock_name": "과거종목",
+         "stock_count": 1, "weight": 100.0},
+    ]
+    stats = import_files([_write_jsonl(tmp_path / "older.jsonl", older)])
+    assert stats["inserted"] == 1
+
+    # 페이지 해시 캐시를 지워 구성종목 지문 비교까지 가도록 한다
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM etf_fetch_cache")
+        conn.commit()
+    finally:
+        conn.close()
+
+    # 지문은 여전히 최신 스냅샷 기준이므로 같은 페이지는 변경 없음으로 건너뛴다
+    assert _collect(monkeypatch, stub_server)["950002"] == "unchanged"
+    assert _holdings("950002") == [("2020-01-02", "과거종목", 1, 100.0)] + live
@@ -0,0 +1,72 @@
+"""구성종목 파서: lxml 섹션 파서와 BeautifulSoup 기준 구현의 결과가 같은지 확인한다."""
+
+import pytest
+
+from conftest import FIXTURE_PAGES, read_fixture, set_config
+from crawler.naver_etf import _extract_asset_section, decode_page, parse_holdings
+
+# 고정 페이지별 기대 종목 수 (두 파서가 함께 틀리는 경우를 잡기 위해)
+EXPECTED_COUNTS = {
+    "bad_numbers.html": 2,
+    "bio_euckr.html": 7,
+    "comments_nested.html": 4,
+    "entities.html": 5,
+    "large.html": 51,
+    "no_section.html": 0,
+    "semiconductor.html": 10,
+}
+
+
+def _parse(monkeypatch, backend: str, html: str, name: str, section: str = None) -> list:
+    set_config(monkeypatch, PARSER_BACKEND=backend)
+    return parse_holdings(html, name, section=section)
+
+
+def test_fixture_corpus_is_complete():
+    assert sorted(EXPECTED_COUNTS) == FIXTURE_PAGES
+
+
+@pytest.mark.parametrize("name", FIXTURE_PAGES)
+def test_lxml_matches_bs4(monkeypatch, name):
+    html = decode_page(read_fixture(name))
+    reference = _parse(monkeypatch, "bs4", html, name)
+    assert _parse(monkeypatch, "lxml", html, name) == reference
+    # 수집 경로처럼 해시용으로 잘라 둔 섹션을 넘겨도 같아야 한다
+    section = _extract_asset_section(html)
+    assert _parse(monkeypatch, "lxml", html, name, section=section) == reference
+    assert len(reference) == EXPECTED_COUNTS[name]
+
+
+def test_entities_are_decoded(monkeypatch):
+    html = decode_page(read_fixture("entities.html"))
+    holdings = {h["stock_code"]: h for h in _parse(monkeypatch, "lxml", html, "entities")}
+    assert holdings["036530"]["stock_name"] == "S&T홀딩스"
+    assert holdings["064960"]["stock_name"] == "SNT모티브"
+    assert holdings["000270"]["stock_name"] == "기아 <우>"
+    assert holdings["005380"]["stock_count"] == 1500
+    assert holdings["005380"]["weight"] == 7.7
+    assert holdings["012330"]["stock_count"] == 1000
+
+
+def test_comments_and_nested_tags(monkeypatch):
+    html = decode_page(read_fixture("comments_nested.html"))
+    holdings = _parse(monkeypatch, "lxml", html, "comments_nested")
+    codes = [h["stock_code"] for h in holdings]
+    assert "999999" not in codes  # 주석 안의 행은 무시
+    by_code = {h["stock_code"]: h for h in holdings}
+    assert by_code["005930"]["stock_count"] == 1234
+    assert by_code["000660"]["stock_name"] == "SK하이닉스"
+    assert by_code["035420"]["stock_count"] == 3300
+    assert by_code["035420"]["weight"] == 4.4
+
+
+def test_bad_numbers_are_skipped(monkeypatch):
+    html = decode_page(read_fixture("bad_numbers.html"))
+    holdings = _parse(monkeypatch, "lxml", html, "bad_numbers")
+    assert [h["stock_code"] for h in holdings] == ["247540", "066970"]
+
+
+def test_euc_kr_page_is_decoded(monkeypatch):
+    html = decode_page(read_fixture("bio_euckr.html"))
+    holdings = _parse(monkeypatch, "lxml", html, "bio_euckr")
+    assert holdings[0]["stock_name"] == "삼성바이오로직스"
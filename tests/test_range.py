@@ -0,0 +1,150 @@
+"""
+임의 기간 매수/청산: 누적 변화량으로 계산한 _range_rankings 결과가 두 날짜 기준 스냅샷을
+직접 비교한 결과와 같은지 확인한다. 수집일이 아닌 시작/종료일과, 누적 비중(cum_weight)을
+빼서 구한 구간 비중 변화의 부동소수 오차도 확인한다.
+"""
+
+import pytest
+
+from conftest import recent_dates, save_history, set_config, synthetic_history
+
+CODES = ("960001", "960002", "960003", "960004")
+
+
+def _history_dates() -> list:
+    """나흘에 하루는 수집하지 않은 날짜 목록 (비수집일을 시작/종료일로 쓰기 위해)."""
+    return [d for i, d in enumerate(recent_dates(60)) if i % 4 != 2]
+
+
+def _state(conn, as_of_date: str) -> dict:
+    """{(ETF 코드, 종목명): (주식수, 비중)} (각 ETF의 as_of_date 기준 마지막 스냅샷)."""
+    from crawler.naver_etf import load_etf_snapshot
+
+    state = {}
+    for code in CODES:
+        for h in load_etf_snapshot(conn, code, as_of_date)[1]:
+            state[(code, h["stock_name"])] = (h["stock_count"], h["weight"])
+    return state
+
+
+def _pair_changes(conn, date_from: str, date_to: str) -> dict:
+    """{(ETF 코드, 종목명): (주식수 변화, 비중 변화, 보유 변화)} (두 시점 스냅샷의 차이)."""
+    before = _state(conn, date_from)
+    after = _state(conn, date_to)
+    changes = {}
+    for key in set(before) | set(after):
+        count_a, weight_a = before.get(key, (0, 0.0))
+        count_b, weight_b = after.get(key, (0, 0.0))
+        changes[key] = (count_b - count_a, weight_b - weight_a, (key in after) - (key in before))
+    return changes
+
+
+def _direct_rankings(conn, date_from: str, date_to: str) -> dict:
+    """두 시점 스냅샷을 직접 비교한 매수/청산 집계 {(kind, 종목명): (ETF 수, 수량, 비중)}."""
+    grouped = {}
+    for (_, name), (c, w, n) in _pair_changes(conn, date_from, date_to).items():
+        if c > 0:
+            grouped.setdefault(("buy", name), []).append((c, round(round(w, 4), 2)))
+        if n < 0:
+            grouped.setdefault(("sell", name), []).append((-c, round(round(-w, 4), 2)))
+    return {
+        key: (len(items), sum(c for c, _ in items), sum(w for _, w in items))
+        for key, items in grouped.items()
+    }
+
+
+@pytest.mark.parametrize("storage", ["snapshot", "events"])
+def test_range_matches_snapshot_diff(db, monkeypatch, storage):
+    from analyzer import signal
+    from analyzer.engine import _range_rankings
+
+    set_config(monkeypatch, HOLDINGS_STORAGE=storage)
+    from crawler.naver_etf import init_db
+
+    init_db()
+    collected = _history_dates()
+    save_history(synthetic_history(collected, seed=2))
+    skipped = sorted(set(recent_dates(60)) - set(collected))
+
+    conn = signal.get_db_connection()
+    try:
+        collect_dates = set(signal.get_collect_dates(conn, limit=-1))
+        assert not collect_dates & set(skipped)
+        ranges = [
+            (collected[0], collected[-1]),
+            (collected[10], collected[11]),
+            (skipped[0], skipped[-1]),  # 시작/종료일 모두 비수집일
+            (skipped[3], collected[30]),
+            (collected[5], skipped[8]),
+            ("2000-01-01", collected[20]),  # 첫 수집일 이전부터 (첫 스냅샷 전체가 편입)
+            (collected[-5], "2999-12-31"),  # 마지막 수집일 이후까지
+        ]
+        for date_from, date_to in ranges:
+            rows = _range_rankings(conn, date_from, date_to)
+            actual = {
+                (r["kind"], r["stock_name"]): (r["etf_count"], r["amount"], r["weight"])
+                for r in rows
+            }
+            expected = _direct_rankings(conn, date_from, date_to)
+            assert actual.keys() == expected.keys(), (date_from, date_to)
+            for key, (etf_count, amount, weight) in expected.items():
+                assert actual[key][:2] == (etf_count, amount), (date_from, date_to, key)
+                assert actual[key][2] == pytest.approx(weight, abs=1e-9)
+            assert any(kind == "buy" for kind, _ in actual)
+
+        # 정렬·형식까지: 수집일과 같은 구간은 days 기반 결과와 같다
+        dates = signal.get_collect_dates(conn, limit=4)
+        range_buy = signal.get_top_buy_increase(top_n=-1, date_from=dates[3], date_to=dates[0])
+        range_sell = signal.get_top_sell_increase(top_n=-1, date_from=dates[3], date_to=dates[0])
+    finally:
+        conn.close()
+    assert range_buy == signal.get_top_buy_increase(days=3, top_n=-1)
+    assert range_sell == signal.get_top_sell_increase(days=3, top_n=-1)
+
+
+def test_cumulative_weight_subtraction(db):
+    """누적 비중은 오래 쌓일수록 커지므로, 두 누적값의 차이가 직접 비교한 비중 변화와 같은지 본다."""
+    from analyzer import signal
+    from crawler.naver_etf import get_db_connection, init_db, save_holdings
+
+    init_db()
+    dates = recent_dates(200)
+    # 이진수로 정확히 표현되지 않는 비중을 매일 바꿔 누적 오차가 쌓이게 한다
+    steps = (0.1, 0.2, 0.7, 33.33, 0.07, 12.01, 0.03)
+    conn = get_db_connection()
+    try:
+        weight = 1.11
+        for i, collect_date in enumerate(dates):
+            weight = round(weight + steps[i % len(steps)] * (1 if i % 3 else -1), 2)
+            save_holdings(CODES[0], [
+                {"stock_code": "800000", "stock_name": "합성종목00",
+                 "stock_count": 1000 + i, "weight": abs(weight)},
+                {"stock_code": "800001", "stock_name": "합성종목01",
+                 "stock_count": 500 + (i % 7) * 100, "weight": round(0.1 * (i % 9) + 0.01, 2)},
+            ], collect_date, conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    conn = signal.get_db_connection()
+    try:
+        stock_ids = dict(conn.execute("SELECT stock_name, stock_id FROM stock_master"))
+
+        def cumulative(stock_id: int, as_of_date: str) -> float:
+            row = conn.execute(
+                "SELECT cum_weight FROM etf_holdings_cumulative "
+                "WHERE etf_code = ? AND stock_id = ? AND collect_date <= ? "
+                "ORDER BY collect_date DESC LIMIT 1",
+                (CODES[0], stock_id, as_of_date),
+            ).fetchone()
+            return row[0] if row else 0.0
+
+        for i, j in [(0, 1), (0, 199), (120, 121), (150, 199), (37, 180)]:
+            changes = _pair_changes(conn, dates[i], dates[j])
+            for (_, name), (_, w, _) in changes.items():
+                diff = cumulative(stock_ids[name], dates[j]) - cumulative(stock_ids[name], dates[i])
+                assert diff == pytest.approx(w, abs=1e-9)
+                # 응답에 쓰는 반올림(소수 4자리 → 2자리) 뒤에는 정확히 같다
+                assert round(round(diff, 4), 2) == round(round(w, 4), 2)
+    finally:
+        conn.close()
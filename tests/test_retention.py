@@ -0,0 +1,66 @@
+"""
+보관 압축: 합성 이력 DB를 압축하기 전후로 시그널, ETF 구성종목 조회, 수집일 원장이 같은지 확인한다.
+비교 기간이 보관 기준일 이전에 닿는 조회도 포함한다.
+"""
+
+from conftest import recent_dates, save_history, synthetic_history
+
+DAYS = 40
+HOT_DAYS = 15
+
+
+def _results() -> dict:
+    """압축 전후로 비교할 분석 결과."""
+    from analyzer import signal
+
+    conn = signal.get_db_connection()
+    try:
+        collect_dates = signal.get_collect_dates(conn, limit=-1)
+        ledger = [tuple(r) for r in conn.execute(
+            "SELECT collect_date, etf_count, saved_etf_count, stock_count, row_count "
+            "FROM collect_ledger ORDER BY collect_date"
+        )]
+    finally:
+        conn.close()
+
+    results = {"dates": collect_dates, "ledger": ledger}
+    for days in (1, 3, 10, 30):
+        results[f"buy_{days}"] = signal.get_top_buy_increase(days=days, top_n=50)
+        results[f"sell_{days}"] = signal.get_top_sell_increase(days=days, top_n=50)
+    results["overlap"] = signal.get_overlapping_stocks(top_n=50)
+    results["weight_up"] = signal.get_weight_increase_signals(top_n=50)
+    results["weight_down"] = signal.get_weight_decrease_signals(top_n=50)
+    for code in ("960001", "960002", "960003", "960004"):
+        results[f"holdings_{code}"] = signal.get_etf_holdings(code)
+    return results
+
+
+def test_compact_keeps_results(db):
+    from analyzer import signal
+    from analyzer.cache import result_cache
+    from crawler.naver_etf import init_db
+    from crawler.retention import archived_through, compact
+
+    init_db()
+    # 마지막 ETF는 보관 기준일 전부터 바뀌지 않는다 (기본 테이블에 경계 스냅샷만 남는다)
+    dates = recent_dates(DAYS)
+    save_history(synthetic_history(dates, quiet_after=10))
+    before = _results()
+    assert before["dates"][-1] == dates[0]
+    assert before["buy_30"] and before["holdings_960004"]
+    assert [r[0] for r in before["ledger"]] == sorted(before["dates"])
+
+    stats = compact(hot_days=HOT_DAYS)
+    cold = [d for d in before["dates"] if d < stats["cutoff"]]
+    assert stats["dates"] == len(cold) and stats["rows"] > 0
+    # 30일 비교 기간은 보관 DB로 옮긴 날짜에 닿는다
+    assert before["dates"][30] < stats["cutoff"]
+
+    conn = signal.get_db_connection()
+    try:
+        assert archived_through(conn) == max(cold)
+    finally:
+        conn.close()
+    # 압축은 분석 결과를 바꾸지 않아 세대 번호를 올리지 않으므로, 캐시를 비워 보관 DB에서 다시 읽게 한다
+    result_cache.clear()
+    assert _results() == before
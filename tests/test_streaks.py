@@ -0,0 +1,85 @@
+"""
+비중 시그널 연속일: 여러 종목을 한 번에 계산한 결과(_avg_weights / _calc_consecutive_days)가
+종목·날짜 쌍마다 AVG(weight)를 따로 조회하던 방식과 같은지 확인한다.
+스냅샷 / 이벤트 저장 방식과, 비교 기간이 보관 기준일 이전에 닿는 경우를 포함한다.
+"""
+
+import pytest
+
+from conftest import recent_dates, save_history, set_config, synthetic_history
+
+
+def _avg_weight(conn, stock_id: int, collect_date: str) -> float:
+    """해당 날짜 기준 종목 평균 비중 (종목·날짜마다 따로 조회하던 방식)."""
+    from analyzer import signal
+
+    if signal.HOLDINGS_STORAGE != "events":
+        prefix = signal._holdings_prefix(conn, collect_date)
+        row = conn.execute(
+            f"SELECT AVG(h.weight) as avg_w FROM {prefix}etf_snapshot_asof a "
+            f"JOIN {prefix}etf_holdings h "
+            f"ON h.etf_code = a.etf_code AND h.collect_date = a.snapshot_date "
+            f"WHERE a.as_of_date = ? AND h.stock_id = ?",
+            (collect_date, stock_id),
+        ).fetchone()
+        return row["avg_w"] if row and row["avg_w"] else 0
+
+    weights = [
+        r["weight"] for r in signal._load_snapshot(conn, collect_date)
+        if r["stock_id"] == stock_id and r["weight"] is not None
+    ]
+    return sum(weights) / len(weights) if weights else 0
+
+
+def _streak(conn, stock_id: int, dates: list, direction: str) -> int:
+    consecutive = 0
+    for i in range(len(dates) - 1):
+        curr_avg = _avg_weight(conn, stock_id, dates[i])
+        prev_avg = _avg_weight(conn, stock_id, dates[i + 1])
+        if direction == "up" and curr_avg > prev_avg:
+            consecutive += 1
+        elif direction == "down" and curr_avg < prev_avg:
+            consecutive += 1
+        else:
+            break
+    return consecutive
+
+
+@pytest.mark.parametrize("storage, compacted", [
+    ("snapshot", False),
+    ("events", False),
+    ("snapshot", True),
+])
+def test_streaks_match_per_stock_queries(db, monkeypatch, storage, compacted):
+    from analyzer import signal
+    from crawler.naver_etf import init_db
+    from crawler.retention import archived_through, compact
+
+    set_config(monkeypatch, HOLDINGS_STORAGE=storage)
+    init_db()
+    # 종목 수를 줄여 같은 종목이 여러 날 연속으로 오르내리도록 한다
+    save_history(synthetic_history(recent_dates(30), etfs=6, seed=1))
+    if compacted:
+        compact(hot_days=5)
+
+    conn = signal.get_db_connection()
+    try:
+        dates = signal.get_collect_dates(conn, limit=10)
+        if compacted:
+            # 10일 비교 기간이 보관 DB로 옮긴 날짜에 닿는다
+            assert dates[-1] <= archived_through(conn) < dates[0]
+        stock_ids = [r[0] for r in conn.execute("SELECT stock_id FROM stock_master")]
+
+        for direction in ("up", "down"):
+            streaks = signal._calc_consecutive_days(conn, stock_ids, dates, direction)
+            expected = {s: _streak(conn, s, dates, direction) for s in stock_ids}
+            assert streaks == expected
+            assert any(n >= 2 for n in expected.values())
+
+        # 평균 비중 자체도 같다 (보유 ETF가 없는 종목은 키 없음 = 0)
+        avgs = signal._avg_weights(conn, stock_ids, dates)
+        for d in dates:
+            for s in stock_ids:
+                assert avgs[d].get(s, 0) == pytest.approx(_avg_weight(conn, s, d))
+    finally:
+        conn.close()
@@ -0,0 +1,139 @@
+"""
+시그널 백엔드 비교: 합성 이력 DB에서 compute_signals()의 SQL 백엔드와 numpy 백엔드 결과가 같은지 확인한다.
+저장 방식(snapshot / events)과 컬럼형 스냅샷 파일 사용 여부마다 따로 확인한다.
+"""
+
+import random
+
+import pytest
+
+from conftest import set_config
+
+ETFS = {
+    "테스트 반도체액티브": "900001",
+    "테스트 바이오액티브": "900002",
+    "테스트 배당액티브": "900003",
+    "테스트 2차전지액티브": "900004",
+    "테스트 조선액티브": "900005",
+    "테스트 소비액티브": "900006",
+}
+STOCKS = [(f"{100000 + i:06d}", f"종목{i:02d}") for i in range(30)]
+DATES = [f"2026-01-{d:02d}" for d in range(2, 16)]
+
+
+def _history(seed: int = 7) -> list:
+    """
+    (수집일, ETF 코드, 구성종목) 목록을 만든다. 날짜마다 일부 ETF만 바뀌며
+    편입 / 편출 / 주식수·비중 변화 / NULL 비중 / 같은 변화량(동률)이 모두 나온다.
+    """
+    rng = random.Random(seed)
+    portfolios = {
+        code: {
+            stock: [rng.randint(1, 50) * 100, round(rng.uniform(0.5, 10), 2)]
+            for stock in rng.sample(STOCKS, 8)
+        }
+        for code in ETFS.values()
+    }
+    history = []
+    for i, collect_date in enumerate(DATES):
+        for code, holdings in portfolios.items():
+            if i and rng.random() < 0.3:
+                continue  # 이날은 변경 없음 (직전 스냅샷 유지)
+            if i:
+                for stock in list(holdings):
+                    roll = rng.random()
+                    if roll < 0.1 and len(holdings) > 4:
+                        del holdings[stock]  # 편출
+                    elif roll < 0.5:
+                        holdings[stock][0] += rng.choice([-300, -100, 100, 100, 200, 500])
+                        holdings[stock][1] = round(holdings[stock][1] + rng.uniform(-1, 1), 2)
+                if rng.random() < 0.5:
+                    stock = rng.choice([s for s in STOCKS if s not in holdings])
+                    holdings[stock] = [rng.randint(1, 50) * 100, round(rng.uniform(0.5, 5), 2)]
+            history.append((collect_date, code, [
+                {
+                    "stock_code": stock[0],
+                    "stock_name": stock[1],
+                    "stock_count": max(count, 100),
+                    # 일부 종목은 비중 NULL
+                    "weight": None if stock[0].endswith("7") else weight,
+                }
+                for stock, (count, weight) in sorted(holdings.items())
+            ]))
+        # 동률: 두 ETF가 같은 날 같은 두 종목을 같은 수량만큼 늘린다
+        if i and i % 3 == 0:
+            for code in ("900001", "900002"):
+                for stock in STOCKS[:2]:
+                    portfolios[code].setdefault(stock, [1000, 1.0])[0] += 700
+    return history
+
+
+def _build(monkeypatch, storage: str, columnar: bool):
+    """합성 이력을 save_holdings()로 저장한다."""
+    set_config(monkeypatch, HOLDINGS_STORAGE=storage, COLUMNAR_ENABLED=columnar, ETF_LIST=ETFS)
+
+    from crawler.naver_etf import (
+        flush_columnar,
+        get_db_connection,
+        init_db,
+        save_holdings,
+        seed_etf_master,
+    )
+
+    init_db()
+    seed_etf_master()
+    conn = get_db_connection()
+    try:
+        for collect_date, code, holdings in _history():
+            save_holdings(code, holdings, collect_date, conn)
+        conn.commit()
+        flush_columnar(conn)
+    finally:
+        conn.close()
+
+
+def _signals(monkeypatch, backend: str, horizons: tuple = None) -> dict:
+    from analyzer.engine import compute_signals
+
+    set_config(monkeypatch, ANALYZER_BACKEND=backend)
+    return compute_signals.__wrapped__(horizons).to_dict()
+
+
+@pytest.mark.parametrize("storage", ["snapshot", "events"])
+@pytest.mark.parametrize("columnar", [True, False])
+def test_numpy_backend_matches_sql(db, monkeypatch, storage, columnar):
+    _build(monkeypatch, storage, columnar)
+
+    for horizons in (None, (1, 2, 3, 5, 10, 20)):
+        expected = _signals(monkeypatch, "sql", horizons)
+        assert expected["latest_date"] == DATES[-1]
+        # 합성 데이터가 비교할 경우를 실제로 포함하는지 확인
+        for days in expected["buy"]:
+            assert expected["buy"][days] or days == 1
+        assert any(expected["sell"].values())
+        assert expected["weight_increase"] and expected["weight_decrease"] and expected["overlap"]
+        assert any(
+            a["total_increase"] == b["total_increase"]
+            for rows in expected["buy"].values()
+            for a, b in zip(rows, rows[1:])
+        )
+
+        assert _signals(monkeypatch, "numpy", horizons) == expected
+
+
+def test_python_kernel_matches_numpy(db, monkeypatch):
+    from analyzer.vectorized import _kernel_python, compute_bundle
+
+    _build(monkeypatch, "snapshot", True)
+    assert compute_bundle(kernel=_kernel_python).to_dict() == compute_bundle().to_dict()
+
+
+def test_empty_db(db, monkeypatch):
+    set_config(monkeypatch, ETF_LIST=ETFS)
+    from crawler.naver_etf import init_db, seed_etf_master
+
+    init_db()
+    seed_etf_master()
+    expected = _signals(monkeypatch, "sql")
+    assert expected["latest_date"] is None
+    assert _signals(monkeypatch, "numpy") == expected